@@ -1,17 +1,17 @@
 # app.py - Streamlit 앱 (환경변수 활용)
 
 import streamlit as st
-import asyncio
 import nest_asyncio
 import time
 import os
 import json
-from models.lm_studio import LMStudioClient
 # from retrieval.vector_store import VectorStore # VectorStore 임포트 제거
-from core.orchestrator import Orchestrator
+from core.resource_registry import registry, get_resource
 from retrieval.document_loader import DocumentLoader # 이 로더는 save_file에서 사용되므로 유지
 from utils.logger import setup_logger
-from config import print_config, DEBUG_MODE, ENABLED_TOOLS
+from utils.helpers import get_rss_mb
+from utils.event_loop import run_coroutine, iterate_in_background
+from config import print_config, DEBUG_MODE, ENABLED_TOOLS, STREAMING_ENABLED, FILE_LIST_PAGE_SIZE, RESOURCE_WARMUP
 
 # 비동기 지원을 위한 nest_asyncio 설정
 nest_asyncio.apply()
@@ -19,6 +19,9 @@ nest_asyncio.apply()
 # 로거 설정
 logger = setup_logger(__name__)
 
+# 무거운 공유 리소스는 프로세스당 한 번만 백그라운드에서 미리 생성 (이미 생성/진행 중이면 무시)
+registry.warm_up(RESOURCE_WARMUP)
+
 # 세션 상태 초기화
 if 'messages' not in st.session_state:
     st.session_state.messages = []
@@ -33,19 +36,15 @@ if 'config_info' not in st.session_state:
     st.session_state.config_info = print_config()
 
 def initialize_system():
-    """AgenticRAG 시스템 초기화"""
+    """AgenticRAG 시스템 초기화 (무거운 객체는 프로세스 공유 레지스트리에서 가져오고 세션에는 참조만 저장)"""
     with st.spinner("시스템 초기화 중..."):
         try:
-            # LM Studio 클라이언트 초기화
-            lm_studio_client = LMStudioClient()
-            
-            # 벡터 스토어 초기화 (vector_tool 도구가 활성화된 경우에만) 로직 제거
-            # vector_store = None
-            # if "vector_tool" in ENABLED_TOOLS:
-            #     vector_store = VectorStore()
+            start_time = time.perf_counter()
+            rss_before = get_rss_mb()
             
-            # 오케스트레이터 초기화 - vector_store 인자 제거
-            orchestrator = Orchestrator(lm_studio_client)
+            # LM Studio 클라이언트와 오케스트레이터(도구 포함)는 모든 세션이 공유 - 처음 한 번만 생성됨
+            lm_studio_client = get_resource("lm_studio_client")
+            orchestrator = get_resource("orchestrator")
             
             # 세션 상태에 저장
             st.session_state.lm_studio_client = lm_studio_client
@@ -64,25 +63,37 @@ def initialize_system():
             if hasattr(orchestrator, 'tool_manager'):
                 st.session_state.tool_info = orchestrator.tool_manager.get_tool_info()
             
+            # 세션 시작 비용 측정 (시작 시간, 프로세스 메모리)
+            st.session_state.session_metrics = {
+                "init_time": round(time.perf_counter() - start_time, 3),
+                "rss_before_mb": rss_before,
+                "rss_after_mb": get_rss_mb()
+            }
+            logger.info(f"세션 초기화 완료: {st.session_state.session_metrics}")
+            
             return True
         except Exception as e:
             logger.error(f"시스템 초기화 오류: {str(e)}")
             st.error(f"시스템 초기화 중 오류가 발생했습니다: {str(e)}")
             return False
 
-async def process_query_async(query):
-    """질의를 비동기적으로 처리"""
+def process_query(query):
+    """질의를 공유 백그라운드 이벤트 루프에서 처리 (턴마다 새 루프를 만들지 않아 연결 풀이 턴 사이에 재사용됨)"""
     orchestrator = st.session_state.orchestrator
     start_time = time.time()
     
     try:
-        result = await orchestrator.process_query(query)
+        result = run_coroutine(orchestrator.process_query(query))
         
         # 디버그 정보 업데이트
         st.session_state.debug_info = {
             "query": query,
             "tool_calls": result["tool_calls"],
             "tool_results": result["tool_results"],
+            "tool_timings": result.get("tool_timings", {}),
+            "metrics": result.get("metrics", {}),
+            "cache": result.get("cache"),
+            "route_source": result.get("route_source"),
             "processing_time": f"{time.time() - start_time:.2f} 초"
         }
         
@@ -91,6 +102,39 @@ async def process_query_async(query):
         logger.error(f"질의 처리 오류: {str(e)}")
         return f"질의 처리 중 오류가 발생했습니다: {str(e)}"
 
+def render_response_stream(query, placeholder):
+    """도구 실행 후 최종 응답을 토큰 단위로 채팅 영역에 표시"""
+    start_time = time.time()
+    try:
+        with st.spinner("처리 중..."):
+            # 도구 실행과 응답 스트림 생성 모두 공유 백그라운드 루프에서 처리하고 (LLM 동시 요청 제한 적용),
+            # 스트림 조각은 이 스레드에서 하나씩 받아 표시
+            result = run_coroutine(st.session_state.orchestrator.process_query_stream(query, use_async=True))
+        
+        response = ""
+        for delta in iterate_in_background(result["response_stream"]):
+            response += delta
+            placeholder.markdown(response + "▌")
+        placeholder.markdown(response)
+        
+        # 디버그 정보 업데이트 (스트림 소비 후 metrics에 TTFT가 기록됨)
+        st.session_state.debug_info = {
+            "query": query,
+            "tool_calls": result["tool_calls"],
+            "tool_results": result["tool_results"],
+            "tool_timings": result.get("tool_timings", {}),
+            "metrics": result.get("metrics", {}),
+            "cache": result.get("cache"),
+            "route_source": result.get("route_source"),
+            "processing_time": f"{time.time() - start_time:.2f} 초"
+        }
+        return response
+    except Exception as e:
+        logger.error(f"질의 처리 오류: {str(e)}")
+        response = f"질의 처리 중 오류가 발생했습니다: {str(e)}"
+        placeholder.markdown(response)
+        return response
+
 def upload_and_index_files():
     st.subheader("문서 업로드 및 색인")
     uploaded_files = st.file_uploader("문서를 업로드하세요 (txt, pdf)", type=["txt", "pdf"], accept_multiple_files=True)
@@ -115,6 +159,29 @@ def upload_and_index_files():
         else:
             st.error("벡터 스토어가 초기화되지 않았습니다.")
 
+def prepare_download(file_id):
+    """
+    파일 목록의 "다운로드 준비" 버튼 콜백 - 해당 파일 내용을 GridFS에서 한 번만 읽어 세션에 보관
+    (download_button은 rerun마다 data를 다시 읽으므로 파일 객체 대신 읽어 둔 bytes를 전달)
+    """
+    from storage.mongodb_storage import MongoDBStorage
+    try:
+        data = MongoDBStorage.get_instance().get_file_content_by_id(file_id)
+    except Exception as e:
+        logger.error(f"파일 ID '{file_id}' 내용 조회 오류: {e}")
+        data = None
+    st.session_state.prepared_download = {"file_id": file_id, "data": data}
+
+def clear_prepared_download():
+    """다운로드 후 보관한 파일 내용을 세션에서 해제"""
+    st.session_state.prepared_download = None
+
+def change_file_page(step):
+    """파일 목록 페이지 이동 콜백 - 다음 rerun에서 해당 페이지 메타데이터를 다시 조회"""
+    st.session_state.file_page = max(0, st.session_state.get('file_page', 0) + step)
+    st.session_state.mongo_files = None
+    st.session_state.prepared_download = None
+
 def main():
     """Streamlit 앱 메인 함수"""
     st.set_page_config(
@@ -202,16 +269,21 @@ def main():
             # 응답 생성
             with st.chat_message("assistant"):
                 message_placeholder = st.empty()
-                with st.spinner("처리 중..."):
-                    if st.session_state.system_initialized:
-                        # 비동기 처리 실행
-                        response = asyncio.run(process_query_async(prompt))
-                        message_placeholder.markdown(response)
-                        st.session_state.messages.append({"role": "assistant", "content": response})
-                    else:
-                        error_msg = "시스템이 초기화되지 않았습니다. 사이드바에서 '시스템 초기화' 버튼을 클릭하세요."
-                        message_placeholder.error(error_msg)
-                        st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                if st.session_state.system_initialized and STREAMING_ENABLED:
+                    # 스트리밍 처리: 토큰이 생성되는 대로 표시
+                    response = render_response_stream(prompt, message_placeholder)
+                    st.session_state.messages.append({"role": "assistant", "content": response})
+                else:
+                    with st.spinner("처리 중..."):
+                        if st.session_state.system_initialized:
+                            # 비동기 처리 실행 (공유 백그라운드 루프)
+                            response = process_query(prompt)
+                            message_placeholder.markdown(response)
+                            st.session_state.messages.append({"role": "assistant", "content": response})
+                        else:
+                            error_msg = "시스템이 초기화되지 않았습니다. 사이드바에서 '시스템 초기화' 버튼을 클릭하세요."
+                            message_placeholder.error(error_msg)
+                            st.session_state.messages.append({"role": "assistant", "content": error_msg})
     
     with col2:
         # 문서 업로드 및 색인 UI
@@ -265,17 +337,39 @@ def main():
                 # content_type = uploaded_file_mongo.type # GridFS에 저장 시 필요할 수 있음
 
                 with st.spinner(f"{filename} 업로드 중..."):
+                    progress_bar = st.progress(0.0, text="파일 읽는 중...")
+
+                    def on_ingest_progress(event):
+                        # 색인 파이프라인 진행 이벤트 → 진행 표시줄 (전체 청크 수는 분할이 끝나야 확정되므로 분할된 청크 기준)
+                        stage = event["stage"]
+                        split, written = event["chunks_split"], event["chunks_written"]
+                        if stage == "done":
+                            progress_bar.progress(
+                                1.0, text=f"색인 완료: 청크 {written}개, 임베딩 재사용 {event['chunks_reused']}개 ({event['elapsed']}초)"
+                            )
+                        elif stage == "load":
+                            progress_bar.progress(written / split if split else 0.0, text=f"문서 읽는 중... (페이지 {event['pages']})")
+                        else:
+                            progress_bar.progress(
+                                written / split if split else 0.0,
+                                text=f"임베딩/태그 생성 중... ({written}/{split} 청크 저장)"
+                            )
+
                     try:
                         # save_file 메소드를 호출하고 결과를 확인
                         # save_file 메소드는 GridFS 저장 후 벡터 컬렉션 저장까지 처리
                         # save_file 메소드가 file_id를 반환하도록 수정했다면 여기서 사용 가능
                         # mongo_storage.save_file(file_data, filename, metadata={"tags": ["업로드"]}) # 예시 메타데이터
-                        save_result = mongo_storage.save_file(file_data, filename, metadata={"tags": ["업로드"]}) # 결과 저장
+                        save_result = mongo_storage.save_file(
+                            file_data, filename, metadata={"tags": ["업로드"]}, progress_callback=on_ingest_progress
+                        ) # 결과 저장
 
                         if save_result == "xlsx_saved":
                              st.success(f"{filename} 파일이 GridFS에 저장되었습니다. (.xlsx 파일은 벡터 검색 대상에서 제외됩니다.)")
                         elif save_result is True:
                             st.success(f"{filename} 업로드 성공! 문서가 색인되었습니다.")
+                        elif save_result == "updated":
+                            st.success(f"{filename} 파일 내용이 변경되어 새 버전으로 다시 색인되었습니다.")
                         elif save_result is None:
                              # 파일이 이미 존재하는 경우 (save_file에서 None 반환)
                              st.info(f"'{filename}' 파일은 이미 업로드되었습니다.")
@@ -288,6 +382,10 @@ def main():
                         # 파일이 이미 존재하는 경우 (save_result is None)에도 목록 갱신을 위해 추가하도록 변경
                         if save_result is not False:
                             st.session_state.processed_files.append((filename, uploaded_file_mongo.size))
+                            # 파일 목록 패널이 새 파일을 포함하도록 첫 페이지부터 다시 조회
+                            st.session_state.mongo_files = None
+                            st.session_state.file_page = 0
+                            st.session_state.prepared_download = None
                         
                         # 업로드 완료 후 상태 변경
                         st.session_state.is_uploading = False
@@ -313,16 +411,21 @@ def main():
 
         # 시스템이 초기화된 경우에만 파일 목록을 불러오고 표시
         if st.session_state.get('system_initialized', False):
+            from storage.mongodb_storage import MongoDBStorage
+            mongo_storage = MongoDBStorage.get_instance()
+            if 'file_page' not in st.session_state:
+                st.session_state.file_page = 0
             if 'mongo_files' not in st.session_state or st.session_state.mongo_files is None:
-                 # MongoDBStorage 인스턴스 가져와서 list_files 호출
-                from storage.mongodb_storage import MongoDBStorage
-                mongo_storage = MongoDBStorage.get_instance()
+                 # 현재 페이지의 파일 메타데이터만 조회 (내용은 다운로드 요청 시에만 읽음)
                 try:
-                     st.session_state.mongo_files = mongo_storage.list_files()
-                     logger.info(f"GridFS 파일 목록 세션 상태에 저장: {len(st.session_state.mongo_files)}개")
+                     st.session_state.mongo_files, st.session_state.mongo_files_total = mongo_storage.list_files_page(
+                         skip=st.session_state.file_page * FILE_LIST_PAGE_SIZE, limit=FILE_LIST_PAGE_SIZE
+                     )
+                     logger.info(f"GridFS 파일 목록 세션 상태에 저장: {len(st.session_state.mongo_files)}개 (페이지 {st.session_state.file_page + 1})")
                 except Exception as e:
                      logger.error(f"GridFS 파일 목록 조회 오류: {e}")
                      st.session_state.mongo_files = [] # 오류 발생 시 빈 리스트
+                     st.session_state.mongo_files_total = 0
                      st.warning("파일 목록을 가져오는 중 오류가 발생했습니다. MongoDB 연결 상태를 확인하세요.")
 
             if st.session_state.mongo_files:
@@ -339,24 +442,41 @@ def main():
                          # 파일 이름과 크기 표시
                          st.write(f"**{filename}** ({file_size_mb} MB)")
 
-                         # 다운로드 버튼 추가 (파일 정보 바로 아래에 배치)
-                         # MongoDBStorage 싱글톤 인스턴스 가져오기
-                         from storage.mongodb_storage import MongoDBStorage
-                         mongo_storage = MongoDBStorage.get_instance()
-
-                         # 파일 내용 가져오기 (다운로드 버튼 클릭 시 실행)
-                         file_content = mongo_storage.get_file_content_by_id(file_id)
-
-                         if file_content is not None:
+                         # 다운로드는 "다운로드 준비"를 누른 파일 하나만 내용을 한 번 읽어 세션에 보관하고 버튼을 표시
+                         # (rerun마다 GridFS에서 파일 내용을 다시 읽지 않도록 함, 다운로드하면 해제)
+                         prepared = st.session_state.get('prepared_download')
+                         prepared = prepared if prepared and prepared["file_id"] == file_id else None
+                         if prepared and prepared["data"] is not None:
                              st.download_button(
                                  label="다운로드",
-                                 data=file_content,
+                                 data=prepared["data"],
                                  file_name=filename,
                                  mime='application/octet-stream',
-                                 key=f"download_{file_id}"
+                                 key=f"download_{file_id}",
+                                 on_click=clear_prepared_download
                              )
                          else:
-                              st.text("내용 가져오기 실패")
+                             if prepared:
+                                 st.text("내용 가져오기 실패")
+                             st.button(
+                                 "다운로드 준비",
+                                 key=f"prepare_{file_id}",
+                                 on_click=prepare_download,
+                                 args=(file_id,)
+                             )
+
+                # 페이지 이동
+                total_pages = max(1, -(-st.session_state.get('mongo_files_total', 0) // FILE_LIST_PAGE_SIZE))
+                if total_pages > 1:
+                    prev_col, page_col, next_col = st.columns([1, 2, 1])
+                    with prev_col:
+                        st.button("이전", key="file_page_prev", disabled=st.session_state.file_page == 0,
+                                  on_click=change_file_page, args=(-1,))
+                    with page_col:
+                        st.caption(f"{st.session_state.file_page + 1} / {total_pages} 페이지 (전체 {st.session_state.mongo_files_total}개)")
+                    with next_col:
+                        st.button("다음", key="file_page_next", disabled=st.session_state.file_page + 1 >= total_pages,
+                                  on_click=change_file_page, args=(1,))
 
             else:
                 # 시스템 초기화는 되었지만 파일이 없는 경우
@@ -374,6 +494,10 @@ def main():
             st.write(debug_info.get("query", "N/A"))
             
             st.subheader("선택된 도구")
+            route_labels = {"rule": "규칙 라우터", "llm": "LLM", "fallback": "기본 도구(폴백)", "cache": "응답 캐시"}
+            route_source = debug_info.get("route_source")
+            if route_source:
+                st.write(f"도구 선택 방식: {route_labels.get(route_source, route_source)}")
             tool_call = debug_info.get("tool_calls", {})
             if tool_call:
                 if isinstance(tool_call, list):
@@ -395,8 +519,60 @@ def main():
                 with st.expander("결과 보기"):
                     st.write(result)
             
+            st.subheader("응답 캐시")
+            st.write(f"캐시 적중: {debug_info.get('cache') or '없음'}")
+            response_cache = getattr(st.session_state.get('orchestrator'), 'response_cache', None)
+            if response_cache:
+                st.json(response_cache.get_stats())
+            
+            st.subheader("도구 결과 캐시")
+            tool_cache_hits = {
+                name: timing["cache"] for name, timing in debug_info.get("tool_timings", {}).items()
+                if isinstance(timing, dict) and timing.get("cache")
+            }
+            st.write(f"캐시 적중: {tool_cache_hits or '없음'}")
+            tool_manager = getattr(st.session_state.get('orchestrator'), 'tool_manager', None)
+            if tool_manager and tool_manager.result_cache:
+                st.json(tool_manager.result_cache.get_stats())
+            
+            st.subheader("공유 리소스")
+            st.write(f"세션 초기화: {st.session_state.get('session_metrics', 'N/A')}, 현재 RSS: {get_rss_mb()} MB")
+            st.json(registry.get_stats())
+            
+            lm_studio_client = getattr(st.session_state.get('orchestrator'), 'lm_studio_client', None)
+            if hasattr(lm_studio_client, 'get_coalescing_stats'):
+                st.subheader("LLM 요청 병합")
+                st.json(lm_studio_client.get_coalescing_stats())
+            
+            from storage.mongodb_storage import MongoDBStorage
+            if getattr(MongoDBStorage._instance, "_initialized", False):
+                st.subheader("임베딩 캐시")
+                st.json(MongoDBStorage.get_instance().embedding_cache.get_stats())
+                st.subheader("검색 모드")
+                st.json({
+                    **MongoDBStorage.get_instance().retrieval_stats,
+                    "lexical_index": MongoDBStorage.get_instance().lexical_index.get_stats()
+                })
+            
             st.subheader("처리 시간")
             st.write(debug_info.get("processing_time", "N/A"))
+            tool_timings = debug_info.get("tool_timings", {})
+            if tool_timings:
+                st.write("도구별 실행 시간:")
+                st.json(tool_timings)
+            # 응답 생성 측정값 (스트리밍 턴은 TTFT 포함, 비스트리밍 턴은 프롬프트 토큰/컨텍스트 통계만)
+            metrics = debug_info.get("metrics", {})
+            if metrics:
+                if "ttft_total" in metrics:
+                    st.write(f"첫 토큰까지 걸린 시간(TTFT): {metrics.get('ttft_total', 'N/A')} 초 (응답 생성 기준 {metrics.get('ttft', 'N/A')} 초)")
+                if "prompt_tokens" in metrics:
+                    context_stats = metrics.get("context", {})
+                    st.write(
+                        f"응답 프롬프트 토큰: {metrics['prompt_tokens']} (고정 접두부 {context_stats.get('prefix_tokens', 'N/A')}, "
+                        f"도구 결과 {context_stats.get('context_tokens', 'N/A')}, "
+                        f"예산 {context_stats.get('token_budget', 'N/A')}, 제외 항목 {context_stats.get('items_dropped', 0)}건)"
+                    )
+                st.json(metrics)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1 @@
+# 패키지 초기화
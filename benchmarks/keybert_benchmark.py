@@ -0,0 +1,93 @@
+# benchmarks/keybert_benchmark.py
+"""
+KeyBERT 태그 추출 벤치마크 (청크별 호출 vs 배치 호출 vs 프로세스 풀)
+
+합성 코퍼스(주제별 어휘로 만든 청크)에 대해 초당 처리 청크 수를 비교합니다.
+keybert 패키지와 기본 문장 임베딩 모델(all-MiniLM-L6-v2)이 필요합니다.
+
+사용법:
+    python -m benchmarks.keybert_benchmark --chunks 512 --batch-size 64
+"""
+
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from storage.keyword_tagger import KeywordTagger, extract_keywords_batch
+
+TOPICS = {
+    "pump": ["펌프", "유량", "양정", "임펠러", "모터", "베어링", "진동", "적산전력량", "효율", "점검"],
+    "water": ["배수지", "수위", "정수장", "탁도", "염소", "급수", "관로", "누수", "밸브", "수압"],
+    "safety": ["안전", "수칙", "보호구", "점검표", "위험", "교육", "비상", "대피", "사고", "예방"],
+    "ai": ["model", "embedding", "retrieval", "agent", "prompt", "vector", "search", "inference", "token", "latency"],
+}
+FILLER = ["및", "관련", "기준", "방법", "결과", "내용", "확인", "운영", "관리", "시스템", "데이터", "보고서"]
+
+def make_corpus(n, words_per_chunk, seed=0):
+    """주제 단어와 일반 단어를 섞은 합성 청크 생성"""
+    rng = random.Random(seed)
+    topics = list(TOPICS.values())
+    chunks = []
+    for _ in range(n):
+        vocab = rng.choice(topics) + FILLER
+        chunks.append(" ".join(rng.choice(vocab) for _ in range(words_per_chunk)))
+    return chunks
+
+def batches(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def run_per_chunk(model, chunks, top_n):
+    return [[kw for kw, _ in model.extract_keywords(chunk, top_n=top_n)] for chunk in chunks]
+
+def run_batched(model, chunks, top_n, batch_size):
+    tags = []
+    for batch in batches(chunks, batch_size):
+        tags.extend(extract_keywords_batch(model, batch, top_n))
+    return tags
+
+def run_process_pool(tagger, chunks, batch_size):
+    # 파이프라인과 동일하게 여러 배치를 스레드에서 동시에 프로세스 풀로 보냄
+    with ThreadPoolExecutor(max_workers=tagger.process_workers) as executor:
+        results = executor.map(lambda batch: tagger.tag(batch, use_processes=True), list(batches(chunks, batch_size)))
+        return [tags for batch_tags in results for tags in batch_tags]
+
+def report(name, elapsed, count, baseline=None):
+    rate = count / elapsed if elapsed else float("inf")
+    speedup = f"   x{baseline / elapsed:.1f}" if baseline else ""
+    print(f"{name:<16} {elapsed:8.2f} s   {rate:8.1f} chunks/s{speedup}")
+
+def main():
+    parser = argparse.ArgumentParser(description="KeyBERT 태그 추출 벤치마크")
+    parser.add_argument("--chunks", type=int, default=512)
+    parser.add_argument("--words", type=int, default=150, help="청크당 단어 수")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--top-n", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=2, help="프로세스 풀 크기 (0이면 생략)")
+    args = parser.parse_args()
+
+    chunks = make_corpus(args.chunks, args.words)
+    tagger = KeywordTagger(top_n=args.top_n, process_workers=args.workers)
+    model = tagger.model
+    model.extract_keywords(chunks[0], top_n=args.top_n) # 모델 워밍업
+
+    print(f"청크 {args.chunks}개, 청크당 {args.words}단어, 배치 {args.batch_size}")
+    start = time.perf_counter()
+    run_per_chunk(model, chunks, args.top_n)
+    baseline = time.perf_counter() - start
+    report("청크별 호출", baseline, len(chunks))
+
+    start = time.perf_counter()
+    run_batched(model, chunks, args.top_n, args.batch_size)
+    report("배치 호출", time.perf_counter() - start, len(chunks), baseline)
+
+    if args.workers > 0:
+        # 워커 프로세스 시작/모델 로드 시간은 제외
+        tagger.tag(chunks[:1], use_processes=True)
+        start = time.perf_counter()
+        run_process_pool(tagger, chunks, args.batch_size)
+        report(f"프로세스 풀({args.workers})", time.perf_counter() - start, len(chunks), baseline)
+        tagger.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# benchmarks/prefix_cache_benchmark.py
+"""
+프롬프트 캐시(KV 캐시) 접두부 재사용 벤치마크
+
+LM Studio / llama.cpp 서버에 max_tokens=1 스트리밍 요청을 보내 첫 응답 조각까지 걸린 시간(≈ prefill 시간)을 측정합니다.
+- cold: system 메시지 맨 앞에 매번 다른 값을 붙여 캐시된 접두부를 쓸 수 없게 한 요청
+- warm: 같은 system 메시지(고정 접두부)에 질의만 다른 요청 (첫 요청으로 캐시를 채운 뒤 측정)
+도구 선택(FUNCTION_SELECTION_PROMPT + 함수 정의)과 응답 생성(RESPONSE_SYSTEM_PROMPT) 프롬프트를 각각 측정하며,
+--interleave 옵션을 주면 실제 처리 순서처럼 두 프롬프트를 번갈아 보내는 경우도 측정합니다 (서버 슬롯이 하나면 서로의 캐시를 밀어냄).
+서버가 llama.cpp timings(prompt_n, cache_n)를 돌려주면 평균 처리/캐시 토큰 수도 함께 출력합니다.
+
+사용법:
+    python -m benchmarks.prefix_cache_benchmark --repeat 5
+    python -m benchmarks.prefix_cache_benchmark --prompts response --interleave
+"""
+
+import argparse
+import statistics
+import time
+import uuid
+from config import (
+    AVAILABLE_FUNCTIONS, FUNCTION_SELECTION_PROMPT, FUNCTION_SELECTION_USER_TEMPLATE,
+    RESPONSE_SYSTEM_PROMPT, RESPONSE_USER_TEMPLATE
+)
+from models.lm_studio import LMStudioClient, _messages
+
+SAMPLE_QUERIES = [
+    "서울 날씨 알려줘",
+    "배수지 수위 데이터 엑셀 파일 보여줘",
+    "두크펌프 매뉴얼에서 적산전력량에 의한 방식 알려줘",
+    "최신 AI 논문 찾아줘",
+    "123 곱하기 456은 얼마야?",
+    "업로드된 파일 목록 보여줘",
+    "정수장 탁도 기준이 뭐야?",
+    "매출 현황 엑셀에서 지점별 매출 합계 알려줘",
+]
+
+def build_request(kind, query, index, cold):
+    """(system, user 메시지, 함수 정의) - cold이면 system 맨 앞에 매번 다른 값을 붙여 접두부 캐시를 무효화"""
+    if kind == "selection":
+        system, prompt, functions = FUNCTION_SELECTION_PROMPT, FUNCTION_SELECTION_USER_TEMPLATE.format(query=query), AVAILABLE_FUNCTIONS
+    else:
+        tool_results = f"도구: search_tool\n결과:\n- 예시 검색 결과 {index}: {query}에 대한 참고 자료 (https://example.com/{index})"
+        system, prompt, functions = RESPONSE_SYSTEM_PROMPT, RESPONSE_USER_TEMPLATE.format(tool_results=tool_results, user_query=query), None
+    if cold:
+        system = f"[{uuid.uuid4().hex}]\n{system}"
+    return system, prompt, functions
+
+def measure_prefill(client, system, prompt, functions):
+    """
+    max_tokens=1 스트리밍 요청의 첫 응답 조각까지 걸린 시간(ms)과 llama.cpp timings(있으면)를 반환합니다.
+    """
+    kwargs = {"functions": functions, "function_call": "auto"} if functions else {}
+    start = time.perf_counter()
+    stream = client.client.chat.completions.create(
+        model=client.model,
+        messages=_messages(prompt, system),
+        temperature=0,
+        max_tokens=1,
+        stream=True,
+        **kwargs
+    )
+    ttft, timings = None, None
+    for chunk in stream:
+        if ttft is None and chunk.choices:
+            ttft = (time.perf_counter() - start) * 1000
+        timings = (getattr(chunk, "model_extra", None) or {}).get("timings") or timings
+    if ttft is None:
+        ttft = (time.perf_counter() - start) * 1000
+    return ttft, timings
+
+def summarize(name, samples):
+    latencies = [ttft for ttft, _ in samples]
+    line = f"{name:<22} p50 {statistics.median(latencies):8.1f} ms   mean {statistics.mean(latencies):8.1f} ms"
+    timings = [t for _, t in samples if t]
+    if timings:
+        prompt_n = statistics.mean(t.get("prompt_n", 0) for t in timings)
+        cache_n = statistics.mean(t.get("cache_n", 0) for t in timings)
+        line += f"   처리 토큰 {prompt_n:7.1f}   캐시 토큰 {cache_n:7.1f}"
+    return line, statistics.median(latencies)
+
+def run(client, kinds, repeat, interleave):
+    queries = [SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)] for i in range(repeat)]
+    for kind in kinds:
+        cold = [measure_prefill(client, *build_request(kind, q, i, cold=True)) for i, q in enumerate(queries)]
+        measure_prefill(client, *build_request(kind, "캐시 준비", -1, cold=False)) # 고정 접두부 캐시 채우기
+        warm = [measure_prefill(client, *build_request(kind, q, i, cold=False)) for i, q in enumerate(queries)]
+        cold_line, cold_p50 = summarize(f"{kind} cold", cold)
+        warm_line, warm_p50 = summarize(f"{kind} warm", warm)
+        print(cold_line)
+        print(warm_line + f"   (cold 대비 {cold_p50 / warm_p50:.1f}배)")
+
+    if interleave:
+        samples = {kind: [] for kind in ("selection", "response")}
+        for i, query in enumerate(queries):
+            for kind in samples:
+                samples[kind].append(measure_prefill(client, *build_request(kind, query, i, cold=False)))
+        for kind, kind_samples in samples.items():
+            print(summarize(f"{kind} interleaved", kind_samples)[0])
+
+def main():
+    parser = argparse.ArgumentParser(description="프롬프트 캐시 접두부 재사용 벤치마크 (cold vs warm prefill)")
+    parser.add_argument("--base-url", default=None, help="모델 서버 URL (기본값: LM_STUDIO_BASE_URL)")
+    parser.add_argument("--model", default=None, help="모델 이름 (기본값: LM_STUDIO_MODEL_NAME)")
+    parser.add_argument("--prompts", nargs="+", choices=["selection", "response"], default=["selection", "response"])
+    parser.add_argument("--repeat", type=int, default=5, help="모드별 측정 요청 수")
+    parser.add_argument("--interleave", action="store_true", help="도구 선택/응답 생성 프롬프트를 번갈아 보내는 경우도 측정")
+    args = parser.parse_args()
+
+    client = LMStudioClient(base_url=args.base_url, model_name=args.model)
+    print(f"모델 {client.model} ({client.base_url}), 모드별 요청 {args.repeat}개, max_tokens=1")
+    run(client, args.prompts, args.repeat, args.interleave)
+
+if __name__ == "__main__":
+    main()
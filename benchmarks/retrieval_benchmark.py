@@ -0,0 +1,113 @@
+# benchmarks/retrieval_benchmark.py
+"""
+검색 모드 벤치마크 (vector / hybrid / lexical)
+
+질의 파일의 각 질의를 모드별로 검색해 지연 시간(p50/p95)과 recall@k, hybrid 모드의 키워드 fast path 비율을 측정합니다.
+질의 파일은 한 줄에 하나씩 {"query": "...", "relevant": ["파일명" 또는 "파일명#청크번호", ...]} 형식의 JSONL입니다.
+MongoDB 없이 키워드 색인만 측정하려면 --synthetic 옵션으로 합성 코퍼스(제품 코드 질의)를 사용합니다.
+
+사용법:
+    python -m benchmarks.retrieval_benchmark --queries eval_queries.jsonl --modes vector hybrid lexical
+    python -m benchmarks.retrieval_benchmark --synthetic 20000
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from storage.lexical_index import LexicalIndex
+
+def load_queries(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def recall_at_k(hits, relevant):
+    """관련 항목 중 결과에 포함된 비율 (파일명 단위 항목은 해당 파일의 청크가 하나라도 있으면 포함)"""
+    if not relevant:
+        return None
+    found = set()
+    for hit in hits:
+        for key in (hit.filename, f"{hit.filename}#{hit.chunk_index}"):
+            if key in relevant:
+                found.add(key)
+    return len(found) / len(relevant)
+
+def summarize(name, latencies, recalls, extra=""):
+    ordered = sorted(latencies)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    recall = f"recall {statistics.mean(recalls):.3f}" if recalls else "recall N/A"
+    return f"{name:<8} p50 {statistics.median(latencies):8.2f} ms   p95 {p95:8.2f} ms   {recall}{extra}"
+
+def run_storage(queries, modes, top_k):
+    from storage.mongodb_storage import MongoDBStorage
+    storage = MongoDBStorage.get_instance()
+    len(storage.lexical_index) # 색인 로드 시간은 측정에서 제외
+    print(f"질의 {len(queries)}개, top_k={top_k}, 키워드 색인 청크 {len(storage.lexical_index)}개")
+    for mode in modes:
+        fast_path_before = storage.retrieval_stats["fast_path"]
+        latencies, recalls = [], []
+        for item in queries:
+            start = time.perf_counter()
+            hits = storage.vector_search(item["query"], top_k=top_k, mode=mode)
+            latencies.append((time.perf_counter() - start) * 1000)
+            recall = recall_at_k(hits, set(item.get("relevant", [])))
+            if recall is not None:
+                recalls.append(recall)
+        extra = ""
+        if mode == "hybrid":
+            extra = f"   fast path {storage.retrieval_stats['fast_path'] - fast_path_before}/{len(queries)}"
+        print(summarize(mode, latencies, recalls, extra))
+
+class _SyntheticCollection:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def find(self, query, projection=None):
+        return iter(self.documents)
+
+def run_synthetic(n_chunks, n_queries, top_k, seed=0):
+    """합성 코퍼스로 키워드 색인 구성/검색 시간과 제품 코드 질의 recall 측정"""
+    rng = random.Random(seed)
+    vocabulary = ["배수지", "수위", "정수장", "탁도", "유량", "펌프", "경보", "점검", "센서", "밸브", "수질", "압력", "운영", "기준"]
+    josa = ["은", "는", "이", "가", "을", "를", "의", "에서", ""]
+    documents = []
+    for i in range(n_chunks):
+        words = [rng.choice(vocabulary) + rng.choice(josa) for _ in range(rng.randint(40, 120))]
+        words.insert(rng.randrange(len(words)), f"PX-{i:06d}")
+        documents.append({"content": " ".join(words), "metadata": {"filename": f"doc_{i // 50}.pdf", "chunk_index": i % 50, "original_file_id": i // 50}})
+
+    index = LexicalIndex(_SyntheticCollection(documents))
+    start = time.perf_counter()
+    len(index)
+    build_time = time.perf_counter() - start
+
+    targets = [rng.randrange(n_chunks) for _ in range(n_queries)]
+    latencies, recalls = [], []
+    for target in targets:
+        query = f"PX-{target:06d} {rng.choice(vocabulary)} 측정값"
+        start = time.perf_counter()
+        hits = index.search(query, top_k=top_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(1.0 if any(h["metadata"]["filename"] == f"doc_{target // 50}.pdf" and h["metadata"]["chunk_index"] == target % 50 for h in hits) else 0.0)
+    print(f"합성 청크 {n_chunks}개, 질의 {n_queries}개, top_k={top_k}, 색인 구성 {build_time:.2f}s, 토큰 {index.get_stats()['tokens']}개")
+    print(summarize("lexical", latencies, recalls))
+
+def main():
+    parser = argparse.ArgumentParser(description="검색 모드 벤치마크 (vector / hybrid / lexical)")
+    parser.add_argument("--queries", default=None, help="평가 질의 JSONL 파일 (MongoDB 필요)")
+    parser.add_argument("--modes", nargs="+", default=["vector", "hybrid", "lexical"])
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--synthetic", type=int, default=0, help="합성 코퍼스 청크 수 (키워드 색인만 측정)")
+    parser.add_argument("--synthetic-queries", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        run_synthetic(args.synthetic, args.synthetic_queries, args.top_k)
+    if args.queries:
+        run_storage(load_queries(args.queries), args.modes, args.top_k)
+    if not args.synthetic and not args.queries:
+        parser.error("--queries 또는 --synthetic 중 하나가 필요합니다.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# benchmarks/router_benchmark.py
+"""
+규칙 라우터 vs LLM 도구 선택 벤치마크
+
+레이블된 질의 세트에 대해 도구 선택 지연 시간과 정확도를 비교합니다.
+규칙 키워드가 들어 있지만 규칙 도구 대상이 아닌 부정/적대적 질의도 포함해, 규칙 라우터가 잘못된 도구로 보낸 비율(오경로율)을 함께 보고합니다.
+
+사용법:
+    python -m benchmarks.router_benchmark            # 규칙 라우터만 측정
+    python -m benchmarks.router_benchmark --llm      # LM Studio 서버를 사용해 LLM 전용 경로와 비교
+"""
+
+import argparse
+import statistics
+import time
+from core.rule_router import RuleRouter
+
+# (질의, 기대 도구 목록, 기대 인자 일부)
+LABELED_QUERIES = [
+    ("123*45 계산해줘", ["calculator_tool"], {"expression": "123*45"}),
+    ("123 곱하기 456은 얼마야?", ["calculator_tool"], {"expression": "123 * 456"}),
+    ("(3+4)*2", ["calculator_tool"], {"expression": "(3+4)*2"}),
+    ("sqrt(16) + 2 는?", ["calculator_tool"], {"expression": "sqrt(16) + 2"}),
+    ("1500 나누기 12 계산", ["calculator_tool"], {"expression": "1500 / 12"}),
+    ("서울 날씨", ["weather_tool"], {"location": "서울"}),
+    ("서울의 오늘 날씨 알려줘", ["weather_tool"], {"location": "서울"}),
+    ("부산의 오늘 기온 알려줘", ["weather_tool"], {"location": "부산"}),
+    ("지금 제주도 날씨 어때?", ["weather_tool"], {"location": "제주도"}),
+    ("날씨 어때?", ["weather_tool"], None),
+    ("파일 목록 보여줘", ["list_files_tool"], {}),
+    ("업로드된 파일 목록 보여줘", ["list_files_tool"], {}),
+    ("어떤 문서들이 저장되어 있어?", ["list_files_tool"], {}),
+    ("DB에서 배수지 수위 데이터 엑셀 파일 보여줘", ["excel_reader_tool"], {"filename": "배수지 수위 데이터"}),
+    ("매출 현황 엑셀 열어줘", ["excel_reader_tool"], {"filename": "매출 현황"}),
+    ("현재 순천 날씨 알려주고 2322+2242 계산해줘", ["weather_tool", "calculator_tool"], None),
+    ("최신 AI 논문 찾아줘", ["search_tool"], None),
+    ("오늘의 주요 뉴스 알려줘", ["search_tool"], None),
+    ("2024-05-01 주요 뉴스 알려줘", ["search_tool"], None),
+    ("두크펌프 매뉴얼 파일에서 적산전력량에 의한 방식에 대해서 알려줘", ["vector_search_tool"], None),
+    ("내부 문서에서 AI 관련 자료 검색해줘", ["vector_search_tool"], None),
+    ("업로드된 파일에서 안전 수칙 내용 요약해줘", ["vector_search_tool"], None),
+    # 부정/적대적 질의 - 규칙 키워드(날씨, 기온, 기상, 파일)가 있지만 현재 날씨/파일 목록 조회가 아님
+    ("기상청 홈페이지 주소 알려줘", ["search_tool"], None),
+    ("날씨 앱 추천해줘", ["search_tool"], None),
+    ("서울 날씨 앱 추천해줘", ["search_tool"], None),
+    ("기온 변화 그래프 그리는 법", ["search_tool"], None),
+    ("날씨 좋은 날 가볼만한 곳 추천", ["search_tool"], None),
+    ("날씨가 기분에 미치는 영향", ["search_tool"], None),
+    ("지난달 서울 평균 기온이 몇 도였지?", ["search_tool"], None),
+    ("날씨를 영어로 뭐라고 해?", ["search_tool"], None),
+    ("어떤 파일 형식이 좋아?", ["search_tool"], None),
+    ("파일 목록 관리하는 방법 알려줘", ["search_tool"], None),
+    ("어떤 문서 편집기가 좋아?", ["search_tool"], None),
+    # 날짜/범위/번호의 하이픈은 수식이 아님
+    ("2024-05-01 결과 알려줘", ["search_tool"], None),
+    ("코로나 확진자 3-4월 결과", ["search_tool"], None),
+    ("5월 10-12일 행사 결과", ["search_tool"], None),
+    ("주민번호 900101-1234567 계산", ["search_tool"], None),
+    ("100 빼기 37은 얼마야?", ["calculator_tool"], {"expression": "100 - 37"}),
+    # 시점 표현은 지명이 아님, 여러 지명은 모두 조회
+    ("이번 주말 날씨 알려줘", ["weather_tool"], {"location": ""}),
+    ("내일 아침 날씨 어때?", ["weather_tool"], {"location": ""}),
+    ("서울 날씨 알려주고 부산 날씨도 알려줘", ["weather_tool", "weather_tool"], None),
+    ("서울 날씨 기온 알려줘", ["weather_tool"], {"location": "서울"}),
+    # 파일을 가리키지 않는 엑셀 일반 질문
+    ("파이썬 엑셀 다루는 법 보여줘", ["search_tool"], None),
+    ("엑셀 단축키 보여줘", ["search_tool"], None),
+    ("매출현황.xlsx 보여줘", ["excel_reader_tool"], {"filename": "매출현황.xlsx"}),
+]
+
+def tool_names(tool_call):
+    """도구 호출 dict/list에서 도구 이름 목록 추출"""
+    if not tool_call:
+        return []
+    calls = tool_call if isinstance(tool_call, list) else [tool_call]
+    return [call.get("name") for call in calls]
+
+def is_correct(tool_call, expected_tools, expected_args):
+    """도구 이름(순서 무시)과 기대 인자가 일치하는지 확인"""
+    if sorted(tool_names(tool_call)) != sorted(expected_tools):
+        return False
+    if expected_args and not isinstance(tool_call, list):
+        arguments = tool_call.get("arguments", {})
+        return all(str(arguments.get(k, "")).replace(" ", "") == str(v).replace(" ", "") for k, v in expected_args.items())
+    return True
+
+def benchmark_rule_router(repeat):
+    router = RuleRouter(enabled_tools=[
+        "search_tool", "calculator_tool", "weather_tool", "list_files_tool", "vector_search_tool", "excel_reader_tool"
+    ])
+    routed = correct = false_routes = 0
+    latencies = []
+    rows = []
+    for query, expected_tools, expected_args in LABELED_QUERIES:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            decision = router.route(query)
+        latencies.append((time.perf_counter() - start) / repeat * 1000)
+        tool_call = decision["tool_call"]
+        if tool_call:
+            routed += 1
+            ok = is_correct(tool_call, expected_tools, expected_args)
+            correct += ok
+            # 다른 도구로 보낸 경우만 오경로 (도구는 맞고 인자만 다른 경우는 정확도에서 집계)
+            false_routes += sorted(tool_names(tool_call)) != sorted(expected_tools)
+            rows.append((query, "rule", tool_names(tool_call), ok))
+        else:
+            rows.append((query, "→ LLM", decision["rules"], None))
+    return rows, routed, correct, false_routes, latencies
+
+def benchmark_llm(queries):
+    from models.lm_studio import LMStudioClient
+    from core.query_analyzer import QueryAnalyzer
+    analyzer = QueryAnalyzer(LMStudioClient(), rule_router=False)
+    correct = 0
+    latencies = []
+    for query, expected_tools, expected_args in queries:
+        start = time.perf_counter()
+        tool_call, _ = analyzer.analyze_with_source(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+        correct += is_correct(tool_call, expected_tools, expected_args)
+    return correct, latencies
+
+def main():
+    parser = argparse.ArgumentParser(description="규칙 라우터 vs LLM 도구 선택 벤치마크")
+    parser.add_argument("--llm", action="store_true", help="LM Studio 서버를 호출해 LLM 전용 경로도 측정")
+    parser.add_argument("--repeat", type=int, default=200, help="규칙 라우터 반복 횟수 (지연 시간 평균)")
+    args = parser.parse_args()
+
+    rows, routed, correct, false_routes, latencies = benchmark_rule_router(args.repeat)
+    total = len(LABELED_QUERIES)
+    print(f"{'질의':<45} {'결정':<6} {'도구/일치 규칙':<40} 정답")
+    for query, source, tools, ok in rows:
+        mark = "-" if ok is None else ("O" if ok else "X")
+        print(f"{query:<45} {source:<6} {str(tools):<40} {mark}")
+    print()
+    print(f"[규칙 라우터] 처리율: {routed}/{total} ({routed / total:.0%}), "
+          f"처리한 질의 정확도: {correct}/{routed} ({(correct / routed if routed else 0):.0%}), "
+          f"평균 지연: {statistics.mean(latencies):.3f} ms, 최대: {max(latencies):.3f} ms")
+    print(f"[규칙 라우터] 오경로(LLM 대신 잘못된 도구로 보냄): {false_routes}/{total} ({false_routes / total:.0%}), "
+          f"처리한 질의 중 {false_routes}/{routed} ({(false_routes / routed if routed else 0):.0%})")
+
+    if args.llm:
+        llm_correct, llm_latencies = benchmark_llm(LABELED_QUERIES)
+        print(f"[LLM 전용]    정확도: {llm_correct}/{total} ({llm_correct / total:.0%}), "
+              f"평균 지연: {statistics.mean(llm_latencies):.1f} ms, p50: {statistics.median(llm_latencies):.1f} ms")
+        # 규칙 라우터 + LLM 폴백 조합의 예상 지연 시간
+        hybrid = [
+            rule_ms if source == "rule" else rule_ms + llm_ms
+            for (_, source, _, _), rule_ms, llm_ms in zip(rows, latencies, llm_latencies)
+        ]
+        print(f"[규칙+LLM]    평균 지연(추정): {statistics.mean(hybrid):.1f} ms")
+
+if __name__ == "__main__":
+    main()
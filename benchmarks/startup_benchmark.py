@@ -0,0 +1,96 @@
+# benchmarks/startup_benchmark.py
+"""
+콜드 스타트(모듈 임포트) 시간 벤치마크
+
+각 대상 모듈을 새 파이썬 프로세스에서 `python -X importtime`으로 임포트해
+전체 임포트 시간과 누적 시간이 큰 모듈(importtime 형식)을 보고합니다.
+--budget-ms를 주면 예산을 넘는 모듈이 있을 때 종료 코드 1을 반환하므로 CI에서 회귀 검사로 사용할 수 있습니다.
+
+사용법:
+    python -m benchmarks.startup_benchmark
+    python -m benchmarks.startup_benchmark --modules config core.tool_manager --top 15
+    python -m benchmarks.startup_benchmark --tools calculator_tool,weather_tool --budget-ms 1500
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+DEFAULT_MODULES = ["config", "core.tool_manager", "core.orchestrator", "storage.mongodb_storage"]
+
+# "import time:       123 |       4567 |     package.module"
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S.*)$")
+
+def run_import(module, env):
+    """
+    새 프로세스에서 모듈을 임포트하고 importtime 기록을 파싱합니다.
+
+    Returns:
+        dict: {"module", "ok", "error", "total_ms", "entries": [(모듈, self_ms, cumulative_ms, 깊이)]}
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env
+    )
+    entries = []
+    other_lines = []
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000, len(indent) // 2))
+        elif not line.startswith("import time:"):
+            other_lines.append(line)
+    # 최상위(깊이 0) 항목의 누적 시간 합이 전체 임포트 시간
+    total_ms = sum(cumulative for _, _, cumulative, depth in entries if depth == 0)
+    error = None
+    if proc.returncode != 0:
+        error = next((l for l in reversed(other_lines) if l.strip()), "임포트 실패")
+    return {"module": module, "ok": proc.returncode == 0, "error": error, "total_ms": total_ms, "entries": entries}
+
+def main():
+    parser = argparse.ArgumentParser(description="콜드 스타트(모듈 임포트) 시간 벤치마크")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES, help="임포트할 모듈 목록")
+    parser.add_argument("--tools", default=None, help="ENABLED_TOOLS 재정의 (예: calculator_tool,weather_tool)")
+    parser.add_argument("--repeat", type=int, default=3, help="모듈별 반복 횟수 (중앙값 보고)")
+    parser.add_argument("--top", type=int, default=10, help="누적 시간이 큰 모듈을 몇 개 보여줄지")
+    parser.add_argument("--budget-ms", type=float, default=None, help="모듈별 임포트 시간 예산(ms)")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+    if args.tools is not None:
+        env["ENABLED_TOOLS"] = args.tools
+
+    print(f"Python {sys.version.split()[0]}, ENABLED_TOOLS={env.get('ENABLED_TOOLS', '(기본값)')}, 반복 {args.repeat}회")
+    over_budget = []
+    for module in args.modules:
+        runs = [run_import(module, env) for _ in range(args.repeat)]
+        failed = next((r for r in runs if not r["ok"]), None)
+        if failed:
+            print(f"\n[{module}] 임포트 실패: {failed['error']}")
+            over_budget.append(module)
+            continue
+        median_ms = statistics.median(r["total_ms"] for r in runs)
+        print(f"\n[{module}] 임포트 {median_ms:.1f} ms (중앙값, 최소 {min(r['total_ms'] for r in runs):.1f} ms)")
+
+        # 중앙값에 가장 가까운 실행의 상세 기록 사용
+        run = min(runs, key=lambda r: abs(r["total_ms"] - median_ms))
+        print(f"  {'self(ms)':>9} {'cumul(ms)':>10}  모듈")
+        for name, self_ms, cumulative_ms, depth in sorted(run["entries"], key=lambda e: e[2], reverse=True)[:args.top]:
+            print(f"  {self_ms:9.1f} {cumulative_ms:10.1f}  {'  ' * depth}{name}")
+
+        if args.budget_ms is not None and median_ms > args.budget_ms:
+            over_budget.append(module)
+
+    if args.budget_ms is not None:
+        if over_budget:
+            print(f"\n예산 초과 ({args.budget_ms:g} ms): {', '.join(over_budget)}")
+            sys.exit(1)
+        print(f"\n모든 모듈이 예산({args.budget_ms:g} ms) 이내입니다.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/vector_search_benchmark.py
+"""
+로컬 벡터 인덱스 벤치마크 (정확 검색 vs IVF 근사 검색)
+
+합성 임베딩으로 LocalVectorStore를 구성하고 질의 지연 시간과 정확 검색 대비 recall@k를 측정합니다.
+Atlas 없이 실행되며, --atlas 옵션을 주면 같은 질의 수만큼 MongoDB Atlas $vectorSearch 지연 시간도 측정합니다.
+
+사용법:
+    python -m benchmarks.vector_search_benchmark --vectors 50000 --dim 1536
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+import numpy as np
+from storage.local_vector_store import LocalVectorStore
+
+def make_corpus(n, dim, clusters, seed=0):
+    """클러스터 구조가 있는 합성 임베딩 생성 (실제 문서 임베딩처럼 주제별로 모이도록)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, n)
+    vectors = centers[labels] + 0.5 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors, centers
+
+def build_store(path, vectors, mode, nprobe):
+    store = LocalVectorStore(path=path, index_mode=mode, nprobe=nprobe)
+    documents = [
+        {"_id": i, "content": f"chunk {i}", "metadata": {"filename": f"file_{i % 100}.pdf", "chunk_index": i}, "embedding": vec}
+        for i, vec in enumerate(vectors)
+    ]
+    start = time.perf_counter()
+    store.add(documents)
+    return store, time.perf_counter() - start
+
+def measure(store, queries, top_k):
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits = store.search(query, top_k=top_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append({hit["metadata"]["chunk_index"] for hit in hits})
+    return latencies, results
+
+def summarize(name, latencies):
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1] if len(ordered) > 1 else ordered[0]
+    return f"{name:<8} p50 {statistics.median(latencies):8.2f} ms   p95 {p95:8.2f} ms   mean {statistics.mean(latencies):8.2f} ms"
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 벡터 인덱스 벤치마크")
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--atlas", action="store_true", help="MongoDB Atlas $vectorSearch 지연 시간도 측정 (MONGO_URI 필요)")
+    args = parser.parse_args()
+
+    vectors, centers = make_corpus(args.vectors, args.dim, clusters=max(8, args.vectors // 500))
+    rng = np.random.default_rng(1)
+    queries = centers[rng.integers(0, len(centers), args.queries)] + 0.5 * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as exact_dir, tempfile.TemporaryDirectory() as ivf_dir:
+        exact_store, exact_build = build_store(exact_dir, vectors, "exact", args.nprobe)
+        ivf_store, ivf_build = build_store(ivf_dir, vectors, "ivf", args.nprobe)
+        exact_lat, exact_res = measure(exact_store, queries, args.top_k)
+        ivf_lat, ivf_res = measure(ivf_store, queries, args.top_k)
+
+    recall = statistics.mean(len(e & a) / len(e) for e, a in zip(exact_res, ivf_res) if e)
+    print(f"벡터 {args.vectors}개 x {args.dim}차원, 질의 {args.queries}개, top_k={args.top_k}")
+    print(f"인덱스 구성 시간: exact {exact_build:.2f}s, ivf {ivf_build:.2f}s")
+    print(summarize("exact", exact_lat))
+    print(summarize("ivf", ivf_lat) + f"   recall@{args.top_k} {recall:.3f} (nprobe={args.nprobe})")
+
+    if args.atlas:
+        from config import VECTOR_INDEX_NAME
+        from storage.mongodb_storage import MongoDBStorage
+        storage = MongoDBStorage.get_instance()
+        atlas_lat = []
+        for query in queries:
+            start = time.perf_counter()
+            list(storage.vector_collection.aggregate([{"$vectorSearch": {
+                "queryVector": query[:1536].tolist(), "path": "embedding", "numCandidates": args.top_k * 10,
+                "limit": args.top_k, "index": VECTOR_INDEX_NAME
+            }}]))
+            atlas_lat.append((time.perf_counter() - start) * 1000)
+        print(summarize("atlas", atlas_lat))
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,13 @@
 import os
 import json
 from dotenv import load_dotenv
-from langchain_teddynote import logging
 
 # .env 파일 로드
 load_dotenv()
 
-# 프로젝트 이름을 입력합니다.
-logging.langsmith("AgenticRAG")
+# LangSmith 추적 설정 (utils/tracing.py의 init_tracing()이 처음 필요할 때 한 번 설정)
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "True").lower() == "true"
+LANGSMITH_PROJECT = os.getenv("LANGSMITH_PROJECT", "AgenticRAG") # 프로젝트 이름
 
 # LM Studio 설정
 LM_STUDIO_BASE_URL = os.getenv("LM_STUDIO_BASE_URL", "http://localhost:1234/v1")
@@ -20,20 +20,117 @@ LM_STUDIO_MODEL_NAME = os.getenv("LM_STUDIO_MODEL_NAME", "qwen2.5-7b-instruct")
 TOOL_SELECTION_TEMPERATURE = float(os.getenv("TOOL_SELECTION_TEMPERATURE", "0.0"))
 RESPONSE_TEMPERATURE = float(os.getenv("RESPONSE_TEMPERATURE", "0.5"))
 
+# 비동기 LLM 클라이언트 설정 (AsyncLMStudioClient)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4")) # 로컬 모델 서버에 동시에 보낼 최대 요청 수 (프로세스 전체)
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "8")) # 이벤트 루프별 keep-alive 연결 풀 크기
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "120"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5")) # 재시도 대기 시간(지수 백오프 + 지터)의 시작값(초)
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "8"))
+# 온도 0(결정적) 호출 중 (모델, 프롬프트, 온도, 함수 정의)가 같은 동시 요청을 하나로 병합
+LLM_COALESCE_ENABLED = os.getenv("LLM_COALESCE_ENABLED", "True").lower() == "true"
+# 배치 completions(prompt 목록)를 지원하는 서버용 마이크로 배치 - 병합할 수 없는(온도 0이 아닌) 비스트리밍 응답 생성 요청을 묶어 한 번에 전송
+LLM_MICRO_BATCH_ENABLED = os.getenv("LLM_MICRO_BATCH_ENABLED", "False").lower() == "true"
+LLM_MICRO_BATCH_MAX_SIZE = int(os.getenv("LLM_MICRO_BATCH_MAX_SIZE", "8"))
+LLM_MICRO_BATCH_WAIT_MS = float(os.getenv("LLM_MICRO_BATCH_WAIT_MS", "20"))
+# completions API는 chat 템플릿을 적용하지 않으므로 모델의 chat 템플릿을 직접 적용 (기본값: ChatML, 환경변수에서는 \n으로 줄바꿈 표기)
+LLM_MICRO_BATCH_SYSTEM_TEMPLATE = os.getenv(
+    "LLM_MICRO_BATCH_SYSTEM_TEMPLATE", "<|im_start|>system\n{system}<|im_end|>\n"
+).replace("\\n", "\n")
+LLM_MICRO_BATCH_USER_TEMPLATE = os.getenv(
+    "LLM_MICRO_BATCH_USER_TEMPLATE", "<|im_start|>user\n{prompt}<|im_end|>\n<|im_start|>assistant\n"
+).replace("\\n", "\n")
+
+# 응답 스트리밍 설정 (토큰이 생성되는 대로 채팅 화면에 표시)
+STREAMING_ENABLED = os.getenv("STREAMING_ENABLED", "True").lower() == "true"
+
+# 응답 생성 프롬프트 컨텍스트 설정 (도구 결과를 도구별 요약 형식으로 렌더링하고 토큰 예산에 맞춰 줄임)
+RESPONSE_CONTEXT_TOKEN_BUDGET = int(os.getenv("RESPONSE_CONTEXT_TOKEN_BUDGET", "2048")) # 응답 생성 프롬프트 전체의 최대 토큰 수 (0이면 제한 없음)
+CONTEXT_TOKENIZER = os.getenv("CONTEXT_TOKENIZER", "cl100k_base") # tiktoken 인코딩 이름 (tiktoken이 없으면 글자 수 기반 추정)
+CONTEXT_MAX_ITEMS = int(os.getenv("CONTEXT_MAX_ITEMS", "8")) # 도구별 최대 항목 수 (검색 결과, 파일, 행 등)
+CONTEXT_ITEM_MAX_CHARS = int(os.getenv("CONTEXT_ITEM_MAX_CHARS", "300")) # 항목 하나의 최대 길이(글자)
+CONTEXT_MIN_RELATIVE_SCORE = float(os.getenv("CONTEXT_MIN_RELATIVE_SCORE", "0.5")) # 최고 점수 대비 이 비율 미만인 문서 검색 결과는 제외
+
 # RAG 설정
 VECTOR_DB_PATH = os.getenv("VECTOR_DB_PATH", "./vector_db")
 CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1000"))
 CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "200"))
 TOP_K_RESULTS = int(os.getenv("TOP_K_RESULTS", "10"))
 
+# 검색 결과 형태 (스니펫/메타데이터 필드는 Atlas에서는 집계 파이프라인 안에서 잘라 전송량을 줄임)
+SEARCH_SNIPPET_LENGTH = int(os.getenv("SEARCH_SNIPPET_LENGTH", "200")) # 결과당 본문 길이(글자)
+SEARCH_SNIPPET_HIGHLIGHT = os.getenv("SEARCH_SNIPPET_HIGHLIGHT", "True").lower() == "true" # 질의 단어 주변을 잘라 보여줄지 여부
+SEARCH_RESULT_FIELDS = [f.strip() for f in os.getenv("SEARCH_RESULT_FIELDS", "").split(",") if f.strip()] # 함께 반환할 메타데이터 필드 (예: page,tags)
+
+# 파일 색인 파이프라인 설정 (load → split → embed → tag → write)
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64")) # 임베딩/태깅 배치 크기 (청크 수)
+INGEST_INSERT_BATCH_SIZE = int(os.getenv("INGEST_INSERT_BATCH_SIZE", "256")) # insert_many 한 번에 기록할 청크 수
+INGEST_MAX_WORKERS = int(os.getenv("INGEST_MAX_WORKERS", "4"))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "4")) # 동시에 처리 중일 수 있는 최대 배치 수
+
+# KeyBERT 태그 추출 설정
+KEYBERT_TOP_N = int(os.getenv("KEYBERT_TOP_N", "5"))
+KEYBERT_PROCESS_WORKERS = int(os.getenv("KEYBERT_PROCESS_WORKERS", "2")) # 0이면 프로세스 풀 미사용
+KEYBERT_PROCESS_MIN_CHUNKS = int(os.getenv("KEYBERT_PROCESS_MIN_CHUNKS", "256")) # 이보다 큰 파일은 프로세스 풀에서 태깅
+
+# 벡터 검색 백엔드 설정 (atlas: MongoDB Atlas $vectorSearch, local: VECTOR_DB_PATH의 로컬 인덱스)
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "atlas").lower()
+LOCAL_VECTOR_INDEX_MODE = os.getenv("LOCAL_VECTOR_INDEX_MODE", "exact").lower() # exact 또는 ivf(근사)
+IVF_NLIST = int(os.getenv("IVF_NLIST", "0")) # 0이면 sqrt(벡터 수)로 자동 결정
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "8"))
+IVF_MIN_VECTORS = int(os.getenv("IVF_MIN_VECTORS", "5000")) # 이보다 적으면 ivf 모드에서도 정확 검색
+# 추가/삭제를 모아 두는 델타 세그먼트 최대 크기 (추가 벡터 + 삭제 표시 수) - 넘으면 본 세그먼트로 병합(IVF 재학습)
+LOCAL_VECTOR_DELTA_MAX = int(os.getenv("LOCAL_VECTOR_DELTA_MAX", "20000"))
+
+# Atlas Vector Search 인덱스 설정 (파일 ID/파일명/태그를 filter 필드로 선언해 $vectorSearch 안에서 사전 필터링)
+VECTOR_INDEX_NAME = os.getenv("VECTOR_INDEX_NAME", "vector_index")
+VECTOR_INDEX_AUTO_CREATE = os.getenv("VECTOR_INDEX_AUTO_CREATE", "True").lower() == "true" # 시작 시 인덱스 정의 생성/갱신
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "1536")) # 임베딩 모델의 벡터 차원 (인덱스 정의용)
+VECTOR_NUM_CANDIDATES_MULTIPLIER = int(os.getenv("VECTOR_NUM_CANDIDATES_MULTIPLIER", "10")) # 필터 없을 때 numCandidates = top_k x 이 값
+VECTOR_NUM_CANDIDATES_MAX = int(os.getenv("VECTOR_NUM_CANDIDATES_MAX", "2000")) # Atlas 상한은 10000
+VECTOR_EXACT_SEARCH_MAX_CHUNKS = int(os.getenv("VECTOR_EXACT_SEARCH_MAX_CHUNKS", "1000")) # 필터에 맞는 청크가 이 이하면 정확(ENN) 검색
+
+# 검색 모드 (vector: 임베딩 검색만, hybrid: BM25 + 벡터 RRF 결합, lexical: BM25만 - 임베딩 호출 없음)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "vector").lower()
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+RRF_K = int(os.getenv("RRF_K", "60")) # RRF 점수 1 / (RRF_K + 순위)
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "30")) # 결합 전에 각 검색에서 가져올 후보 수
+# hybrid 모드에서 키워드 일치가 강하면 임베딩 없이 BM25 결과만 반환 (짧은 질의가 최상위 청크에 모두 포함될 때)
+LEXICAL_FAST_PATH_ENABLED = os.getenv("LEXICAL_FAST_PATH_ENABLED", "True").lower() == "true"
+LEXICAL_FAST_PATH_MAX_TERMS = int(os.getenv("LEXICAL_FAST_PATH_MAX_TERMS", "3")) # 질의 단어가 이보다 많으면 벡터 검색 사용
+LEXICAL_FAST_PATH_MIN_COVERAGE = float(os.getenv("LEXICAL_FAST_PATH_MIN_COVERAGE", "1.0")) # 최상위 청크가 포함해야 하는 질의 단어 비율
+
+# 파일 목록 패널 페이지 크기
+FILE_LIST_PAGE_SIZE = int(os.getenv("FILE_LIST_PAGE_SIZE", "20"))
+
+# 파일 카탈로그 (파일명 인메모리 색인) 설정
+FILE_CATALOG_REFRESH_INTERVAL = float(os.getenv("FILE_CATALOG_REFRESH_INTERVAL", "300")) # 0이면 저장/삭제 이벤트로만 갱신
+FILE_CATALOG_FUZZY_THRESHOLD = float(os.getenv("FILE_CATALOG_FUZZY_THRESHOLD", "0.5"))
+
+# 엑셀 미리보기 설정
+EXCEL_PREVIEW_ROWS = int(os.getenv("EXCEL_PREVIEW_ROWS", "5"))
+EXCEL_DTYPE_SAMPLE_ROWS = int(os.getenv("EXCEL_DTYPE_SAMPLE_ROWS", "100")) # 업로드 시 열 타입 추론에 사용할 행 수
+
+# 스프레드시트 열 지향(Parquet) 변환본 설정
+COLUMNAR_BUCKET_NAME = os.getenv("COLUMNAR_BUCKET_NAME", "columnar") # GridFS 버킷 이름
+SHEET_FRAME_CACHE_SIZE = int(os.getenv("SHEET_FRAME_CACHE_SIZE", "16")) # 메모리에 유지할 시트 수
+SPREADSHEET_QUERY_MAX_ROWS = int(os.getenv("SPREADSHEET_QUERY_MAX_ROWS", "50")) # 집계 결과로 반환할 최대 행 수
+
 # 외부 API 키
 WEATHER_API_KEY = os.getenv("WEATHER_API_KEY", "")
 SEARCH_ENGINE_API_KEY = os.getenv("SEARCH_ENGINE_API_KEY", "")
+TAVILY_API_KEY = os.getenv("TAVILY_API_KEY", "")
 
 # 임베딩 모델 설정 추가
 OPENAI_API_KEY_ENV_VAR = "OPENAI_API_KEY"
 EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "text-embedding-ada-002")
 
+# 질의 임베딩 캐시 설정 (메모리 LRU + 선택적 디스크 캐시)
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "1024"))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "") # 예: ./cache/embeddings.sqlite3 (비어 있으면 디스크 캐시 미사용)
+EMBEDDING_CACHE_WARMUP = int(os.getenv("EMBEDDING_CACHE_WARMUP", "200")) # 시작 시 미리 불러올 자주 쓰는 질의 수
+
 # 로깅 설정
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 DEBUG_MODE = os.getenv("DEBUG_MODE", "False").lower() == "true"
@@ -42,11 +139,50 @@ DEBUG_MODE = os.getenv("DEBUG_MODE", "False").lower() == "true"
 MAX_RETRIES = int(os.getenv("MAX_RETRIES", "3"))
 TIMEOUT = int(os.getenv("TIMEOUT", "30"))
 
+# 도구 실행 설정
+TOOL_EXECUTION_MODE = os.getenv("TOOL_EXECUTION_MODE", "parallel").lower() # parallel 또는 sequential
+TOOL_MAX_WORKERS = int(os.getenv("TOOL_MAX_WORKERS", "4"))
+# 도구별 타임아웃(초) 재정의. 예: {"search_tool": 10, "vector_search_tool": 20}
+TOOL_TIMEOUTS = json.loads(os.getenv("TOOL_TIMEOUTS", "{}"))
+
+# 프로세스 공유 리소스 워밍업 (core/resource_registry.py). 앱 시작 시 백그라운드에서 미리 생성할 리소스 목록
+# 예: "orchestrator,keyword_tagger" (비어 있으면 첫 사용 시 생성)
+RESOURCE_WARMUP = [name.strip() for name in os.getenv("RESOURCE_WARMUP", "").split(",") if name.strip()]
+
+# 외부 API 호출용 공유 HTTP 세션 설정 (utils/http_client.py)
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05")) # 연결 타임아웃(초)
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10")) # 응답 대기 타임아웃(초)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10")) # 호스트별 유지할 keep-alive 연결 수
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2")) # GET 요청의 일시적 오류(502/503/504) 재시도 횟수
+HTTP_ASYNC_ENABLED = os.getenv("HTTP_ASYNC_ENABLED", "False").lower() == "true" # aiohttp 비동기 클라이언트 사용 여부
+GEOCODE_CACHE_SIZE = int(os.getenv("GEOCODE_CACHE_SIZE", "512")) # 지명 → 위도/경도 캐시 크기
+
+# 외부 API 도구 결과 캐시 설정 (도구 이름 + 정규화된 인자 → 실행 결과)
+TOOL_RESULT_CACHE_ENABLED = os.getenv("TOOL_RESULT_CACHE_ENABLED", "True").lower() == "true"
+TOOL_RESULT_CACHE_MAX_SIZE = int(os.getenv("TOOL_RESULT_CACHE_MAX_SIZE", "512"))
+# 도구별 만료 시간(초). 목록에 없는 도구는 캐시하지 않음
+TOOL_RESULT_CACHE_TTLS = json.loads(os.getenv("TOOL_RESULT_CACHE_TTLS", '{"weather_tool": 600, "search_tool": 3600}'))
+TOOL_RESULT_CACHE_STALE_TTL = float(os.getenv("TOOL_RESULT_CACHE_STALE_TTL", "600")) # 만료 후 백그라운드 갱신 동안 이전 결과를 사용할 시간(초)
+TOOL_RESULT_CACHE_PATH = os.getenv("TOOL_RESULT_CACHE_PATH", "") # 예: ./cache/tool_results.sqlite3 (비어 있으면 디스크 캐시 미사용)
+
+# 규칙 기반 도구 라우터 설정 (LLM 도구 선택 호출 전 단순 질의 처리)
+RULE_ROUTER_ENABLED = os.getenv("RULE_ROUTER_ENABLED", "True").lower() == "true"
+RULE_ROUTER_CONFIDENCE_THRESHOLD = float(os.getenv("RULE_ROUTER_CONFIDENCE_THRESHOLD", "0.85"))
+
+# 응답 캐시 설정 (질의 → 최종 응답)
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "True").lower() == "true"
+RESPONSE_CACHE_MAX_SIZE = int(os.getenv("RESPONSE_CACHE_MAX_SIZE", "256"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+# 도구별 응답 캐시 만료 시간(초). 사용된 도구 중 가장 짧은 값 적용, 0이면 캐시하지 않음
+RESPONSE_CACHE_TOOL_TTLS = json.loads(os.getenv("RESPONSE_CACHE_TOOL_TTLS", '{"weather_tool": 600, "search_tool": 1800}'))
+RESPONSE_CACHE_SEMANTIC = os.getenv("RESPONSE_CACHE_SEMANTIC", "False").lower() == "true"
+RESPONSE_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("RESPONSE_CACHE_SIMILARITY_THRESHOLD", "0.95"))
+
 DATABASE_NAME = os.getenv("DATABASE_NAME", "document")
 
 # 활성화된 도구 확인
 # MongoDB 도구 추가
-ENABLED_TOOLS = os.getenv("ENABLED_TOOLS", "search_tool,calculator_tool,weather_tool,list_files_tool,vector_search_tool,excel_reader_tool").split(",")
+ENABLED_TOOLS = os.getenv("ENABLED_TOOLS", "search_tool,calculator_tool,weather_tool,list_files_tool,vector_search_tool,excel_reader_tool,spreadsheet_query_tool").split(",")
 
 # 도구 정의 - 활성화된 도구만 포함
 def get_available_functions():
@@ -134,7 +270,7 @@ def get_available_functions():
         },
         {
             "name": "excel_reader_tool",
-            "description": "DB(GridFS)에 저장된 엑셀 파일을 filename(부분 일치 가능) 또는 file_id로 찾아 미리보기(상위 5개 행)를 반환합니다. filename은 일부만 입력해도 됩니다.",
+            "description": "DB(GridFS)에 저장된 엑셀 파일을 filename(부분 일치 가능) 또는 file_id로 찾아 시트 구조(시트 목록, 행/열 수, 열 이름과 타입)와 미리보기(상위 5개 행)를 반환합니다. filename은 일부만 입력해도 됩니다.",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -145,10 +281,71 @@ def get_available_functions():
                     "filename": {
                         "type": "string",
                         "description": "엑셀 파일명(부분 일치 가능, file_id가 우선)"
+                    },
+                    "sheet_name": {
+                        "type": "string",
+                        "description": "미리볼 시트 이름 (선택 사항, 기본값은 첫 번째 시트)"
                     }
                 },
                 "required": []
             }
+        },
+        {
+            "name": "spreadsheet_query_tool",
+            "description": "DB에 저장된 엑셀 파일의 데이터에 대해 합계/평균/개수/최소/최대, 그룹별 집계, 상위 N개 조회를 수행합니다. '매출 합계', '지점별 평균', '상위 10개'처럼 엑셀 데이터의 수치 계산이 필요할 때 사용하세요.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "filename": {
+                        "type": "string",
+                        "description": "엑셀 파일명(부분 일치 가능)"
+                    },
+                    "sheet_name": {
+                        "type": "string",
+                        "description": "시트 이름 (선택 사항, 기본값은 첫 번째 시트)"
+                    },
+                    "operation": {
+                        "type": "string",
+                        "enum": ["sum", "mean", "count", "min", "max", "group_by", "top_n"],
+                        "description": "수행할 연산"
+                    },
+                    "column": {
+                        "type": "string",
+                        "description": "집계/정렬 대상 열 이름 (count는 생략 가능)"
+                    },
+                    "group_by": {
+                        "type": "string",
+                        "description": "group_by 연산에서 그룹으로 묶을 열 이름"
+                    },
+                    "agg": {
+                        "type": "string",
+                        "enum": ["sum", "mean", "count", "min", "max"],
+                        "description": "group_by 연산의 집계 함수 (기본값 sum)"
+                    },
+                    "filters": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "column": {"type": "string"},
+                                "op": {"type": "string", "enum": ["==", "!=", ">", ">=", "<", "<=", "contains"]},
+                                "value": {}
+                            },
+                            "required": ["column", "op", "value"]
+                        },
+                        "description": "집계 전에 적용할 행 필터 목록 (선택 사항)"
+                    },
+                    "n": {
+                        "type": "integer",
+                        "description": "top_n/group_by 결과 행 수 (기본값 10)"
+                    },
+                    "ascending": {
+                        "type": "boolean",
+                        "description": "오름차순 정렬 여부 (기본값 false: 큰 값부터)"
+                    }
+                },
+                "required": ["filename", "operation"]
+            }
         }
     ]
     
@@ -156,7 +353,10 @@ def get_available_functions():
     return [func for func in all_functions if func["name"] in ENABLED_TOOLS]
 
 # 사용 가능한 함수 목록
-AVAILABLE_FUNCTIONS = get_available_functions()
+# 시작 시 한 번 직렬화한 JSON에서 복원해 모든 도구 선택 요청이 같은 순서/같은 바이트의 함수 정의를 보내도록 고정합니다.
+# (모델 서버는 함수 정의를 프롬프트 앞부분에 렌더링하므로, 바뀌면 프롬프트 캐시 접두부가 깨짐)
+AVAILABLE_FUNCTIONS_JSON = json.dumps(get_available_functions(), ensure_ascii=False, separators=(",", ":"))
+AVAILABLE_FUNCTIONS = json.loads(AVAILABLE_FUNCTIONS_JSON)
 
 # 프롬프트 템플릿 동적 생성
 def generate_function_selection_prompt():
@@ -198,30 +398,38 @@ def generate_function_selection_prompt():
                         → {"name": "vector_search_tool", "arguments": {"query": "적산전력량에 의한 방식", "file_filter": "23.두크펌프 매뉴얼.pdf"}}
                         - 사용자: 'DB에서 배수지 수위 데이터 엑셀 파일 보여줘'
                         → {"name": "excel_reader_tool", "arguments": {"filename": "배수지 수위 데이터"}}
+                        - 사용자: '매출 현황 엑셀에서 지점별 매출 합계 알려줘'
+                        → {"name": "spreadsheet_query_tool", "arguments": {"filename": "매출 현황", "operation": "group_by", "column": "매출", "group_by": "지점", "agg": "sum"}}
                         - 사용자: '업로드된 파일 목록 보여줘'
                         → {"name": "list_files_tool", "arguments": {}}
                     """ # 예시 끝에 개행 그대로 유지
     prompt = base_prompt + "\n".join(tools_desc) + example_prompt + "사용자 질문을 분석하고 필요한 도구를 호출하세요. 여러 도구가 필요하다면 모두 사용하세요."
     return prompt
 
-# 도구 선택 프롬프트
+# 도구 선택 프롬프트 (system 메시지로 보내는 고정 접두부 - 질의는 FUNCTION_SELECTION_USER_TEMPLATE로 뒤에 붙음)
 FUNCTION_SELECTION_PROMPT = generate_function_selection_prompt()
+FUNCTION_SELECTION_USER_TEMPLATE = "사용자 질문: {query}"
 
 # 응답 생성 프롬프트
-RESPONSE_GENERATION_PROMPT = """
-                            당신은 제공된 도구의 실행 결과와 원본 사용자 질문을 바탕으로 **빠지는 내용없이** 최종 답변을 생성해야 하는 AI 어시스턴트입니다.\n"
-                            "모든 답변은 반드시 한국어로만 작성하세요. 중국어, 영어 등 외국어를 사용하지 마세요.\n"
-                            "도구 실행 결과를 **주의 깊게 분석하고, 사용자 질문에 가장 적합하고 정확한** 답변을 작성하세요.\n"
-                            "답변은 **명확하고 구체적**이어야 하며, 도구 실행 결과에서 얻은 정보를 **잘 통합**해야 합니다.\n"
-                            "만약 도구 실행 결과만으로는 사용자의 질문에 완전히 답변하기 어렵거나 정보가 부족하다면, **모르는 내용은 추측하지 말고 정보가 제한적이거나 불충분함을 명확하게 밝히세요.**\n"
-                            "\n"
-                            "원본 사용자 질문: {user_query}\n"
-                            "\n"
-                            "사용된 도구 및 결과:\n"
-                            "{tool_results}\n"
-                            "\n"
-                            "이 정보를 바탕으로 사용자의 질문에 대한 종합적이고 정확한 답변을 작성하세요."
-                        """
+# 모델 서버(LM Studio / llama.cpp)가 프롬프트 캐시(KV 캐시)를 재사용할 수 있도록
+# 고정 지침은 system 메시지(항상 같은 접두부)로, 질의별로 바뀌는 도구 결과와 질문은 user 메시지(접미부)로 분리합니다.
+RESPONSE_SYSTEM_PROMPT = (
+    "당신은 제공된 도구의 실행 결과와 원본 사용자 질문을 바탕으로 **빠지는 내용없이** 최종 답변을 생성해야 하는 AI 어시스턴트입니다.\n"
+    "모든 답변은 반드시 한국어로만 작성하세요. 중국어, 영어 등 외국어를 사용하지 마세요.\n"
+    "도구 실행 결과를 **주의 깊게 분석하고, 사용자 질문에 가장 적합하고 정확한** 답변을 작성하세요.\n"
+    "답변은 **명확하고 구체적**이어야 하며, 도구 실행 결과에서 얻은 정보를 **잘 통합**해야 합니다.\n"
+    "만약 도구 실행 결과만으로는 사용자의 질문에 완전히 답변하기 어렵거나 정보가 부족하다면, **모르는 내용은 추측하지 말고 정보가 제한적이거나 불충분함을 명확하게 밝히세요.**"
+)
+RESPONSE_USER_TEMPLATE = (
+    "사용된 도구 및 결과:\n"
+    "{tool_results}\n"
+    "\n"
+    "원본 사용자 질문: {user_query}\n"
+    "\n"
+    "이 정보를 바탕으로 사용자의 질문에 대한 종합적이고 정확한 답변을 작성하세요."
+)
+# 단일 프롬프트가 필요한 곳(토큰 예산 계산, 응답 캐시 지문, 배치 completions)용 전체 템플릿 - 고정 접두부가 앞에 옴
+RESPONSE_GENERATION_PROMPT = RESPONSE_SYSTEM_PROMPT + "\n\n" + RESPONSE_USER_TEMPLATE
 
 # 설정 정보 출력 (디버깅용)
 def print_config():
@@ -229,23 +437,97 @@ def print_config():
     config_info = {
         "LM Studio": {
             "Base URL": LM_STUDIO_BASE_URL,
-            "Model": LM_STUDIO_MODEL_NAME
+            "Model": LM_STUDIO_MODEL_NAME,
+            "Max Concurrency": LLM_MAX_CONCURRENCY,
+            "Max Connections": LLM_MAX_CONNECTIONS,
+            "Timeouts": (LLM_CONNECT_TIMEOUT, LLM_REQUEST_TIMEOUT),
+            "Retry Delay": (LLM_RETRY_BASE_DELAY, LLM_RETRY_MAX_DELAY),
+            "Coalesce Enabled": LLM_COALESCE_ENABLED,
+            "Micro Batch Enabled": LLM_MICRO_BATCH_ENABLED,
+            "Micro Batch Max Size": LLM_MICRO_BATCH_MAX_SIZE,
+            "Micro Batch Wait (ms)": LLM_MICRO_BATCH_WAIT_MS
         },
         "Temperature": {
             "Tool Selection": TOOL_SELECTION_TEMPERATURE,
             "Response": RESPONSE_TEMPERATURE
         },
+        "Streaming": STREAMING_ENABLED,
         "RAG": {
-            "Vector DB Path (Not used for MongoDB)": VECTOR_DB_PATH, # MongoDB 사용 시에는 이 경로를 사용하지 않음을 명시
+            "Vector Store Backend": VECTOR_STORE_BACKEND,
+            "Vector DB Path (local backend only)": VECTOR_DB_PATH, # atlas 백엔드 사용 시에는 이 경로를 사용하지 않음
+            "Local Index Mode": LOCAL_VECTOR_INDEX_MODE,
+            "Local Index Delta Max": LOCAL_VECTOR_DELTA_MAX,
+            "Retrieval Mode": RETRIEVAL_MODE,
+            "BM25 (k1, b)": (BM25_K1, BM25_B),
+            "RRF K / Hybrid Candidates": (RRF_K, HYBRID_CANDIDATES),
+            "Lexical Fast Path": LEXICAL_FAST_PATH_ENABLED,
+            "Vector Index Name": VECTOR_INDEX_NAME,
+            "Vector Index Auto Create": VECTOR_INDEX_AUTO_CREATE,
+            "Num Candidates (multiplier, max)": (VECTOR_NUM_CANDIDATES_MULTIPLIER, VECTOR_NUM_CANDIDATES_MAX),
+            "Exact Search Max Chunks": VECTOR_EXACT_SEARCH_MAX_CHUNKS,
             "Chunk Size": CHUNK_SIZE,
             "Chunk Overlap": CHUNK_OVERLAP,
-            "Top K Results": TOP_K_RESULTS
+            "Top K Results": TOP_K_RESULTS,
+            "Snippet Length / Highlight": (SEARCH_SNIPPET_LENGTH, SEARCH_SNIPPET_HIGHLIGHT),
+            "Result Metadata Fields": SEARCH_RESULT_FIELDS
+        },
+        "Ingestion": {
+            "Batch Size": INGEST_BATCH_SIZE,
+            "Insert Batch Size": INGEST_INSERT_BATCH_SIZE,
+            "Max Workers": INGEST_MAX_WORKERS,
+            "Queue Size": INGEST_QUEUE_SIZE,
+            "KeyBERT Top N": KEYBERT_TOP_N,
+            "KeyBERT Process Workers": KEYBERT_PROCESS_WORKERS,
+            "KeyBERT Process Min Chunks": KEYBERT_PROCESS_MIN_CHUNKS
         },
         "System": {
             "Debug Mode": DEBUG_MODE,
             "Log Level": LOG_LEVEL,
             "Max Retries": MAX_RETRIES,
-            "Timeout": TIMEOUT
+            "Timeout": TIMEOUT,
+            "Resource Warmup": RESOURCE_WARMUP,
+            "Tracing": TRACING_ENABLED,
+            "LangSmith Project": LANGSMITH_PROJECT,
+            "Tool Execution Mode": TOOL_EXECUTION_MODE,
+            "Tool Max Workers": TOOL_MAX_WORKERS,
+            "Tool Timeouts": TOOL_TIMEOUTS,
+            "HTTP Timeouts": (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+            "HTTP Pool Size": HTTP_POOL_SIZE,
+            "HTTP Max Retries": HTTP_MAX_RETRIES,
+            "HTTP Async Enabled": HTTP_ASYNC_ENABLED,
+            "Geocode Cache Size": GEOCODE_CACHE_SIZE,
+            "File List Page Size": FILE_LIST_PAGE_SIZE,
+            "File Catalog Refresh Interval": FILE_CATALOG_REFRESH_INTERVAL,
+            "File Catalog Fuzzy Threshold": FILE_CATALOG_FUZZY_THRESHOLD,
+            "Excel Preview Rows": EXCEL_PREVIEW_ROWS,
+            "Columnar Bucket": COLUMNAR_BUCKET_NAME,
+            "Sheet Frame Cache Size": SHEET_FRAME_CACHE_SIZE
+        },
+        "Rule Router": {
+            "Enabled": RULE_ROUTER_ENABLED,
+            "Confidence Threshold": RULE_ROUTER_CONFIDENCE_THRESHOLD
+        },
+        "Tool Result Cache": {
+            "Enabled": TOOL_RESULT_CACHE_ENABLED,
+            "Max Size": TOOL_RESULT_CACHE_MAX_SIZE,
+            "Tool TTLs": TOOL_RESULT_CACHE_TTLS,
+            "Stale TTL": TOOL_RESULT_CACHE_STALE_TTL,
+            "Path": TOOL_RESULT_CACHE_PATH
+        },
+        "Response Context": {
+            "Token Budget": RESPONSE_CONTEXT_TOKEN_BUDGET,
+            "Tokenizer": CONTEXT_TOKENIZER,
+            "Max Items": CONTEXT_MAX_ITEMS,
+            "Item Max Chars": CONTEXT_ITEM_MAX_CHARS,
+            "Min Relative Score": CONTEXT_MIN_RELATIVE_SCORE
+        },
+        "Response Cache": {
+            "Enabled": RESPONSE_CACHE_ENABLED,
+            "Max Size": RESPONSE_CACHE_MAX_SIZE,
+            "TTL": RESPONSE_CACHE_TTL,
+            "Tool TTLs": RESPONSE_CACHE_TOOL_TTLS,
+            "Semantic": RESPONSE_CACHE_SEMANTIC,
+            "Similarity Threshold": RESPONSE_CACHE_SIMILARITY_THRESHOLD
         },
         "Enabled Tools": ENABLED_TOOLS,
         # MongoDB 관련 정보 추가
@@ -254,7 +536,11 @@ def print_config():
              "Vector Collection Name": VECTOR_COLLECTION_NAME # config 파일에 추가
         },
         "Embedding": { # 임베딩 설정 정보 추가
-            "Model Name": EMBEDDING_MODEL_NAME
+            "Model Name": EMBEDDING_MODEL_NAME,
+            "Dimensions": EMBEDDING_DIMENSIONS,
+            "Query Cache Size": EMBEDDING_CACHE_SIZE,
+            "Query Cache Path": EMBEDDING_CACHE_PATH,
+            "Query Cache Warmup": EMBEDDING_CACHE_WARMUP
         }
     }
     
@@ -12,6 +12,8 @@ from tools.list_files_tool import list_files_tool
 # internal_vector_search 도구 임포트
 from tools.vector_search_tool import vector_search_tool
 from config import RESPONSE_GENERATION_PROMPT
+from core.context_builder import ContextBuilder
+from core.tool_manager import tool_result_keys
 
 logger = setup_logger(__name__)
 
@@ -96,7 +98,9 @@ class Agent:
 
             # 3. 도구 실행 결과를 바탕으로 최종 응답 생성
             # 모든 도구 결과 수집
-            formatted_tool_results = "\n".join([f"도구: {r['tool']}\\n인자: {r['arguments']}\\n결과: {r['result']}\\n" for r in tool_results])
+            # 같은 도구를 여러 번 호출한 결과도 모두 포함되도록 계획 순번으로 구분한 키 사용
+            keys = tool_result_keys([r['tool'] for r in tool_results])
+            formatted_tool_results, _ = ContextBuilder().build(user_query, {key: r['result'] for key, r in zip(keys, tool_results)})
 
             response_prompt = f"""
             {RESPONSE_GENERATION_PROMPT.format(user_query=user_query, tool_results=formatted_tool_results)}
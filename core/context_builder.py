@@ -0,0 +1,267 @@
+# core/context_builder.py
+
+import json
+import re
+import threading
+from config import (
+    RESPONSE_GENERATION_PROMPT, RESPONSE_CONTEXT_TOKEN_BUDGET, CONTEXT_TOKENIZER,
+    CONTEXT_MAX_ITEMS, CONTEXT_ITEM_MAX_CHARS, CONTEXT_MIN_RELATIVE_SCORE
+)
+from core.tool_manager import tool_name_of
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+ELLIPSIS = "..."
+
+# ---- 토큰 수 측정 ----
+
+_encoder = None
+_encoder_lock = threading.Lock()
+
+def _get_encoder():
+    """tiktoken 인코더 (처음 필요할 때 로드, 설치되지 않았거나 로드에 실패하면 False)"""
+    global _encoder
+    if _encoder is None:
+        with _encoder_lock:
+            if _encoder is None:
+                try:
+                    import tiktoken
+                    _encoder = tiktoken.get_encoding(CONTEXT_TOKENIZER)
+                except Exception as e:
+                    logger.info(f"tiktoken 인코더를 사용할 수 없어 글자 수 기반으로 토큰 수를 추정합니다: {e}")
+                    _encoder = False
+    return _encoder
+
+def token_counter_name():
+    """토큰 수 측정 방식 (디버그 정보용)"""
+    return f"tiktoken:{CONTEXT_TOKENIZER}" if _get_encoder() else "heuristic"
+
+def count_tokens(text):
+    """
+    텍스트의 모델 토큰 수.
+    tiktoken이 있으면 CONTEXT_TOKENIZER 인코딩으로 세고, 없으면 ASCII는 4글자당 1토큰,
+    한글 등 그 밖의 글자는 글자당 1토큰으로 추정합니다 (로컬 모델 토크나이저에서 한글이 대체로 글자당 1토큰 안팎).
+    """
+    if not text:
+        return 0
+    encoder = _get_encoder()
+    if encoder:
+        return len(encoder.encode(text, disallowed_special=()))
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+# ---- 도구별 요약 렌더러 ----
+# 렌더러는 (머리 줄 목록, 항목 목록, 렌더링 단계에서 제외한 항목 수)를 반환합니다.
+# 머리 줄은 항상 포함되고, 항목은 중요도 순이며 토큰 예산이 부족하면 뒤에서부터 빠집니다.
+
+def _clip(text, limit=None):
+    """공백을 정리하고 limit 글자로 자름"""
+    limit = CONTEXT_ITEM_MAX_CHARS if limit is None else limit
+    text = re.sub(r"\s+", " ", str(text)).strip()
+    return text if len(text) <= limit else text[:limit].rstrip() + ELLIPSIS
+
+def _compact_json(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+def _render_weather(result):
+    parts = [f"{result.get('location')}({result.get('country')})", f"{result.get('weather_desc') or result.get('weather_main')}"]
+    parts.append(
+        f"기온 {result.get('temperature_c')}°C (체감 {result.get('feels_like')}°C, "
+        f"최저 {result.get('temperature_min')}°C / 최고 {result.get('temperature_max')}°C)"
+    )
+    parts.append(f"습도 {result.get('humidity')}%")
+    parts.append(f"구름 {result.get('cloudiness')}%")
+    wind = f"바람 {result.get('wind_speed')}m/s"
+    if result.get("wind_gust"):
+        wind += f" (돌풍 {result.get('wind_gust')}m/s)"
+    parts.append(wind)
+    # 값이 있는 강수/강설만 표시
+    for key, label in (("rain_1h", "1시간 강수"), ("rain_3h", "3시간 강수"), ("snow_1h", "1시간 강설"), ("snow_3h", "3시간 강설")):
+        if result.get(key):
+            parts.append(f"{label} {result[key]}mm")
+    return [", ".join(parts)], [], 0
+
+def _render_web_search(result):
+    seen_urls, seen_contents, items = set(), set(), []
+    dropped = 0
+    for entry in result:
+        if not isinstance(entry, dict):
+            items.append(_clip(entry))
+            continue
+        content = _clip(entry.get("content", ""))
+        url = entry.get("url")
+        # 같은 URL, 같은 본문(다른 URL로 복제된 기사 등)은 한 번만 포함
+        if url in seen_urls or content in seen_contents:
+            dropped += 1
+            continue
+        seen_urls.add(url)
+        seen_contents.add(content)
+        title = f"{entry['title']}: " if entry.get("title") else ""
+        items.append(f"- {title}{content} ({url})")
+    return [], items, dropped
+
+def _render_vector_search(result):
+    hits = [hit for hit in result if isinstance(hit, dict)]
+    if not hits:
+        return [], [], 0
+    hits.sort(key=lambda hit: hit.get("score") or 0, reverse=True)
+    top_score = hits[0].get("score") or 0
+    seen_chunks, seen_contents, items = set(), set(), []
+    dropped = 0
+    for hit in hits:
+        content = _clip(hit.get("content", ""))
+        chunk = (hit.get("filename"), hit.get("chunk_index"))
+        # 점수 척도가 모드(vector/BM25/RRF)마다 다르므로 최고 점수 대비 비율로 낮은 점수 결과를 제외
+        too_low = top_score > 0 and (hit.get("score") or 0) < top_score * CONTEXT_MIN_RELATIVE_SCORE
+        if too_low or chunk in seen_chunks or content in seen_contents:
+            dropped += 1
+            continue
+        seen_chunks.add(chunk)
+        seen_contents.add(content)
+        extra = {k: v for k, v in hit.items() if k not in ("filename", "chunk_index", "score", "content") and v is not None}
+        suffix = f" {_compact_json(extra)}" if extra else ""
+        items.append(f"- [{hit.get('filename')} #{hit.get('chunk_index')}]{suffix} {content}")
+    return [], items, dropped
+
+def _render_list_files(result):
+    header = [f"파일 {len(result)}개"]
+    items = [f"- {entry.get('filename')} ({entry.get('size_mb')} MB)" if isinstance(entry, dict) else f"- {entry}" for entry in result]
+    return header, items, 0
+
+def _render_calculator(result):
+    return [f"{result.get('expression')} = {result.get('result')}"], [], 0
+
+def _render_excel(result):
+    columns = ", ".join(f"{name}({result.get('dtypes', {}).get(name, '')})" for name in result.get("columns", []))
+    header = [
+        f"{result.get('filename')} [{result.get('sheet')}] {result.get('rows')}행, 시트: {', '.join(result.get('sheets', []))}",
+        _clip(f"열: {columns}", CONTEXT_ITEM_MAX_CHARS * 2)
+    ]
+    items = [_clip(_compact_json(row)) for row in result.get("preview", [])]
+    return header, items, 0
+
+def _render_spreadsheet_query(result):
+    meta = {k: v for k, v in result.items() if k != "result"}
+    value = result.get("result")
+    if isinstance(value, list):
+        return [_compact_json(meta)], [_clip(_compact_json(row)) for row in value], 0
+    return [f"{_compact_json(meta)} → 결과: {value}"], [], 0
+
+def _render_default(result):
+    if isinstance(result, list):
+        return [], [_clip(_compact_json(entry) if not isinstance(entry, str) else entry) for entry in result], 0
+    text = result if isinstance(result, str) else _compact_json(result)
+    return [_clip(text, CONTEXT_ITEM_MAX_CHARS * 4)], [], 0
+
+RENDERERS = {
+    "weather_tool": (dict, _render_weather),
+    "search_tool": (list, _render_web_search),
+    "vector_search_tool": (list, _render_vector_search),
+    "list_files_tool": (list, _render_list_files),
+    "calculator_tool": (dict, _render_calculator),
+    "excel_reader_tool": (dict, _render_excel),
+    "spreadsheet_query_tool": (dict, _render_spreadsheet_query),
+}
+
+def render_tool_result(tool_name, result):
+    """
+    도구 결과 하나를 요약 형식으로 렌더링합니다.
+
+    Args:
+        tool_name (str): 도구 이름 또는 결과 키 ('weather_tool#1'처럼 같은 도구의 여러 호출을 구분한 키도 허용)
+        result: 도구 실행 결과
+
+    Returns:
+        tuple: (머리 줄 목록, 중요도 순 항목 목록, 중복/낮은 점수로 제외한 항목 수)
+    """
+    if isinstance(result, dict) and "error" in result:
+        return [f"오류: {_clip(result['error'])}"], [], 0
+    expected_type, renderer = RENDERERS.get(tool_name_of(tool_name), (None, _render_default))
+    if expected_type is not None and not isinstance(result, expected_type):
+        renderer = _render_default
+    try:
+        return renderer(result)
+    except Exception as e:
+        logger.warning(f"도구 결과 요약 실패({tool_name}), 기본 형식 사용: {e}")
+        return _render_default(result)
+
+class ContextBuilder:
+    """
+    응답 생성 프롬프트의 도구 결과 컨텍스트 구성 담당.
+    도구별 요약 렌더러로 결과를 줄이고, 프롬프트 전체가 토큰 예산 안에 들도록 항목을 골라 넣습니다.
+    """
+
+    def __init__(self, token_budget=None, max_items=None, prompt_template=None):
+        """
+        Args:
+            token_budget (int, optional): 응답 생성 프롬프트 전체의 최대 토큰 수 (0이면 제한 없음). 기본값은 RESPONSE_CONTEXT_TOKEN_BUDGET
+            max_items (int, optional): 도구별 최대 항목 수. 기본값은 CONTEXT_MAX_ITEMS
+            prompt_template (str, optional): 응답 생성 프롬프트 템플릿. 기본값은 RESPONSE_GENERATION_PROMPT
+        """
+        self.token_budget = RESPONSE_CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget
+        self.max_items = CONTEXT_MAX_ITEMS if max_items is None else max_items
+        self.prompt_template = prompt_template or RESPONSE_GENERATION_PROMPT
+
+    def build(self, user_query, tool_results):
+        """
+        도구 결과를 토큰 예산 안의 컨텍스트 텍스트로 만듭니다.
+        모든 도구의 머리 줄(요약/오류)을 먼저 넣고, 항목은 도구별로 번갈아 중요도 순으로 예산이 허락하는 만큼 넣습니다.
+
+        Args:
+            user_query (str): 사용자 질의
+            tool_results (dict): 결과 키(도구 이름, 같은 도구를 여러 번 호출하면 '도구이름#계획순번') -> 실행 결과
+
+        Returns:
+            tuple: (컨텍스트 텍스트, 통계 dict - context_tokens, items_kept, items_dropped, token_budget, over_budget)
+        """
+        sections = []
+        dropped = 0
+        for tool_name, result in tool_results.items():
+            header, items, skipped = render_tool_result(tool_name, result)
+            dropped += skipped + max(0, len(items) - self.max_items)
+            sections.append({"tool": tool_name, "header": header, "items": items[:self.max_items], "kept": []})
+
+        overhead = count_tokens(self.prompt_template.format(user_query=user_query, tool_results=""))
+        used = overhead + sum(count_tokens(self._section_text(section)) for section in sections)
+        unlimited = self.token_budget <= 0
+
+        # 항목을 도구별로 번갈아 추가 (한 도구가 예산을 모두 쓰지 않도록)
+        depth = max((len(section["items"]) for section in sections), default=0)
+        for rank in range(depth):
+            for section in sections:
+                if rank >= len(section["items"]):
+                    continue
+                item = section["items"][rank]
+                cost = count_tokens(item) + 1 # 줄바꿈
+                if unlimited or used + cost <= self.token_budget:
+                    section["kept"].append(item)
+                    used += cost
+                else:
+                    dropped += 1
+
+        text = "\n\n".join(self._section_text(section, omitted=len(section["items"]) - len(section["kept"])) for section in sections)
+        context_tokens = count_tokens(text)
+        stats = {
+            "context_tokens": context_tokens,
+            "items_kept": sum(len(section["kept"]) for section in sections),
+            "items_dropped": dropped,
+            "token_budget": self.token_budget,
+            "over_budget": not unlimited and overhead + context_tokens > self.token_budget
+        }
+        if stats["over_budget"]:
+            logger.warning(f"도구 결과 요약만으로 토큰 예산 초과: {overhead + context_tokens} > {self.token_budget}")
+        return text, stats
+
+    @staticmethod
+    def _section_text(section, omitted=0):
+        lines = [f"도구: {section['tool']}"]
+        body = section["header"] + section["kept"]
+        if len(body) == 1 and not section["items"]:
+            lines.append(f"결과: {body[0]}")
+        else:
+            lines.append("결과:")
+            lines.extend(body)
+        if omitted:
+            lines.append(f"(토큰 예산 초과로 {omitted}건 생략)")
+        return "\n".join(lines)
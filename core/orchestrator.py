@@ -1,55 +1,202 @@
 # core/orchestrator.py
 
+import time
 from core.query_analyzer import QueryAnalyzer
-from core.tool_manager import ToolManager
+from core.tool_manager import ToolManager, tool_result_keys
 from core.response_generator import ResponseGenerator
+from core.response_cache import ResponseCache, config_fingerprint
 from utils.logger import setup_logger
-from config import FUNCTION_SELECTION_PROMPT, AVAILABLE_FUNCTIONS
+from config import (
+    FUNCTION_SELECTION_PROMPT, AVAILABLE_FUNCTIONS, RESPONSE_GENERATION_PROMPT,
+    RESPONSE_TEMPERATURE, TOOL_SELECTION_TEMPERATURE, RESPONSE_CACHE_ENABLED
+)
 
 logger = setup_logger(__name__)
 
 class Orchestrator:
     """전체 AgenticRAG 시스템 오케스트레이션"""
     
-    def __init__(self, lm_studio_client):
-        """오케스트레이터 초기화"""
+    def __init__(self, lm_studio_client, response_cache=None, tool_manager=None):
+        """
+        오케스트레이터 초기화
+        
+        Args:
+            lm_studio_client: LM Studio 클라이언트 인스턴스
+            response_cache (ResponseCache, optional): 응답 캐시. 없으면 RESPONSE_CACHE_ENABLED에 따라 생성합니다.
+            tool_manager (ToolManager, optional): 공유 도구 관리자. 없으면 새로 생성합니다.
+        """
         self.lm_studio_client = lm_studio_client
         self.query_analyzer = QueryAnalyzer(lm_studio_client)
-        self.tool_manager = ToolManager()
+        self.tool_manager = tool_manager or ToolManager()
         self.response_generator = ResponseGenerator(lm_studio_client)
+        if response_cache is None and RESPONSE_CACHE_ENABLED:
+            response_cache = ResponseCache(self._config_fingerprint(), embed_fn=self._embed_query)
+        self.response_cache = response_cache
+        if self.response_cache:
+            # 파일 업로드/삭제 시 코퍼스 의존 답변 무효화
+            from storage.mongodb_storage import MongoDBStorage
+            MongoDBStorage.add_change_listener(self.response_cache.on_corpus_change)
         logger.info("오케스트레이터 초기화 완료")
     
-    async def process_query(self, query):
-        """사용자 질의 처리 파이프라인"""
-        logger.info(f"질의 처리 시작: {query}")
-        
-        # 1. 질의 분석 및 도구 선택
-        tool_call = self.query_analyzer.analyze(query)
+    def _config_fingerprint(self):
+        """도구 구성, 프롬프트, 모델 설정 지문"""
+        return config_fingerprint(
+            getattr(self.lm_studio_client, "model", None),
+            sorted(self.tool_manager.tools.keys()),
+            AVAILABLE_FUNCTIONS,
+            FUNCTION_SELECTION_PROMPT,
+            RESPONSE_GENERATION_PROMPT,
+            TOOL_SELECTION_TEMPERATURE,
+            RESPONSE_TEMPERATURE
+        )
+    
+    @staticmethod
+    def _embed_query(query):
+        """응답 캐시 의미 유사도 계층용 질의 임베딩 (벡터 검색과 같은 임베딩 모델 사용)"""
+        from storage.mongodb_storage import MongoDBStorage
+        return MongoDBStorage.get_instance().embed_query(query)
+    
+    def _cached_result(self, query, entry, tier):
+        """캐시 항목을 process_query 반환 형식으로 변환"""
+        logger.info(f"응답 캐시 적중 ({tier}): {query}")
+        return {
+            "query": query,
+            "tool_calls": entry["tool_calls"],
+            "tool_results": entry["tool_results"],
+            "tool_timings": {},
+            "route_source": "cache",
+            "cache": tier
+        }
+    
+    def _store_in_cache(self, query, tool_call, tool_results, tool_timings, response, metrics):
+        """실패 없이 완료된 응답만 캐시에 저장 (도구가 하나라도 실패/시간 초과(status가 ok가 아님)하면 저장하지 않음)"""
+        if not self.response_cache or metrics.get("error"):
+            return
+        if any(isinstance(t, dict) and t.get("status") != "ok" for t in tool_timings.values()):
+            return
+        self.response_cache.store(query, tool_call, tool_results, response)
+    
+    def _cache_stream(self, stream, query, tool_call, tool_results, tool_timings, metrics):
+        """스트림을 그대로 전달하면서 완료 시 전체 응답을 캐시에 저장"""
+        parts = []
+        for delta in stream:
+            parts.append(delta)
+            yield delta
+        self._store_in_cache(query, tool_call, tool_results, tool_timings, "".join(parts), metrics)
+    
+    async def _acache_stream(self, stream, query, tool_call, tool_results, tool_timings, metrics):
+        """_cache_stream의 비동기 버전"""
+        parts = []
+        async for delta in stream:
+            parts.append(delta)
+            yield delta
+        self._store_in_cache(query, tool_call, tool_results, tool_timings, "".join(parts), metrics)
+    
+    @staticmethod
+    async def _astream_text(text):
+        yield text
+    
+    async def _select_and_run_tools(self, query):
+        """질의 분석 후 선택된 도구를 실행하고 (도구 호출, 결과, 실행 시간, 도구 선택 주체)를 반환"""
+        # 1. 질의 분석 및 도구 선택 (규칙 라우터 → LLM 순)
+        analysis_start = time.perf_counter()
+        tool_call, route_source = await self.query_analyzer.aanalyze_with_source(query)
+        logger.info(f"도구 선택 완료 (결정 주체: {route_source}, {time.perf_counter() - analysis_start:.3f}초)")
         
-        # 2. 선택된 도구 실행
+        # 2. 선택된 도구 실행 (독립적인 도구 호출은 동시에 실행)
         tool_results = {}
+        tool_timings = {"routing": round(time.perf_counter() - analysis_start, 3)}
         if tool_call:
             # 여러 도구 호출 지원
             tool_calls = tool_call if isinstance(tool_call, list) else [tool_call]
-            for call in tool_calls:
-                tool_name = call["name"]
-                arguments = call["arguments"]
-                logger.info(f"도구 실행: {tool_name}, 인자: {arguments}")
-                result = self.tool_manager.execute_tool(tool_name, **arguments)
-                logger.info(f"도구 실행 결과: {result}")
-                tool_results[tool_name] = result
+            tools_start = time.perf_counter()
+            executed = await self.tool_manager.execute_tools(tool_calls)
+            # 결과는 도구 계획 순서대로 저장 (같은 도구를 여러 번 호출하면 '도구이름#계획순번' 키로 구분)
+            keys = tool_result_keys([tool_name for tool_name, _, _ in executed])
+            for key, (tool_name, result, timing) in zip(keys, executed):
+                logger.info(f"도구 실행 결과 ({key}, {timing['elapsed']}초): {result}")
+                tool_results[key] = result
+                tool_timings[key] = timing
+            tool_timings["total"] = round(time.perf_counter() - tools_start, 3)
+        
+        return tool_call, tool_results, tool_timings, route_source
+    
+    async def process_query(self, query):
+        """사용자 질의 처리 파이프라인"""
+        logger.info(f"질의 처리 시작: {query}")
+        
+        # 0. 응답 캐시 조회
+        if self.response_cache:
+            entry, tier = self.response_cache.lookup(query)
+            if entry is not None:
+                return {**self._cached_result(query, entry, tier), "response": entry["response"]}
+        
+        tool_call, tool_results, tool_timings, route_source = await self._select_and_run_tools(query)
         
         # 3. 최종 응답 생성
-        final_response = self.response_generator.generate(query, tool_results)
+        metrics = {}
+        final_response = await self.response_generator.agenerate(query, tool_results, metrics=metrics)
+        self._store_in_cache(query, tool_call, tool_results, tool_timings, final_response, metrics)
+        
+        return {
+            "query": query,
+            "tool_calls": tool_call,
+            "tool_results": tool_results,
+            "tool_timings": tool_timings,
+            "response": final_response,
+            "metrics": metrics,
+            "route_source": route_source,
+            "cache": None
+        }
+    
+    async def process_query_stream(self, query, use_async=False):
+        """
+        사용자 질의 처리 파이프라인 (스트리밍 응답)
+        
+        도구 실행까지 완료한 뒤, 최종 응답은 토큰 단위로 소비할 수 있는 스트림으로 반환합니다.
+        스트림을 모두 소비하면 metrics에 ttft, ttft_total, generation_time, chunks가 기록됩니다.
+        
+        Args:
+            query (str): 사용자 질의
+            use_async (bool, optional): True이면 비동기 제너레이터를 반환합니다.
+        
+        Returns:
+            dict: query, tool_calls, tool_results, tool_timings, response_stream, metrics
+        """
+        logger.info(f"질의 처리 시작 (스트리밍): {query}")
+        origin = time.perf_counter()
+        
+        # 0. 응답 캐시 조회 (적중 시 캐시된 응답을 한 번에 전달)
+        if self.response_cache:
+            entry, tier = self.response_cache.lookup(query)
+            if entry is not None:
+                metrics = {"ttft_total": round(time.perf_counter() - origin, 3), "chunks": 1}
+                response_stream = self._astream_text(entry["response"]) if use_async else iter([entry["response"]])
+                return {**self._cached_result(query, entry, tier), "response_stream": response_stream, "metrics": metrics}
+        
+        tool_call, tool_results, tool_timings, route_source = await self._select_and_run_tools(query)
+        
+        # 3. 최종 응답 스트림 생성 (스트림이 끝나면 응답 캐시에 저장)
+        metrics = {}
+        if use_async:
+            response_stream = self.response_generator.agenerate_stream(query, tool_results, metrics=metrics, origin=origin)
+            response_stream = self._acache_stream(response_stream, query, tool_call, tool_results, tool_timings, metrics)
+        else:
+            response_stream = self.response_generator.generate(query, tool_results, stream=True, metrics=metrics, origin=origin)
+            response_stream = self._cache_stream(response_stream, query, tool_call, tool_results, tool_timings, metrics)
         
         return {
             "query": query,
             "tool_calls": tool_call,
             "tool_results": tool_results,
-            "response": final_response
+            "tool_timings": tool_timings,
+            "response_stream": response_stream,
+            "metrics": metrics,
+            "route_source": route_source,
+            "cache": None
         }
     
     def process_query_sync(self, query):
-        """동기 방식의 질의 처리 (비동기 래퍼)"""
-        import asyncio
-        return asyncio.run(self.process_query(query))
\ No newline at end of file
+        """동기 방식의 질의 처리 (공유 백그라운드 이벤트 루프에서 실행하는 비동기 래퍼)"""
+        from utils.event_loop import run_coroutine
+        return run_coroutine(self.process_query(query))
\ No newline at end of file
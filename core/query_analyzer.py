@@ -1,88 +1,152 @@
 # core/query_analyzer.py
 
-from config import FUNCTION_SELECTION_PROMPT, AVAILABLE_FUNCTIONS
+from config import FUNCTION_SELECTION_PROMPT, FUNCTION_SELECTION_USER_TEMPLATE, AVAILABLE_FUNCTIONS, RULE_ROUTER_ENABLED
+from core.rule_router import RuleRouter, extract_filename_from_query
 from utils.logger import setup_logger
 import json
-import re
 
 logger = setup_logger(__name__)
 
 class QueryAnalyzer:
     """사용자 질의를 분석하고 적절한 도구를 선택하는 분석기"""
     
-    def __init__(self, lm_studio_client):
-        """질의 분석기 초기화"""
+    def __init__(self, lm_studio_client, rule_router=None):
+        """
+        질의 분석기 초기화
+        
+        Args:
+            lm_studio_client: LM Studio 클라이언트 인스턴스
+            rule_router (RuleRouter, optional): LLM 호출 전 규칙 라우터. 없으면 RULE_ROUTER_ENABLED에 따라 생성하고, False이면 사용하지 않습니다.
+        """
         self.lm_studio_client = lm_studio_client
+        if rule_router is None and RULE_ROUTER_ENABLED:
+            rule_router = RuleRouter()
+        self.rule_router = rule_router
         logger.info("질의 분석기 초기화")
     
     def analyze(self, query):
         """사용자 질의를 분석하고 사용할 도구를 결정"""
-        logger.info(f"질의 분석: {query}")
+        result, _ = self.analyze_with_source(query)
+        return result
+    
+    def analyze_with_source(self, query):
+        """
+        사용자 질의를 분석하고 사용할 도구와 결정 주체를 함께 반환
         
-        def extract_filename_from_query(query):
-            # 예: '배수지 수위 데이터 엑셀 파일' → '배수지 수위 데이터'
-            m = re.search(r'([\w\d가-힣_\-\.]+)\s*(엑셀|xlsx|xls|파일)', query)
-            if m:
-                return m.group(1)
-            return None
+        Returns:
+            tuple: (도구 호출 dict/list, 결정 주체 "rule" / "llm" / "fallback")
+        """
+        # 규칙으로 확실히 분류되는 질의는 LLM 도구 선택 호출을 건너뜁니다.
+        tool_call = self._route_with_rules(query)
+        if tool_call:
+            return tool_call, "rule"
+        return self._analyze_with_llm(query)
+    
+    def _route_with_rules(self, query):
+        """규칙 라우터로 확실히 분류되면 도구 호출을, 아니면 None을 반환"""
+        if self.rule_router:
+            decision = self.rule_router.route(query)
+            if decision["tool_call"]:
+                logger.info(f"규칙 라우터 도구 선택 (신뢰도 {decision['confidence']}): {decision['tool_call']}")
+                return decision["tool_call"]
+            if decision["rules"]:
+                logger.info(f"규칙 라우터 신뢰도 낮음 ({decision['confidence']}, {decision['rules']}). LLM으로 도구 선택")
+        return None
+    
+    async def aanalyze_with_source(self, query):
+        """
+        analyze_with_source의 비동기 버전.
+        클라이언트가 afunction_call을 제공하면 LLM 도구 선택 호출을 이벤트 루프에서 기다립니다 (스레드를 점유하지 않음).
         
-        # 프롬프트에 도구 설명, 예시 추가 (config에서 관리)
-        prompt = f"{FUNCTION_SELECTION_PROMPT}\n\n사용자 질문: {query}"
+        Returns:
+            tuple: (도구 호출 dict/list, 결정 주체 "rule" / "llm" / "fallback")
+        """
+        tool_call = self._route_with_rules(query)
+        if tool_call:
+            return tool_call, "rule"
+        if not hasattr(self.lm_studio_client, "afunction_call"):
+            return self._analyze_with_llm(query)
+        
+        logger.info(f"질의 분석 (비동기): {query}")
+        try:
+            result = await self.lm_studio_client.afunction_call(
+                self._build_prompt(query), AVAILABLE_FUNCTIONS, system=FUNCTION_SELECTION_PROMPT
+            )
+            logger.info(f"모델 반환값: {result}")
+            return self._resolve_llm_result(query, result)
+        except Exception as e:
+            logger.error(f"도구 선택 오류: {str(e)}")
+            return {"name": "search_tool", "arguments": {"query": query}}, "fallback"
+    
+    @staticmethod
+    def _build_prompt(query):
+        # 도구 설명, 예시는 system 메시지(FUNCTION_SELECTION_PROMPT)로 고정하고 질의만 user 메시지로 전송
+        # (모델 서버가 매 요청 같은 접두부의 프롬프트 캐시를 재사용)
+        return FUNCTION_SELECTION_USER_TEMPLATE.format(query=query)
+    
+    def _analyze_with_llm(self, query):
+        """LLM 함수 호출로 사용할 도구를 결정하고 (도구 호출, 결정 주체)를 반환"""
+        logger.info(f"질의 분석: {query}")
         
         # 함수 호출 요청
         try:
-            result = self.lm_studio_client.function_call(prompt, AVAILABLE_FUNCTIONS)
+            result = self.lm_studio_client.function_call(
+                self._build_prompt(query), AVAILABLE_FUNCTIONS, system=FUNCTION_SELECTION_PROMPT
+            )
             logger.info(f"모델 반환값: {result}")
+            return self._resolve_llm_result(query, result)
+        except Exception as e:
+            logger.error(f"도구 선택 오류: {str(e)}")
+            # 오류 발생 시 기본 도구로 폴백
+            return {"name": "search_tool", "arguments": {"query": query}}, "fallback"
+    
+    def _resolve_llm_result(self, query, result):
+        """모델 반환값을 검증/보완해 (도구 호출, 결정 주체)를 반환"""
+        # result가 문자열(즉, JSON 문자열)일 경우 파싱 시도
+        if isinstance(result, str):
+            try:
+                result = json.loads(result)
+            except Exception as e:
+                logger.error(f"모델 반환값 JSON 파싱 오류: {e}, result: {result}")
+                return {"name": "search_tool", "arguments": {"query": query}}, "fallback"
 
-            # result가 문자열(즉, JSON 문자열)일 경우 파싱 시도
-            if isinstance(result, str):
-                try:
-                    result = json.loads(result)
-                except Exception as e:
-                    logger.error(f"모델 반환값 JSON 파싱 오류: {e}, result: {result}")
-                    return {"name": "search_tool", "arguments": {"query": query}}
-
-            # 여러 도구 반환 지원
-            if isinstance(result, list):
-                # 여러 도구 중 엑셀 미리보기 도구가 있으면 filename 자동 추출
-                for call in result:
-                    if call["name"] in ["excel_reader_tool"]:
-                        if not call["arguments"].get("filename"):
-                            filename = extract_filename_from_query(query)
-                            if filename:
-                                call["arguments"]["filename"] = filename
-                return result
+        # 여러 도구 반환 지원
+        if isinstance(result, list):
+            # 여러 도구 중 엑셀 미리보기 도구가 있으면 filename 자동 추출
+            for call in result:
+                if call["name"] in ["excel_reader_tool", "spreadsheet_query_tool"]:
+                    if not call["arguments"].get("filename"):
+                        filename = extract_filename_from_query(query)
+                        if filename:
+                            call["arguments"]["filename"] = filename
+            return result, "llm"
 
-            # 반환값 검증 (단일 도구)
-            if (
-                result is None
-                or not isinstance(result, dict)
-                or "name" not in result
-                or "arguments" not in result
-                or not result["name"]
-            ):
-                logger.warning(f"모델이 올바른 도구를 반환하지 않음: {result}")
-                return {"name": "search_tool", "arguments": {"query": query}}
+        # 반환값 검증 (단일 도구)
+        if (
+            result is None
+            or not isinstance(result, dict)
+            or "name" not in result
+            or "arguments" not in result
+            or not result["name"]
+        ):
+            logger.warning(f"모델이 올바른 도구를 반환하지 않음: {result}")
+            return {"name": "search_tool", "arguments": {"query": query}}, "fallback"
 
-            # db_excel_preview_tool, excel_reader_tool이면 filename 자동 추출
-            if result["name"] in ["excel_reader_tool"]:
-                if not result["arguments"].get("filename"):
-                    filename = extract_filename_from_query(query)
-                    if filename:
-                        result["arguments"]["filename"] = filename
+        # db_excel_preview_tool, excel_reader_tool이면 filename 자동 추출
+        if result["name"] in ["excel_reader_tool", "spreadsheet_query_tool"]:
+            if not result["arguments"].get("filename"):
+                filename = extract_filename_from_query(query)
+                if filename:
+                    result["arguments"]["filename"] = filename
 
-            # arguments가 비어있을 때도 체크
-            if not result["arguments"]:
-                # 인자가 필요 없는 도구는 예외적으로 허용
-                if result["name"] in ["list_files_tool"]:
-                    logger.info(f"인자 없는 도구 정상 허용: {result['name']}")
-                    return result
-                logger.warning(f"도구 인자가 비어있음: {result}")
-                return {"name": "search_tool", "arguments": {"query": query}}
+        # arguments가 비어있을 때도 체크
+        if not result["arguments"]:
+            # 인자가 필요 없는 도구는 예외적으로 허용
+            if result["name"] in ["list_files_tool"]:
+                logger.info(f"인자 없는 도구 정상 허용: {result['name']}")
+                return result, "llm"
+            logger.warning(f"도구 인자가 비어있음: {result}")
+            return {"name": "search_tool", "arguments": {"query": query}}, "fallback"
 
-            logger.info(f"선택된 도구: {result['name']}, 인자: {result['arguments']}")
-            return result
-        except Exception as e:
-            logger.error(f"도구 선택 오류: {str(e)}")
-            # 오류 발생 시 기본 도구로 폴백
-            return {"name": "search_tool", "arguments": {"query": query}}
\ No newline at end of file
+        logger.info(f"선택된 도구: {result['name']}, 인자: {result['arguments']}")
+        return result, "llm"
\ No newline at end of file
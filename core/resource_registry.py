@@ -0,0 +1,136 @@
+# core/resource_registry.py
+
+import time
+import threading
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+class ResourceRegistry:
+    """
+    프로세스 전체에서 공유하는 무거운 리소스(LLM 클라이언트, 도구, 임베딩/KeyBERT 모델 등) 레지스트리.
+    리소스는 처음 요청될 때 한 번만 생성되며(스레드 안전), Streamlit 세션은 생성된 객체의 참조만 보관합니다.
+    """
+
+    def __init__(self):
+        self._factories = {} # 이름 -> 생성 함수
+        self._instances = {} # 이름 -> 생성된 리소스
+        self._build_locks = {} # 이름 -> 생성 잠금 (서로 다른 리소스는 동시에 생성 가능)
+        self._lock = threading.Lock()
+        self._warming = set()
+        self.build_times = {} # 이름 -> 생성 시간(초)
+
+    def register(self, name, factory):
+        """
+        리소스 생성 함수를 등록합니다.
+
+        Args:
+            name (str): 리소스 이름
+            factory (callable): 인자 없이 리소스를 생성해 반환하는 함수
+        """
+        with self._lock:
+            self._factories[name] = factory
+            self._build_locks.setdefault(name, threading.Lock())
+
+    def get(self, name):
+        """
+        리소스를 반환합니다. 아직 없으면 생성하며, 동시에 요청한 다른 스레드는 생성이 끝날 때까지 기다립니다.
+        생성에 실패하면 예외를 그대로 전달하고 다음 요청 때 다시 시도합니다.
+        """
+        if name in self._instances:
+            return self._instances[name]
+        if name not in self._factories:
+            raise KeyError(f"등록되지 않은 리소스: {name}")
+        with self._build_locks[name]:
+            instance = self._instances.get(name)
+            if name not in self._instances:
+                start_time = time.perf_counter()
+                instance = self._factories[name]()
+                self.build_times[name] = round(time.perf_counter() - start_time, 3)
+                self._instances[name] = instance
+                logger.info(f"공유 리소스 생성: {name} ({self.build_times[name]}초)")
+        return instance
+
+    def is_ready(self, name):
+        return name in self._instances
+
+    def reset(self, name):
+        """생성된 리소스를 버려 다음 요청 때 다시 생성하도록 합니다."""
+        with self._lock:
+            self._instances.pop(name, None)
+            self.build_times.pop(name, None)
+
+    def warm_up(self, names):
+        """
+        아직 생성되지 않은 리소스를 백그라운드 스레드에서 미리 생성합니다 (이미 진행 중이면 건너뜀).
+
+        Args:
+            names (list): 리소스 이름 목록 (등록 순서와 관계없이 목록 순서대로 생성)
+
+        Returns:
+            threading.Thread | None: 워밍업 스레드 (할 일이 없으면 None)
+        """
+        with self._lock:
+            pending = [n for n in names if n in self._factories and n not in self._instances and n not in self._warming]
+            self._warming.update(pending)
+        if not pending:
+            return None
+
+        def run():
+            for name in pending:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    logger.warning(f"공유 리소스 워밍업 실패 ({name}): {e}")
+                finally:
+                    with self._lock:
+                        self._warming.discard(name)
+
+        thread = threading.Thread(target=run, name="resource-warmup", daemon=True)
+        thread.start()
+        logger.info(f"공유 리소스 워밍업 시작: {', '.join(pending)}")
+        return thread
+
+    def get_stats(self):
+        """리소스별 생성 여부와 생성 시간"""
+        return {
+            name: {"ready": name in self._instances, "build_time": self.build_times.get(name)}
+            for name in self._factories
+        }
+
+def _create_orchestrator():
+    from core.orchestrator import Orchestrator
+    return Orchestrator(registry.get("lm_studio_client"), tool_manager=registry.get("tool_manager"))
+
+def _create_lm_studio_client():
+    from models.lm_studio import AsyncLMStudioClient
+    return AsyncLMStudioClient()
+
+def _create_tool_manager():
+    from core.tool_manager import ToolManager
+    return ToolManager()
+
+def _create_mongodb_storage():
+    from storage.mongodb_storage import MongoDBStorage
+    return MongoDBStorage.get_instance()
+
+def _create_keyword_tagger():
+    """KeyBERT 태그 추출기 (모델까지 로드해 첫 파일 업로드가 느려지지 않도록 함)"""
+    tagger = registry.get("mongodb_storage")._get_keyword_tagger()
+    tagger.model
+    return tagger
+
+def _create_embedding_model():
+    return registry.get("mongodb_storage").embedding_model
+
+registry = ResourceRegistry()
+registry.register("lm_studio_client", _create_lm_studio_client)
+registry.register("tool_manager", _create_tool_manager)
+registry.register("orchestrator", _create_orchestrator)
+registry.register("mongodb_storage", _create_mongodb_storage)
+registry.register("keyword_tagger", _create_keyword_tagger)
+registry.register("embedding_model", _create_embedding_model)
+
+def get_resource(name):
+    """프로세스 공유 리소스 반환 (registry.get의 단축 함수)"""
+    return registry.get(name)
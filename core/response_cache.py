@@ -0,0 +1,169 @@
+# core/response_cache.py
+
+import re
+import json
+import hashlib
+import threading
+import unicodedata
+import numpy as np
+from utils.cache import TTLCache
+from utils.logger import setup_logger
+from core.tool_manager import tool_name_of
+from config import (
+    RESPONSE_CACHE_MAX_SIZE, RESPONSE_CACHE_TTL, RESPONSE_CACHE_TOOL_TTLS,
+    RESPONSE_CACHE_SEMANTIC, RESPONSE_CACHE_SIMILARITY_THRESHOLD
+)
+
+logger = setup_logger(__name__)
+
+# 업로드된 파일(코퍼스)에 의존하는 도구 - 파일 저장/삭제 시 캐시 무효화 대상
+CORPUS_TOOLS = ("vector_search_tool", "list_files_tool", "excel_reader_tool", "spreadsheet_query_tool")
+
+def normalize_query(query):
+    """캐시 키용 질의 정규화 (유니코드 정규화, 대소문자, 공백, 끝 문장부호)"""
+    text = unicodedata.normalize("NFC", query or "").casefold()
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.rstrip("?!.。？！ ")
+
+def config_fingerprint(*parts):
+    """도구 구성, 프롬프트, 모델 설정 등이 바뀌면 달라지는 지문(fingerprint) 생성"""
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+class ResponseCache:
+    """질의 → 최종 응답 캐시 (정확 일치 + 선택적 의미 유사도 계층)"""
+
+    def __init__(self, fingerprint, embed_fn=None, max_size=None, ttl=None, tool_ttls=None,
+                 semantic=None, similarity_threshold=None):
+        """
+        응답 캐시 초기화
+
+        Args:
+            fingerprint (str): 도구/설정 지문. 키에 포함되어 설정이 바뀌면 이전 항목은 사용되지 않습니다.
+            embed_fn (callable, optional): 질의 임베딩 함수 (의미 유사도 계층에서 사용)
+            max_size (int, optional): 최대 캐시 항목 수
+            ttl (float, optional): 기본 만료 시간(초)
+            tool_ttls (dict, optional): 도구별 만료 시간(초). 사용된 도구 중 가장 짧은 값이 적용됩니다.
+            semantic (bool, optional): 의미 유사도 계층 사용 여부
+            similarity_threshold (float, optional): 의미 유사도 계층의 코사인 유사도 임계값
+        """
+        self.fingerprint = fingerprint
+        self.embed_fn = embed_fn
+        self.ttl = RESPONSE_CACHE_TTL if ttl is None else ttl
+        self.tool_ttls = RESPONSE_CACHE_TOOL_TTLS if tool_ttls is None else tool_ttls
+        self.semantic = (RESPONSE_CACHE_SEMANTIC if semantic is None else semantic) and embed_fn is not None
+        self.similarity_threshold = RESPONSE_CACHE_SIMILARITY_THRESHOLD if similarity_threshold is None else similarity_threshold
+        self._entries = TTLCache(max_size=max_size or RESPONSE_CACHE_MAX_SIZE, ttl=self.ttl)
+        self._vectors = {} # 캐시 키 -> 정규화된 질의 임베딩 (의미 유사도 계층)
+        self._lock = threading.Lock()
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "stores": 0, "invalidations": 0}
+        logger.info(f"응답 캐시 초기화 (지문: {fingerprint}, 의미 계층: {self.semantic})")
+
+    def _make_key(self, normalized_query):
+        return hashlib.sha256(f"{self.fingerprint}\x00{normalized_query}".encode("utf-8")).hexdigest()
+
+    def _embed(self, normalized_query):
+        try:
+            vector = np.asarray(self.embed_fn(normalized_query), dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            return vector / norm if norm else None
+        except Exception as e:
+            logger.warning(f"응답 캐시 질의 임베딩 실패 (의미 계층 건너뜀): {e}")
+            return None
+
+    def _semantic_lookup(self, normalized_query):
+        with self._lock:
+            # 정확 일치 계층에서 만료/방출된 항목의 벡터 정리
+            for key in [k for k in self._vectors if k not in self._entries]:
+                del self._vectors[key]
+            if not self._vectors:
+                return None
+            keys = list(self._vectors.keys())
+            matrix = np.stack([self._vectors[k] for k in keys])
+        vector = self._embed(normalized_query)
+        if vector is None:
+            return None
+        scores = matrix @ vector
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity_threshold:
+            return None
+        logger.info(f"응답 캐시 의미 유사도 적중 (유사도: {scores[best]:.3f})")
+        return self._entries.get(keys[best])
+
+    def lookup(self, query):
+        """
+        캐시된 응답을 조회합니다.
+
+        Returns:
+            tuple: (캐시 항목 dict 또는 None, 적중 계층 "exact"/"semantic" 또는 None)
+        """
+        normalized = normalize_query(query)
+        entry = self._entries.get(self._make_key(normalized))
+        if entry is not None:
+            self.stats["exact_hits"] += 1
+            return entry, "exact"
+        if self.semantic:
+            entry = self._semantic_lookup(normalized)
+            if entry is not None:
+                self.stats["semantic_hits"] += 1
+                return entry, "semantic"
+        self.stats["misses"] += 1
+        return None, None
+
+    def _ttl_for(self, tools):
+        ttls = [self.tool_ttls[name] for name in tools if name in self.tool_ttls]
+        return min([self.ttl] + ttls)
+
+    def store(self, query, tool_calls, tool_results, response):
+        """
+        최종 응답을 캐시에 저장합니다. 도구별 TTL 중 가장 짧은 값이 적용되며, TTL이 0이면 저장하지 않습니다.
+        """
+        tools = [tool_name_of(key) for key in tool_results.keys()]
+        ttl = self._ttl_for(tools)
+        if ttl <= 0:
+            return
+        normalized = normalize_query(query)
+        key = self._make_key(normalized)
+        self._entries.set(key, {
+            "query": query,
+            "tool_calls": tool_calls,
+            "tool_results": tool_results,
+            "tools": tools,
+            "response": response
+        }, ttl=ttl)
+        if self.semantic:
+            vector = self._embed(normalized)
+            if vector is not None:
+                with self._lock:
+                    self._vectors[key] = vector
+        self.stats["stores"] += 1
+
+    def invalidate_tools(self, tool_names):
+        """지정된 도구의 결과를 사용한 캐시 항목을 모두 제거합니다."""
+        tool_names = set(tool_names)
+        removed = self._entries.remove_where(lambda key, entry: bool(tool_names & set(entry["tools"])))
+        if removed:
+            self.stats["invalidations"] += removed
+            logger.info(f"응답 캐시 무효화: {sorted(tool_names)} 관련 {removed}개 항목 제거")
+        return removed
+
+    def on_corpus_change(self, event, filename):
+        """MongoDBStorage 파일 저장/삭제 이벤트 리스너 - 코퍼스 의존 도구 결과 무효화"""
+        logger.info(f"코퍼스 변경 감지 ({event}: {filename}). 응답 캐시 무효화")
+        self.invalidate_tools(CORPUS_TOOLS)
+
+    def clear(self):
+        self._entries.clear()
+        with self._lock:
+            self._vectors.clear()
+
+    def get_stats(self):
+        """적중/미스 카운터 및 캐시 크기 반환"""
+        lookups = self.stats["exact_hits"] + self.stats["semantic_hits"] + self.stats["misses"]
+        hits = self.stats["exact_hits"] + self.stats["semantic_hits"]
+        return {
+            **self.stats,
+            "size": len(self._entries),
+            "evictions": self._entries.evictions,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0
+        }
@@ -1,7 +1,9 @@
 # core/response_generator.py
 
-from config import RESPONSE_GENERATION_PROMPT
-from utils.helpers import format_tool_results
+import asyncio
+from config import RESPONSE_GENERATION_PROMPT, RESPONSE_SYSTEM_PROMPT, RESPONSE_USER_TEMPLATE
+from core.context_builder import ContextBuilder, count_tokens, token_counter_name
+from utils.helpers import measure_stream, ameasure_stream
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -12,25 +14,131 @@ class ResponseGenerator:
     def __init__(self, lm_studio_client):
         """응답 생성기 초기화"""
         self.lm_studio_client = lm_studio_client
+        self.context_builder = ContextBuilder(prompt_template=RESPONSE_GENERATION_PROMPT)
+        # 고정 지침(system 메시지)은 모든 요청이 같은 바이트로 보내므로 토큰 수를 한 번만 계산
+        self.prefix_tokens = count_tokens(RESPONSE_SYSTEM_PROMPT)
         logger.info("응답 생성기 초기화")
     
-    def generate(self, user_query, tool_results):
-        """도구 실행 결과와 원래 질의를 바탕으로 최종 응답 생성"""
-        logger.info("최종 응답 생성")
+    def _build_prompt(self, user_query, tool_results, metrics=None):
+        """
+        응답 생성 user 메시지 구성 (도구 결과는 토큰 예산에 맞춘 요약 컨텍스트로 변환).
+        고정 지침은 RESPONSE_SYSTEM_PROMPT(system 메시지)로 따로 보내 모델 서버의 프롬프트 캐시 접두부로 재사용됩니다.
         
-        # 도구 결과 포맷팅
-        formatted_results = format_tool_results(tool_results)
+        Args:
+            user_query (str): 사용자 질의
+            tool_results (dict): 도구 실행 결과
+            metrics (dict, optional): 프롬프트 토큰 수(prompt_tokens, system 포함)와 컨텍스트 통계(context)를 기록할 딕셔너리
         
-        # 프롬프트 구성
-        prompt = RESPONSE_GENERATION_PROMPT.format(
+        Returns:
+            tuple: (user 메시지, 도구 결과 컨텍스트 텍스트)
+        """
+        formatted_results, stats = self.context_builder.build(user_query, tool_results)
+        prompt = RESPONSE_USER_TEMPLATE.format(
             user_query=user_query,
             tool_results=formatted_results
         )
+        stats["token_counter"] = token_counter_name()
+        stats["prefix_tokens"] = self.prefix_tokens
+        prompt_tokens = self.prefix_tokens + count_tokens(prompt)
+        logger.info(
+            f"응답 프롬프트 토큰 {prompt_tokens}개 (고정 접두부 {self.prefix_tokens}개, 도구 결과 {stats['context_tokens']}개, 예산 {stats['token_budget']}, "
+            f"항목 {stats['items_kept']}건 포함 / {stats['items_dropped']}건 제외)"
+        )
+        if metrics is not None:
+            metrics["prompt_tokens"] = prompt_tokens
+            metrics["context"] = stats
+        return prompt, formatted_results
+    
+    def generate(self, user_query, tool_results, stream=False, metrics=None, origin=None):
+        """
+        도구 실행 결과와 원래 질의를 바탕으로 최종 응답 생성
+        
+        Args:
+            user_query (str): 사용자 질의
+            tool_results (dict): 도구 실행 결과
+            stream (bool, optional): True이면 응답 조각을 반환하는 제너레이터를 반환합니다.
+            metrics (dict, optional): TTFT, 프롬프트 토큰 수 등 측정값과 오류 여부(error)를 기록할 딕셔너리
+            origin (float, optional): TTFT 계산 기준 시각 (time.perf_counter())
+        
+        Returns:
+            str 또는 generator: 생성된 응답 (stream=True이면 응답 조각 제너레이터)
+        """
+        if stream:
+            return self.generate_stream(user_query, tool_results, metrics=metrics, origin=origin)
+        
+        logger.info("최종 응답 생성")
+        
+        # 프롬프트 구성 (도구 결과 요약 + 토큰 예산 적용)
+        prompt, formatted_results = self._build_prompt(user_query, tool_results, metrics)
         
         # 응답 생성
         try:
-            response = self.lm_studio_client.generate_response(prompt)
+            response = self.lm_studio_client.generate_response(prompt, system=RESPONSE_SYSTEM_PROMPT)
             return response
         except Exception as e:
             logger.error(f"응답 생성 오류: {str(e)}")
-            return f"응답을 생성하는 중 오류가 발생했습니다. 검색 결과: {formatted_results}"
\ No newline at end of file
+            if metrics is not None:
+                metrics["error"] = str(e)
+            return f"응답을 생성하는 중 오류가 발생했습니다. 검색 결과: {formatted_results}"
+    
+    async def agenerate(self, user_query, tool_results, metrics=None):
+        """
+        generate의 비동기 버전 (전체 응답을 한 번에 반환).
+        클라이언트가 agenerate_response를 제공하면 이벤트 루프에서 기다리고, 아니면 별도 스레드에서 동기 호출합니다.
+        
+        Args:
+            user_query (str): 사용자 질의
+            tool_results (dict): 도구 실행 결과
+            metrics (dict, optional): 프롬프트 토큰 수와 오류 여부(error)를 기록할 딕셔너리
+        
+        Returns:
+            str: 생성된 응답
+        """
+        logger.info("최종 응답 비동기 생성")
+        prompt, formatted_results = self._build_prompt(user_query, tool_results, metrics)
+        
+        try:
+            if hasattr(self.lm_studio_client, "agenerate_response"):
+                return await self.lm_studio_client.agenerate_response(prompt, system=RESPONSE_SYSTEM_PROMPT)
+            return await asyncio.to_thread(self.lm_studio_client.generate_response, prompt, system=RESPONSE_SYSTEM_PROMPT)
+        except Exception as e:
+            logger.error(f"응답 생성 오류: {str(e)}")
+            if metrics is not None:
+                metrics["error"] = str(e)
+            return f"응답을 생성하는 중 오류가 발생했습니다. 검색 결과: {formatted_results}"
+    
+    def generate_stream(self, user_query, tool_results, metrics=None, origin=None):
+        """최종 응답을 토큰 단위로 스트리밍 생성 (제너레이터)"""
+        logger.info("최종 응답 스트리밍 생성")
+        metrics = metrics if metrics is not None else {}
+        prompt, formatted_results = self._build_prompt(user_query, tool_results, metrics)
+        
+        try:
+            stream = self.lm_studio_client.stream_response(prompt, system=RESPONSE_SYSTEM_PROMPT)
+            for delta in measure_stream(stream, metrics, origin):
+                yield delta
+        except Exception as e:
+            logger.error(f"스트리밍 응답 생성 오류: {str(e)}")
+            metrics["error"] = str(e)
+            if metrics.get("chunks"):
+                yield f"\n\n(응답 생성 중 오류가 발생했습니다: {str(e)})"
+            else:
+                yield f"응답을 생성하는 중 오류가 발생했습니다. 검색 결과: {formatted_results}"
+    
+    async def agenerate_stream(self, user_query, tool_results, metrics=None, origin=None):
+        """최종 응답을 토큰 단위로 비동기 스트리밍 생성 (비동기 제너레이터)"""
+        logger.info("최종 응답 비동기 스트리밍 생성")
+        metrics = metrics if metrics is not None else {}
+        prompt, formatted_results = self._build_prompt(user_query, tool_results, metrics)
+        
+        try:
+            stream = self.lm_studio_client.astream_response(prompt, system=RESPONSE_SYSTEM_PROMPT)
+            async for delta in ameasure_stream(stream, metrics, origin):
+                yield delta
+        except Exception as e:
+            logger.error(f"비동기 스트리밍 응답 생성 오류: {str(e)}")
+            metrics["error"] = str(e)
+            if metrics.get("chunks"):
+                yield f"\n\n(응답 생성 중 오류가 발생했습니다: {str(e)})"
+            else:
+                yield f"응답을 생성하는 중 오류가 발생했습니다. 검색 결과: {formatted_results}"
\ No newline at end of file
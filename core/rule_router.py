@@ -0,0 +1,254 @@
+# core/rule_router.py
+
+import re
+from config import ENABLED_TOOLS, RULE_ROUTER_CONFIDENCE_THRESHOLD
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# 한국어 연산자 표현 → 수식 기호
+OPERATOR_WORDS = {
+    "곱하기": "*",
+    "더하기": "+",
+    "빼기": "-",
+    "나누기": "/",
+    "×": "*",
+    "÷": "/",
+}
+
+CALC_KEYWORDS = re.compile(r"계산|구해|몇이야|값은")
+# 계산 질의에 자주 붙지만 그 자체로는 계산 의도가 아닌 표현 ('3-4월 결과', '얼마나' 등) - 신뢰도를 올리지 않고 잔여 내용에서만 제외
+CALC_FILLER_WORDS = re.compile(r"얼마|결과")
+# 함수 호출(sqrt(2) 등) 또는 숫자-연산자-숫자 형태의 수식
+_FUNCTION_CALL = r"(?:sqrt|sin|cos|tan|log|abs)\s*\([^()]*\)"
+_OPERAND = rf"\(*\s*(?:{_FUNCTION_CALL}|[\d.]+)\s*\)*"
+EXPRESSION_PATTERN = re.compile(rf"{_OPERAND}(?:\s*[+\-*/^%]\s*{_OPERAND})+|{_FUNCTION_CALL}")
+# 수식으로 인정하는 연산자: *, /, ^, + 또는 앞뒤에 공백이 있는 - ('빼기'도 ' - '로 치환됨)
+CALC_OPERATOR = re.compile(r"[*/^+]|\s-\s")
+# 붙어 있는 숫자-하이픈-숫자는 날짜(2024-05-01), 범위(3-4월), 번호(900101-1234567)로 보고 수식에서 제외
+NUMBER_HYPHEN_NUMBER = re.compile(r"\d\s?-\d|\d-\s?\d")
+
+# 날씨 명사는 단어로 쓰일 때만 (기상청, 기온차 등 다른 단어의 일부는 제외)
+WEATHER_KEYWORDS = re.compile(r"(날씨|기온|기상)(?=$|[\s?!.,]|[은는이가을를도의])")
+# 날씨를 묻는 시점 표현 (지명으로 쓰지 않음)
+WEATHER_TIME_WORDS = re.compile(r"오늘|내일|모레|지금|현재|(?:이번|다음)\s*주말?|주말|평일|아침|저녁|오전|오후|밤|새벽|실시간")
+# 현재/특정 날짜의 날씨를 묻는 표현
+WEATHER_INTENT = re.compile(rf"어때|어떄|알려|보여|궁금|몇\s*도|{WEATHER_TIME_WORDS.pattern}")
+# 날씨 단어가 있어도 현재 날씨 조회가 아닌 질의 (앱/사이트 추천, 방법, 통계 등 → LLM이 판단)
+WEATHER_NON_CURRENT = re.compile(r"추천|앱|어플|사이트|홈페이지|주소|방법|법$|법\s|어떻게|그래프|통계|변화|추이|평균|역대|뜻|의미|영어|좋은\s*날|가볼|여행지")
+# 위치가 아닌 시간/수식어 단어
+WEATHER_STOPWORDS = {"오늘", "내일", "모레", "지금", "현재", "요즘", "이번주", "오늘의", "현재의", "지금의", "실시간", "우리", "동네"}
+# 날씨 단어 앞뒤에 자주 오지만 지명이 아닌 단어
+NON_LOCATION_WORDS = {"정보", "예보", "상황", "상태", "변화", "좋", "좋은", "나쁜", "요즘", "최근", "주간", "이번", "다음", "어제"}
+PARTICLE_SUFFIX = re.compile(r"(에서의|에서|의|은|는|이|가|에)$")
+
+LIST_FILES_PATTERN = re.compile(
+    r"(파일|문서)\s*(목록|리스트|list)|(업로드|저장)(된|한)\s*(파일|문서)\s*(목록|리스트|뭐|보여|알려)"
+    r"|어떤\s*(파일|문서)(들)?(이|가)?\s*(있|저장|업로드|올라)",
+    re.IGNORECASE
+)
+# 파일 '내용'을 묻는 질의는 목록 조회가 아님
+CONTENT_INTENT = re.compile(r"내용|에서|검색|찾아|요약")
+# 파일 형식/관리 방법 등 일반 질문은 목록 조회가 아님
+LIST_FILES_NON_INTENT = re.compile(r"형식|확장자|방법|어떻게|추천|만드|관리|좋아")
+
+EXCEL_KEYWORDS = re.compile(r"엑셀|xlsx|xls|스프레드시트", re.IGNORECASE)
+SHOW_VERBS = re.compile(r"보여|열어|미리\s*보기|읽어|출력|확인")
+EXCEL_FILENAME = re.compile(r"[\w가-힣\-]+\.(?:xlsx|xls|csv)\b", re.IGNORECASE)
+# 특정 파일을 가리키는 표현 (확장자가 붙은 파일명, '~ 엑셀 파일', 파일을 여는 동사) - 없으면 엑셀 일반 질문일 수 있음
+EXCEL_FILE_REFERENCE = re.compile(r"\.(xlsx|xls|csv)\b|(엑셀|xlsx|xls|스프레드시트)\s*파일|열어|미리\s*보기|읽어", re.IGNORECASE)
+# 엑셀 사용법/학습 등 파일 조회가 아닌 질문
+EXCEL_NON_INTENT = re.compile(r"법$|법\s|방법|어떻게|다루|사용|배우|공부|강의|함수|단축키|수식|설치|추천")
+# 엑셀 데이터 집계 질의 (미리보기가 아니라 spreadsheet_query_tool 대상 → LLM이 인자 결정)
+AGGREGATION_INTENT = re.compile(r"합계|합산|총합|평균|최대|최소|최댓값|최솟값|개수|몇\s*개|상위|하위|순위|\S+별\s")
+
+# 여러 도구를 동시에 요청하는 접속 표현
+CONJUNCTIONS = re.compile(r"하고|그리고|이랑|랑|및|,|고\s")
+
+def extract_filename_from_query(query):
+    """질의에서 파일명 추출. 예: '배수지 수위 데이터 엑셀 파일' → '데이터'"""
+    m = re.search(r'([\w\d가-힣_\-\.]+)\s*(엑셀|xlsx|xls|파일)', query)
+    if m:
+        return m.group(1)
+    return None
+
+def extract_phrase_before_keyword(query, keyword_pattern):
+    """
+    키워드 앞의 여러 단어로 된 파일명 추출 ('~에서' 앞부분 제외).
+    예: 'DB에서 배수지 수위 데이터 엑셀 파일 보여줘' → '배수지 수위 데이터'
+    """
+    m = keyword_pattern.search(query)
+    if not m:
+        return None
+    phrase = query[:m.start()]
+    phrase = re.split(r"\S*에서\s", phrase)[-1]
+    phrase = PARTICLE_SUFFIX.sub("", phrase.strip())
+    return phrase.strip() or None
+
+def is_plausible_location(word):
+    """지명으로 볼 수 있는 단어인지 (한글 두 글자 이상 또는 영문 지명, 시간/수식어 제외)"""
+    if not word or word in WEATHER_STOPWORDS or word in NON_LOCATION_WORDS or WEATHER_TIME_WORDS.fullmatch(word):
+        return False
+    return bool(re.fullmatch(r"[가-힣]{2,}|[A-Za-z][A-Za-z .\-]+", word))
+
+def is_calculation(expression):
+    """수식 후보가 실제 계산식인지 (날짜/범위/번호 형태 제외, 명확한 연산자 또는 함수 호출 필요)"""
+    if NUMBER_HYPHEN_NUMBER.search(expression):
+        return False
+    return bool(CALC_OPERATOR.search(expression) or re.search(_FUNCTION_CALL, expression))
+
+def normalize_operators(query):
+    """한국어 연산자 표현을 수식 기호로 치환"""
+    for word, symbol in OPERATOR_WORDS.items():
+        query = query.replace(word, f" {symbol} ")
+    return query
+
+class RuleRouter:
+    """LLM 도구 선택 전에 단순한 질의를 규칙(패턴/키워드)으로 처리하는 결정적 라우터"""
+
+    def __init__(self, enabled_tools=None, confidence_threshold=None):
+        """
+        규칙 라우터 초기화
+
+        Args:
+            enabled_tools (list, optional): 활성화된 도구 목록. 기본값은 ENABLED_TOOLS
+            confidence_threshold (float, optional): 규칙 결과를 채택할 최소 신뢰도
+        """
+        self.enabled_tools = set(enabled_tools or ENABLED_TOOLS)
+        self.confidence_threshold = (
+            RULE_ROUTER_CONFIDENCE_THRESHOLD if confidence_threshold is None else confidence_threshold
+        )
+        self.rules = [
+            ("calculator_tool", self._match_calculator),
+            ("weather_tool", self._match_weather),
+            ("list_files_tool", self._match_list_files),
+            ("excel_reader_tool", self._match_excel),
+        ]
+        logger.info(f"규칙 라우터 초기화 (임계값: {self.confidence_threshold})")
+
+    def _match_calculator(self, query):
+        normalized = normalize_operators(query)
+        matches = [
+            m for m in EXPRESSION_PATTERN.finditer(normalized)
+            if re.search(r"\d", m.group()) and is_calculation(m.group())
+        ]
+        if not matches:
+            return None
+        m = max(matches, key=lambda x: len(x.group()))
+        expression = re.sub(r"\s+", " ", m.group()).strip()
+        confidence = 0.7
+        if CALC_KEYWORDS.search(query):
+            confidence += 0.2
+        # 수식과 계산 키워드를 제외하면 남는 내용이 없으면 신뢰도 상승
+        residual = CALC_FILLER_WORDS.sub("", CALC_KEYWORDS.sub("", normalized.replace(m.group(), "")))
+        residual = re.sub(r"[\s?!.=]|해\s*줘|줘|은|는|이야|야|요|알려", "", residual)
+        if not residual:
+            confidence += 0.2
+        confidence = min(confidence, 0.98)
+        return m.start(), confidence, {"name": "calculator_tool", "arguments": {"expression": expression}}
+
+    @staticmethod
+    def _weather_location(before_text, after_text):
+        """날씨 단어 앞(없으면 뒤)의 단어에서 지명 후보 추출 (시간/수식어 단어는 건너뜀). (지명, 앞 단어 목록, 뒤 단어 목록) 반환"""
+        def is_modifier(word):
+            word = PARTICLE_SUFFIX.sub("", word)
+            return word in WEATHER_STOPWORDS or bool(WEATHER_TIME_WORDS.fullmatch(word))
+        before = [w for w in before_text.split() if not is_modifier(w)]
+        after = [w for w in after_text.split() if not is_modifier(w)]
+        location = None
+        if before:
+            location = PARTICLE_SUFFIX.sub("", before[-1])
+        elif after and not WEATHER_INTENT.search(after[0]):
+            location = PARTICLE_SUFFIX.sub("", after[0])
+        return location, before, after
+
+    def _match_weather(self, query):
+        matches = list(WEATHER_KEYWORDS.finditer(query))
+        if not matches:
+            return None
+        start = matches[0].start()
+        if WEATHER_NON_CURRENT.search(query):
+            return start, 0.3, None
+        # 날씨 단어마다 그 앞 구간(이전 날씨 단어 이후)에서 지명을 찾음 ('서울 날씨 알려주고 부산 날씨도' → 서울, 부산)
+        locations = []
+        bare = len(matches) == 1
+        for i, m in enumerate(matches):
+            segment_start = matches[i - 1].end() if i else 0
+            segment_end = matches[i + 1].start() if i + 1 < len(matches) else len(query)
+            location, before, after = self._weather_location(query[segment_start:m.start()], query[m.end():segment_end])
+            if i and not before:
+                continue # '서울 날씨 기온'처럼 바로 이어진 날씨 단어는 앞 지명과 같은 조회
+            # 지명으로 볼 수 있는 단어가 없으면 LLM이 판단
+            if not is_plausible_location(location):
+                return start, 0.3, None
+            if location not in locations:
+                locations.append(location)
+            bare = bare and len(before) <= 1 and not after
+        # 현재 날씨를 묻는 질의(조회 표현이 있거나 '서울 날씨'처럼 지명과 날씨 단어만 있는 경우)만 규칙으로 처리
+        if not (WEATHER_INTENT.search(query) or bare):
+            return start, 0.5, None
+        calls = [{"name": "weather_tool", "arguments": {"location": location}} for location in locations]
+        return start, 0.92, calls[0] if len(calls) == 1 else calls
+
+    def _match_list_files(self, query):
+        m = LIST_FILES_PATTERN.search(query)
+        if not m:
+            return None
+        if CONTENT_INTENT.search(query) or EXCEL_KEYWORDS.search(query) or LIST_FILES_NON_INTENT.search(query):
+            return m.start(), 0.4, None
+        return m.start(), 0.9, {"name": "list_files_tool", "arguments": {}}
+
+    def _match_excel(self, query):
+        m = EXCEL_KEYWORDS.search(query)
+        if not m:
+            return None
+        # 확장자가 붙은 파일명('매출현황.xlsx')이 있으면 그대로 사용
+        file_token = EXCEL_FILENAME.search(query)
+        filename = (
+            file_token.group() if file_token
+            else extract_phrase_before_keyword(query, EXCEL_KEYWORDS) or extract_filename_from_query(query)
+        )
+        if not filename or re.fullmatch(r"(db|DB|이|그|저|해당)", filename):
+            return m.start(), 0.3, None
+        if AGGREGATION_INTENT.search(query) or EXCEL_NON_INTENT.search(query):
+            return m.start(), 0.4, None
+        # 파일을 가리키는 표현과 조회 동사가 모두 있을 때만 임계값 이상 (없으면 LLM이 판단)
+        confidence = 0.9 if SHOW_VERBS.search(query) and EXCEL_FILE_REFERENCE.search(query) else 0.75
+        return m.start(), confidence, {"name": "excel_reader_tool", "arguments": {"filename": filename}}
+
+    def route(self, query):
+        """
+        질의를 규칙으로 분류합니다.
+
+        Returns:
+            dict: {
+                "tool_call": 도구 호출 dict/list 또는 None (신뢰도가 낮아 LLM으로 넘겨야 하는 경우),
+                "confidence": 신뢰도 (0~1),
+                "rules": 일치한 규칙 이름 목록
+            }
+        """
+        matched = []
+        for tool_name, rule in self.rules:
+            if tool_name not in self.enabled_tools:
+                continue
+            outcome = rule(query)
+            if outcome is not None:
+                matched.append((tool_name, *outcome))
+
+        decision = {"tool_call": None, "confidence": 0.0, "rules": [name for name, *_ in matched]}
+        if not matched:
+            return decision
+
+        # 여러 규칙이 일치하면 모두 신뢰도가 높고 접속 표현으로 이어진 경우에만 다중 도구로 처리
+        matched.sort(key=lambda item: item[1])
+        confidence = min(item[2] for item in matched)
+        calls = []
+        for item in matched:
+            # 한 규칙이 여러 호출을 반환할 수 있음 (예: 여러 지명의 날씨)
+            calls.extend(item[3] if isinstance(item[3], list) else [item[3]])
+        if len(matched) > 1 and not CONJUNCTIONS.search(query):
+            confidence = min(confidence, 0.5)
+        decision["confidence"] = round(confidence, 3)
+        if confidence >= self.confidence_threshold and all(calls):
+            decision["tool_call"] = calls[0] if len(calls) == 1 else calls
+        return decision
@@ -1,30 +1,78 @@
 # core/tool_manager.py
 
 import os
-from tools.search_tool import WebSearchTool
-from tools.calculator_tool import CalculatorTool
-from tools.weather_tool import WeatherTool
-# MongoDB 도구 임포트
-from tools.list_files_tool import ListFilesTool
-# internal_vector_search 도구 클래스 임포트
-from tools.vector_search_tool import VectorSearchTool
-from config import ENABLED_TOOLS
+import time
+import asyncio
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+from config import (
+    ENABLED_TOOLS, TIMEOUT, TOOL_EXECUTION_MODE, TOOL_MAX_WORKERS, TOOL_TIMEOUTS, HTTP_ASYNC_ENABLED,
+    TOOL_RESULT_CACHE_ENABLED
+)
+from core.tool_result_cache import ToolResultCache, is_cacheable
 from utils.logger import setup_logger
-from tools.excel_reader_tool import ExcelReaderTool
+from utils.tracing import init_tracing
 
 logger = setup_logger(__name__)
 
+# 도구 이름 -> (모듈 경로, 클래스 이름). 활성화된 도구의 모듈만 임포트하므로
+# 비활성 도구의 의존성(Tavily, pymongo, pandas, KeyBERT 등)은 로드되지 않습니다.
+TOOL_REGISTRY = {
+    # 웹 검색 도구
+    "search_tool": ("tools.search_tool", "WebSearchTool"),
+    # 계산 도구
+    "calculator_tool": ("tools.calculator_tool", "CalculatorTool"),
+    # 날씨 도구
+    "weather_tool": ("tools.weather_tool", "WeatherTool"),
+    # MongoDB 도구
+    "list_files_tool": ("tools.list_files_tool", "ListFilesTool"),
+    # internal_vector_search 도구 (벡터 스토어 불필요, 내부적으로 MongoDBStorage 사용)
+    "vector_search_tool": ("tools.vector_search_tool", "VectorSearchTool"),
+    # 엑셀 리더 도구
+    "excel_reader_tool": ("tools.excel_reader_tool", "ExcelReaderTool"),
+    # 스프레드시트 집계 도구
+    "spreadsheet_query_tool": ("tools.spreadsheet_query_tool", "SpreadsheetQueryTool"),
+}
+
+def load_tool_class(tool_name):
+    """도구 이름으로 도구 모듈을 임포트하고 클래스를 반환합니다."""
+    module_path, class_name = TOOL_REGISTRY[tool_name]
+    return getattr(importlib.import_module(module_path), class_name)
+
+def tool_result_keys(tool_names):
+    """
+    도구 계획 순서대로 결과/실행 시간 키 목록을 만듭니다.
+    같은 도구가 여러 번 호출되면 결과가 서로 덮어쓰지 않도록 '도구이름#계획순번'으로 구분합니다.
+
+    Args:
+        tool_names (list): 도구 계획 순서의 도구 이름 목록
+
+    Returns:
+        list: 결과 키 목록 (예: ["weather_tool#0", "weather_tool#1", "search_tool"])
+    """
+    return [name if tool_names.count(name) == 1 else f"{name}#{i}" for i, name in enumerate(tool_names)]
+
+def tool_name_of(result_key):
+    """결과 키에서 도구 이름을 추출합니다 ('weather_tool#1' -> 'weather_tool')."""
+    return result_key.split("#", 1)[0]
+
 class ToolManager:
     """도구 관리 및 실행 담당"""
     
-    def __init__(self, vector_store=None):
+    def __init__(self, vector_store=None, result_cache=None):
         """
         도구 관리자 초기화
         
         Args:
             vector_store (VectorStore, optional): 벡터 데이터베이스 인스턴스
+            result_cache (ToolResultCache, optional): 도구 결과 캐시. 없으면 TOOL_RESULT_CACHE_ENABLED에 따라 생성합니다.
         """
         self.tools = {}
+        if result_cache is None and TOOL_RESULT_CACHE_ENABLED:
+            result_cache = ToolResultCache()
+        self.result_cache = result_cache
+        # 블로킹 도구 호출을 동시에 실행하기 위한 제한된 스레드 풀
+        self._executor = ThreadPoolExecutor(max_workers=TOOL_MAX_WORKERS, thread_name_prefix="tool")
         self._register_tools(vector_store)
         logger.info(f"도구 관리자 초기화 완료 (활성화된 도구: {', '.join(self.tools.keys())})")
     
@@ -35,30 +83,19 @@ class ToolManager:
         Args:
             vector_store (VectorStore): 벡터 데이터베이스 인스턴스
         """
-        # 웹 검색 도구
-        if "search_tool" in ENABLED_TOOLS:
-            self.tools["search_tool"] = WebSearchTool()
-        
-        # 계산 도구
-        if "calculator_tool" in ENABLED_TOOLS:
-            self.tools["calculator_tool"] = CalculatorTool()
-        
-        # 날씨 도구
-        if "weather_tool" in ENABLED_TOOLS:
-            self.tools["weather_tool"] = WeatherTool()
-
-        # MongoDB 도구 등록
-        if "list_files_tool" in ENABLED_TOOLS:
-            self.tools["list_files_tool"] = ListFilesTool()
-
-        # internal_vector_search 도구 등록
-        if "vector_search_tool" in ENABLED_TOOLS:
-             # InternalVectorSearchTool은 벡터 스토어가 필요 없습니다 (내부적으로 MongoDBStorage 사용)
-            self.tools["vector_search_tool"] = VectorSearchTool()
-
-        # 엑셀 리더 도구 등록
-        if "excel_reader_tool" in ENABLED_TOOLS:
-            self.tools["excel_reader_tool"] = ExcelReaderTool()
+        # LangChain 기반 도구(웹 검색 등)를 만들기 전에 추적 설정
+        init_tracing()
+        for tool_name in TOOL_REGISTRY:
+            if tool_name not in ENABLED_TOOLS:
+                continue
+            start_time = time.perf_counter()
+            try:
+                self.tools[tool_name] = load_tool_class(tool_name)()
+            except ImportError as e:
+                # 의존성이 설치되지 않은 도구는 건너뛰고 나머지 도구로 계속 진행
+                logger.error(f"도구 로드 실패 ({tool_name}): {e}")
+                continue
+            logger.info(f"도구 로드: {tool_name} ({(time.perf_counter() - start_time) * 1000:.1f} ms)")
 
         logger.info(f"등록된 도구: {', '.join(self.tools.keys())}")
     
@@ -90,6 +127,96 @@ class ToolManager:
             logger.error(f"도구 실행 오류 ({tool_name}): {str(e)}")
             return f"도구 실행 중 오류가 발생했습니다: {str(e)}"
     
+    def get_timeout(self, tool_name):
+        """도구별 타임아웃(초) 반환 (TOOL_TIMEOUTS에 없으면 TIMEOUT 사용)"""
+        return float(TOOL_TIMEOUTS.get(tool_name, TIMEOUT))
+
+    def _revalidate(self, tool_name, arguments):
+        """stale 캐시 결과를 백그라운드 스레드에서 다시 가져와 저장합니다."""
+        try:
+            result = self.execute_tool(tool_name, **arguments)
+            if self.result_cache.store(tool_name, arguments, result):
+                logger.info(f"도구 결과 캐시 갱신 완료 ({tool_name})")
+        finally:
+            self.result_cache.end_refresh(tool_name, arguments)
+
+    async def _execute_native_async(self, tool_name, tool, arguments):
+        """aexecute를 제공하는 도구를 이벤트 루프에서 직접 실행 (execute_tool과 같은 오류 처리)"""
+        logger.info(f"도구 실행 (비동기): {tool_name}, 인자: {arguments}")
+        try:
+            return await tool.aexecute(**arguments)
+        except Exception as e:
+            logger.error(f"도구 실행 오류 ({tool_name}): {str(e)}")
+            return f"도구 실행 중 오류가 발생했습니다: {str(e)}"
+
+    async def execute_tool_async(self, tool_name, arguments=None):
+        """
+        스레드 풀에서 도구를 실행하고 타임아웃을 적용합니다.
+        HTTP_ASYNC_ENABLED이고 도구가 aexecute를 제공하면 스레드 풀 대신 이벤트 루프에서 직접 실행합니다.
+        결과 캐시에 있으면 도구를 실행하지 않고, 만료 직후(stale) 결과는 반환과 동시에 백그라운드에서 갱신합니다.
+        
+        Args:
+            tool_name (str): 실행할 도구 이름
+            arguments (dict, optional): 도구에 전달할 인자
+            
+        Returns:
+            tuple: (도구 실행 결과, 실행 시간 정보 dict - status: ok / error(오류 메시지 결과) / timeout)
+        """
+        arguments = arguments or {}
+        timeout = self.get_timeout(tool_name)
+        loop = asyncio.get_running_loop()
+        start_time = time.perf_counter()
+        if self.result_cache and tool_name in self.tools:
+            cached, cache_status = self.result_cache.lookup(tool_name, arguments)
+            if cache_status is not None:
+                logger.info(f"도구 결과 캐시 적중 ({tool_name}, {cache_status})")
+                if cache_status == "stale" and self.result_cache.begin_refresh(tool_name, arguments):
+                    self._executor.submit(self._revalidate, tool_name, dict(arguments))
+                elapsed = time.perf_counter() - start_time
+                return cached, {"elapsed": round(elapsed, 3), "timeout": timeout, "status": "ok", "cache": cache_status}
+        tool = self.tools.get(tool_name)
+        if HTTP_ASYNC_ENABLED and tool is not None and hasattr(tool, "aexecute"):
+            future = self._execute_native_async(tool_name, tool, arguments)
+        else:
+            future = loop.run_in_executor(self._executor, lambda: self.execute_tool(tool_name, **arguments))
+        try:
+            result = await asyncio.wait_for(future, timeout=timeout)
+            # 도구는 실패를 예외 대신 오류 메시지(문자열 또는 error 키가 있는 dict)로 반환하므로 결과로 실패 여부를 판단
+            status = "ok" if is_cacheable(result) else "error"
+            if status == "ok" and self.result_cache:
+                self.result_cache.store(tool_name, arguments, result)
+        except asyncio.TimeoutError:
+            # 스레드는 중단할 수 없으므로 결과만 버리고 응답을 계속 진행합니다 (비동기 도구는 취소됨).
+            logger.error(f"도구 실행 시간 초과 ({tool_name}): {timeout}초")
+            result = f"도구 실행 시간이 초과되었습니다 ({timeout:g}초)."
+            status = "timeout"
+        elapsed = time.perf_counter() - start_time
+        return result, {"elapsed": round(elapsed, 3), "timeout": timeout, "status": status}
+
+    async def execute_tools(self, tool_calls, mode=None):
+        """
+        여러 도구 호출을 실행합니다. parallel 모드에서는 서로 독립적인 호출을 동시에 실행합니다.
+        
+        Args:
+            tool_calls (list): {"name": ..., "arguments": ...} 형태의 도구 호출 목록
+            mode (str, optional): parallel 또는 sequential. 기본값은 TOOL_EXECUTION_MODE
+            
+        Returns:
+            list: 계획 순서대로 정렬된 (도구 이름, 실행 결과, 실행 시간 정보) 목록
+        """
+        mode = mode or TOOL_EXECUTION_MODE
+        names = [call["name"] for call in tool_calls]
+        if mode == "parallel" and len(tool_calls) > 1:
+            logger.info(f"도구 병렬 실행: {', '.join(names)}")
+            outcomes = await asyncio.gather(*[
+                self.execute_tool_async(call["name"], call.get("arguments")) for call in tool_calls
+            ])
+        else:
+            outcomes = []
+            for call in tool_calls:
+                outcomes.append(await self.execute_tool_async(call["name"], call.get("arguments")))
+        return [(name, result, timing) for name, (result, timing) in zip(names, outcomes)]
+
     def get_all_tools(self):
         """모든 도구 목록 반환"""
         return list(self.tools.values())
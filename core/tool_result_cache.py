@@ -0,0 +1,193 @@
+# core/tool_result_cache.py
+
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+import unicodedata
+from utils.cache import TTLCache
+from utils.logger import setup_logger
+from config import (
+    TOOL_RESULT_CACHE_MAX_SIZE, TOOL_RESULT_CACHE_TTLS, TOOL_RESULT_CACHE_STALE_TTL, TOOL_RESULT_CACHE_PATH
+)
+
+logger = setup_logger(__name__)
+
+def _canonical_value(value):
+    if isinstance(value, str):
+        return re.sub(r"\s+", " ", unicodedata.normalize("NFC", value)).strip().casefold()
+    if isinstance(value, dict):
+        return {str(k): _canonical_value(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_canonical_value(v) for v in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+def canonical_arguments(arguments):
+    """
+    캐시 키용 도구 인자 정규화.
+    인자 순서, None 값, 공백/대소문자/유니코드 표기 차이가 달라도 같은 호출이면 같은 문자열이 됩니다.
+    """
+    return json.dumps(_canonical_value(arguments or {}), ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+def is_cacheable(result):
+    """오류 결과(문자열 메시지 또는 error 키가 있는 dict)는 캐시하지 않습니다."""
+    if result is None or isinstance(result, str):
+        return False
+    return not (isinstance(result, dict) and "error" in result)
+
+class ToolResultCache:
+    """
+    외부 API 도구(날씨, 웹 검색 등)의 실행 결과 캐시 - 도구별 TTL, 크기 제한(LRU), 선택적 디스크(SQLite) 저장.
+    TTL이 지난 결과도 TOOL_RESULT_CACHE_STALE_TTL 동안은 'stale'로 반환하고,
+    호출자는 그 사이 백그라운드에서 결과를 다시 가져옵니다 (stale-while-revalidate).
+    """
+
+    def __init__(self, tool_ttls=None, max_size=None, stale_ttl=None, path=None):
+        """
+        도구 결과 캐시 초기화
+
+        Args:
+            tool_ttls (dict, optional): 도구 이름 -> 만료 시간(초). 목록에 없거나 0인 도구는 캐시하지 않습니다.
+            max_size (int, optional): 메모리 캐시 최대 항목 수
+            stale_ttl (float, optional): 만료 후에도 오래된 결과를 반환할 수 있는 시간(초)
+            path (str, optional): SQLite 파일 경로. 기본값은 TOOL_RESULT_CACHE_PATH (비어 있으면 디스크 캐시 미사용)
+        """
+        self.tool_ttls = TOOL_RESULT_CACHE_TTLS if tool_ttls is None else tool_ttls
+        self.stale_ttl = TOOL_RESULT_CACHE_STALE_TTL if stale_ttl is None else stale_ttl
+        self._memory = TTLCache(max_size=max_size or TOOL_RESULT_CACHE_MAX_SIZE)
+        self._lock = threading.Lock()
+        self._refreshing = set() # 백그라운드 갱신 중인 키
+        self.stats = {"hits": 0, "disk_hits": 0, "stale_hits": 0, "misses": 0, "stores": 0, "refreshes": 0}
+        self._db = None
+        path = TOOL_RESULT_CACHE_PATH if path is None else path
+        if path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS tool_results ("
+                    "tool TEXT NOT NULL, args TEXT NOT NULL, result TEXT NOT NULL, stored_at REAL NOT NULL, "
+                    "PRIMARY KEY (tool, args))"
+                )
+                self._db.commit()
+                logger.info(f"도구 결과 디스크 캐시 사용: {path}")
+            except Exception as e:
+                logger.error(f"도구 결과 디스크 캐시 초기화 오류 ({path}): {e}")
+                self._db = None
+
+    def is_enabled_for(self, tool_name):
+        return bool(self.tool_ttls.get(tool_name))
+
+    def make_key(self, tool_name, arguments):
+        return tool_name, canonical_arguments(arguments)
+
+    def _state(self, tool_name, stored_at):
+        """저장 시각 기준 상태: fresh, stale, 또는 None(만료)"""
+        age = time.time() - stored_at
+        ttl = self.tool_ttls.get(tool_name, 0)
+        if age < ttl:
+            return "fresh"
+        if age < ttl + self.stale_ttl:
+            return "stale"
+        return None
+
+    def _load_from_disk(self, key):
+        if self._db is None:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT result, stored_at FROM tool_results WHERE tool = ? AND args = ?", key
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def lookup(self, tool_name, arguments):
+        """
+        캐시된 도구 결과를 찾습니다.
+
+        Returns:
+            tuple: (결과, 상태) - 상태는 "hit", "disk_hit", "stale" 중 하나이며 없으면 (None, None)
+        """
+        if not self.is_enabled_for(tool_name):
+            return None, None
+        key = self.make_key(tool_name, arguments)
+        entry, source = self._memory.get(key), "hit"
+        if entry is None:
+            entry, source = self._load_from_disk(key), "disk_hit"
+        if entry is not None:
+            result, stored_at = entry
+            state = self._state(tool_name, stored_at)
+            if state is not None:
+                if source == "disk_hit":
+                    self._remember(key, result, stored_at)
+                status = source if state == "fresh" else "stale"
+                self.stats[{"hit": "hits", "disk_hit": "disk_hits", "stale": "stale_hits"}[status]] += 1
+                return result, status
+        self.stats["misses"] += 1
+        return None, None
+
+    def _remember(self, key, result, stored_at):
+        tool_name = key[0]
+        remaining = stored_at + self.tool_ttls.get(tool_name, 0) + self.stale_ttl - time.time()
+        if remaining > 0:
+            self._memory.set(key, (result, stored_at), ttl=remaining)
+
+    def store(self, tool_name, arguments, result):
+        """오류가 아닌 결과를 메모리(및 디스크) 캐시에 저장합니다. 저장했으면 True"""
+        if not self.is_enabled_for(tool_name) or not is_cacheable(result):
+            return False
+        key = self.make_key(tool_name, arguments)
+        stored_at = time.time()
+        self._remember(key, result, stored_at)
+        self.stats["stores"] += 1
+        if self._db is not None:
+            try:
+                payload = json.dumps(result, ensure_ascii=False)
+                with self._lock:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO tool_results (tool, args, result, stored_at) VALUES (?, ?, ?, ?)",
+                        (*key, payload, stored_at)
+                    )
+                    self._db.commit()
+            except Exception as e:
+                logger.warning(f"도구 결과 디스크 캐시 저장 실패 ({tool_name}): {e}")
+        return True
+
+    def begin_refresh(self, tool_name, arguments):
+        """stale 결과의 백그라운드 갱신을 시작할 수 있으면 True (같은 키는 한 번에 하나만 갱신)"""
+        key = self.make_key(tool_name, arguments)
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self.stats["refreshes"] += 1
+            return True
+
+    def end_refresh(self, tool_name, arguments):
+        with self._lock:
+            self._refreshing.discard(self.make_key(tool_name, arguments))
+
+    def clear(self):
+        self._memory.clear()
+        if self._db is not None:
+            with self._lock:
+                self._db.execute("DELETE FROM tool_results")
+                self._db.commit()
+
+    def get_stats(self):
+        """캐시 통계 반환"""
+        hits = self.stats["hits"] + self.stats["disk_hits"] + self.stats["stale_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "memory_size": len(self._memory),
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "tool_ttls": self.tool_ttls,
+            "disk_enabled": self._db is not None
+        }
@@ -2,22 +2,105 @@
 
 import json
 import os
-from openai import OpenAI
+import hashlib
+import asyncio
+import threading
+import contextlib
+import weakref
+import httpx
+from openai import OpenAI, AsyncOpenAI
 from config import (
     LM_STUDIO_BASE_URL, 
     LM_STUDIO_API_KEY, 
     LM_STUDIO_MODEL_NAME,
     TOOL_SELECTION_TEMPERATURE,
-    RESPONSE_TEMPERATURE
+    RESPONSE_TEMPERATURE,
+    MAX_RETRIES,
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_CONNECTIONS,
+    LLM_CONNECT_TIMEOUT,
+    LLM_REQUEST_TIMEOUT,
+    LLM_RETRY_BASE_DELAY,
+    LLM_RETRY_MAX_DELAY,
+    LLM_COALESCE_ENABLED,
+    LLM_MICRO_BATCH_ENABLED,
+    LLM_MICRO_BATCH_MAX_SIZE,
+    LLM_MICRO_BATCH_WAIT_MS,
+    LLM_MICRO_BATCH_SYSTEM_TEMPLATE,
+    LLM_MICRO_BATCH_USER_TEMPLATE
 )
 from utils.logger import setup_logger
-from utils.helpers import retry
+from utils.helpers import retry, async_retry
+from utils.coalescing import SingleFlight, MicroBatcher
+from utils.event_loop import is_background_loop, add_shutdown_hook
 
 logger = setup_logger(__name__)
 
+def _parse_function_call_message(message):
+    """
+    function_call 응답 메시지에서 도구 호출 정보를 추출합니다.
+
+    Returns:
+        dict | list | None: 함수 호출 정보 (이름과 인자), 여러 도구 목록, 또는 함수 호출이 없는 경우 None
+    """
+    # 함수 호출이 없는 경우: content에 JSON 문자열이 있을 수 있음
+    if not hasattr(message, 'function_call') or message.function_call is None:
+        # content가 JSON 문자열이면 파싱 시도
+        content = getattr(message, 'content', None)
+        if content:
+            try:
+                result = json.loads(content)
+                # dict(단일 도구) 또는 list(여러 도구) 모두 허용
+                if (isinstance(result, dict) and 'name' in result and 'arguments' in result) or isinstance(result, list):
+                    return result
+            except Exception as e:
+                logger.error(f"content JSON 파싱 오류: {e}, content: {content}")
+        return None
+    
+    # 함수 호출 정보 추출 (기존 방식)
+    function_name = message.function_call.name
+    try:
+        function_args = json.loads(message.function_call.arguments)
+    except json.JSONDecodeError:
+        logger.error(f"함수 인자 파싱 오류: {message.function_call.arguments}")
+        function_args = {}
+    
+    return {
+        "name": function_name,
+        "arguments": function_args
+    }
+
+def _request_key(kind, model, prompt, temperature, functions=None, system=None):
+    """요청 병합 키 - (요청 종류, 모델, system 프롬프트, 프롬프트, 온도, 함수 정의)의 해시"""
+    payload = json.dumps([kind, model, system, prompt, temperature, functions], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _messages(prompt, system=None):
+    """
+    chat 메시지 목록. 고정 지침(system)을 앞에, 질의마다 바뀌는 내용(prompt)을 뒤에 두어
+    모델 서버(LM Studio / llama.cpp)가 같은 접두부의 프롬프트 캐시(KV 캐시)를 재사용하도록 합니다.
+    """
+    if system:
+        return [{"role": "system", "content": system}, {"role": "user", "content": prompt}]
+    return [{"role": "user", "content": prompt}]
+
+def _single_prompt(prompt, system=None):
+    """
+    completions API(배치)용 단일 프롬프트.
+    completions API는 서버가 chat 템플릿을 적용하지 않으므로 LLM_MICRO_BATCH_*_TEMPLATE(모델의 chat 템플릿)을 직접 적용합니다.
+    """
+    text = LLM_MICRO_BATCH_SYSTEM_TEMPLATE.format(system=system) if system else ""
+    return text + LLM_MICRO_BATCH_USER_TEMPLATE.format(prompt=prompt)
+
 class LMStudioClient:
     """LM Studio API와 상호작용하는 클라이언트"""
     
+    # 진행 중인 동일 요청 병합 (모든 인스턴스/세션 공유)
+    _inflight = SingleFlight()
+    # (base_url, 모델) -> MicroBatcher (모든 인스턴스/세션 공유)
+    _batchers = {}
+    _batchers_lock = threading.Lock()
+    
     def __init__(self, base_url=None, api_key=None, model_name=None):
         """
         LM Studio 클라이언트를 초기화합니다.
@@ -36,29 +119,95 @@ class LMStudioClient:
             base_url=self.base_url,
             api_key=self.api_key
         )
+        # 비동기 스트리밍용 클라이언트 (astream_response에서 처음 필요할 때 생성, AsyncLMStudioClient는 사용하지 않음)
+        self._async_client = None
+        
+        self._batcher = self._get_batcher() if LLM_MICRO_BATCH_ENABLED else None
         
         logger.info(f"LM Studio 클라이언트 초기화: {self.model}, URL: {self.base_url}")
     
+    @property
+    def async_client(self):
+        """LMStudioClient.astream_response용 AsyncOpenAI 클라이언트 (지연 생성)"""
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(
+                base_url=self.base_url,
+                api_key=self.api_key
+            )
+        return self._async_client
+
+    def _get_batcher(self):
+        """같은 서버/모델을 쓰는 인스턴스끼리 공유하는 마이크로 배치 큐"""
+        key = (self.base_url, self.model)
+        with self._batchers_lock:
+            batcher = self._batchers.get(key)
+            if batcher is None:
+                batcher = MicroBatcher(
+                    self._run_completion_batch,
+                    max_batch_size=LLM_MICRO_BATCH_MAX_SIZE,
+                    max_wait=LLM_MICRO_BATCH_WAIT_MS / 1000
+                )
+                self._batchers[key] = batcher
+            return batcher
+    
     @retry(max_retries=3)
-    def generate_response(self, prompt, temperature=None):
+    def _run_completion_batch(self, temperature, prompts):
+        """
+        여러 프롬프트를 completions API 한 번으로 생성합니다 (prompt 목록을 지원하는 서버 전용).
+        
+        Returns:
+            list: 프롬프트 순서대로 정렬된 생성 텍스트
+        """
+        logger.info(f"LM Studio 배치 응답 생성: {len(prompts)}개 프롬프트, 온도: {temperature}")
+        response = self.client.completions.create(
+            model=self.model,
+            prompt=prompts,
+            temperature=temperature
+        )
+        texts = [None] * len(prompts)
+        for choice in response.choices:
+            index = getattr(choice, "index", None)
+            if index is None or not 0 <= index < len(prompts):
+                raise RuntimeError(f"배치 응답의 choice index가 올바르지 않습니다: {index}")
+            texts[index] = choice.text
+        missing = [i for i, text in enumerate(texts) if text is None]
+        if missing:
+            raise RuntimeError(f"배치 응답에 일부 프롬프트의 결과가 없습니다: {missing}")
+        return texts
+    
+    def _should_coalesce(self, temperature):
+        """온도 0인 호출만 결과가 결정적이므로 병합합니다."""
+        return LLM_COALESCE_ENABLED and temperature == 0
+    
+    def generate_response(self, prompt, temperature=None, system=None):
         """
         LM Studio 모델을 사용하여 응답을 생성합니다.
+        온도 0이면 진행 중인 같은 요청과 병합하고, 병합할 수 없는 요청은 마이크로 배치가 켜져 있으면 다른 요청과 묶어 보냅니다.
         
         Args:
             prompt (str): 모델에 전달할 프롬프트
             temperature (float, optional): 응답의 온도(창의성). 기본값은 환경변수에서 가져옵니다.
+            system (str, optional): 고정 지침 system 메시지 (요청마다 같은 접두부로 앞에 전송)
         
         Returns:
             str: 생성된 응답
         """
         if temperature is None:
             temperature = RESPONSE_TEMPERATURE
-            
+        if self._should_coalesce(temperature):
+            key = _request_key("generate", self.model, prompt, temperature, system=system)
+            return self._inflight.do(key, lambda: self._generate_once(prompt, temperature, system))
+        if self._batcher:
+            return self._batcher.submit(temperature, _single_prompt(prompt, system)).result()
+        return self._generate_once(prompt, temperature, system)
+    
+    @retry(max_retries=3)
+    def _generate_once(self, prompt, temperature, system=None):
         logger.info(f"LM Studio 응답 생성, 온도: {temperature}")
         try:
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[{"role": "user", "content": prompt}],
+                messages=_messages(prompt, system),
                 temperature=temperature
             )
             return response.choices[0].message.content
@@ -67,63 +216,121 @@ class LMStudioClient:
             raise
     
     @retry(max_retries=3)
-    def function_call(self, prompt, functions, temperature=None):
+    def _create_stream(self, prompt, temperature, system=None):
+        """스트리밍 요청 생성 (연결 단계만 재시도, 이미 전달된 토큰은 재시도하지 않음)"""
+        return self.client.chat.completions.create(
+            model=self.model,
+            messages=_messages(prompt, system),
+            temperature=temperature,
+            stream=True
+        )
+
+    def stream_response(self, prompt, temperature=None, system=None):
+        """
+        LM Studio 모델의 응답을 토큰 단위로 스트리밍합니다.
+        
+        Args:
+            prompt (str): 모델에 전달할 프롬프트
+            temperature (float, optional): 응답의 온도(창의성). 기본값은 환경변수에서 가져옵니다.
+            system (str, optional): 고정 지침 system 메시지 (요청마다 같은 접두부로 앞에 전송)
+        
+        Yields:
+            str: 생성된 응답 조각(delta)
+        """
+        if temperature is None:
+            temperature = RESPONSE_TEMPERATURE
+
+        logger.info(f"LM Studio 스트리밍 응답 생성, 온도: {temperature}")
+        try:
+            stream = self._create_stream(prompt, temperature, system)
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+        except Exception as e:
+            logger.error(f"LM Studio 스트리밍 응답 생성 오류: {str(e)}")
+            raise
+
+    async def astream_response(self, prompt, temperature=None, system=None):
+        """
+        LM Studio 모델의 응답을 비동기로 토큰 단위 스트리밍합니다.
+        
+        Args:
+            prompt (str): 모델에 전달할 프롬프트
+            temperature (float, optional): 응답의 온도(창의성). 기본값은 환경변수에서 가져옵니다.
+            system (str, optional): 고정 지침 system 메시지 (요청마다 같은 접두부로 앞에 전송)
+        
+        Yields:
+            str: 생성된 응답 조각(delta)
+        """
+        if temperature is None:
+            temperature = RESPONSE_TEMPERATURE
+
+        logger.info(f"LM Studio 비동기 스트리밍 응답 생성, 온도: {temperature}")
+        try:
+            stream = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=_messages(prompt, system),
+                temperature=temperature,
+                stream=True
+            )
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+        except Exception as e:
+            logger.error(f"LM Studio 비동기 스트리밍 응답 생성 오류: {str(e)}")
+            raise
+    
+    def function_call(self, prompt, functions, temperature=None, system=None):
         """
         LM Studio 모델을 사용하여 함수 호출을 실행합니다.
+        온도 0이면 (모델, 프롬프트, 온도, 함수 정의)가 같은 진행 중 요청과 병합해 모델 서버에 한 번만 보냅니다.
         
         Args:
             prompt (str): 모델에 전달할 프롬프트
             functions (list): 사용 가능한 함수 정의 목록
             temperature (float, optional): 응답의 온도(창의성). 기본값은 환경변수에서 가져옵니다.
+            system (str, optional): 고정 지침 system 메시지 (요청마다 같은 접두부로 앞에 전송)
         
         Returns:
             dict or None: 함수 호출 정보 (이름과 인자) 또는 함수 호출이 없는 경우 None
         """
         if temperature is None:
             temperature = TOOL_SELECTION_TEMPERATURE
-            
+        if self._should_coalesce(temperature):
+            key = _request_key("function_call", self.model, prompt, temperature, functions, system)
+            return self._inflight.do(key, lambda: self._function_call_once(prompt, functions, temperature, system))
+        return self._function_call_once(prompt, functions, temperature, system)
+    
+    @retry(max_retries=3)
+    def _function_call_once(self, prompt, functions, temperature, system=None):
         logger.info(f"LM Studio 함수 호출, 온도: {temperature}")
         try:
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[{"role": "user", "content": prompt}],
+                messages=_messages(prompt, system),
                 functions=functions,
                 function_call="auto",
                 temperature=temperature
             )
             
-            message = response.choices[0].message
-            
-            # 함수 호출이 없는 경우: content에 JSON 문자열이 있을 수 있음
-            if not hasattr(message, 'function_call') or message.function_call is None:
-                # content가 JSON 문자열이면 파싱 시도
-                content = getattr(message, 'content', None)
-                if content:
-                    try:
-                        result = json.loads(content)
-                        # dict(단일 도구) 또는 list(여러 도구) 모두 허용
-                        if (isinstance(result, dict) and 'name' in result and 'arguments' in result) or isinstance(result, list):
-                            return result
-                    except Exception as e:
-                        logger.error(f"content JSON 파싱 오류: {e}, content: {content}")
-                return None
-            
-            # 함수 호출 정보 추출 (기존 방식)
-            function_name = message.function_call.name
-            try:
-                function_args = json.loads(message.function_call.arguments)
-            except json.JSONDecodeError:
-                logger.error(f"함수 인자 파싱 오류: {message.function_call.arguments}")
-                function_args = {}
-            
-            return {
-                "name": function_name,
-                "arguments": function_args
-            }
+            return _parse_function_call_message(response.choices[0].message)
         except Exception as e:
             logger.error(f"LM Studio 함수 호출 오류: {str(e)}")
             raise
             
+    def get_coalescing_stats(self):
+        """요청 병합/마이크로 배치 통계 반환"""
+        return {
+            "singleflight": self._inflight.get_stats(),
+            "micro_batch": self._batcher.get_stats() if self._batcher else None
+        }
+    
     def get_model_info(self):
         """모델 정보 반환"""
         return {
@@ -138,4 +345,199 @@ class LMStudioClient:
             self.client.models.list()
             return True
         except Exception:
-            return False
\ No newline at end of file
+            return False
+
+class _ConcurrencyLimiter:
+    """
+    비동기 동시 요청 제한.
+    모든 비동기 LLM 호출은 공유 백그라운드 루프(utils.event_loop)에서 실행되므로 그 루프의 asyncio.Semaphore 하나로 제한합니다.
+    다른 루프(asyncio.run을 쓰는 스크립트 등)에서는 asyncio.Semaphore를 루프 간에 공유할 수 없으므로 루프마다 따로 만듭니다.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._semaphores = weakref.WeakKeyDictionary() # 이벤트 루프 -> asyncio.Semaphore
+        self.active = 0
+        self.waits = 0
+
+    def _semaphore(self):
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            # 실행 중인 루프 안에서 만들어 그 루프에 묶임
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.limit)
+        return semaphore
+
+    async def __aenter__(self):
+        semaphore = self._semaphore()
+        if semaphore.locked():
+            self.waits += 1
+        await semaphore.acquire()
+        self.active += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.active -= 1
+        self._semaphore().release()
+        return False
+
+
+class AsyncLMStudioClient(LMStudioClient):
+    """
+    비동기 OpenAI 클라이언트 기반 LM Studio 클라이언트.
+    공유 백그라운드 루프(utils.event_loop)에서 keep-alive 연결 풀 하나를 재사용하고, 프로세스 전체의 동시 요청 수를 LLM_MAX_CONCURRENCY로 제한하며,
+    실패 시 asyncio.sleep 기반 지수 백오프(+지터)로 재시도합니다. 동기 메서드는 LMStudioClient와 같습니다.
+    """
+
+    # 로컬 모델 서버로 보내는 동시 요청 제한 (모든 인스턴스 공유)
+    _limiter = _ConcurrencyLimiter(LLM_MAX_CONCURRENCY)
+
+    def __init__(self, base_url=None, api_key=None, model_name=None):
+        super().__init__(base_url, api_key, model_name)
+        self._shared_client = None # 공유 백그라운드 루프 전용 AsyncOpenAI (프로세스 종료 시 닫힘)
+
+    def _new_async_client(self):
+        """
+        AsyncOpenAI 클라이언트 생성 (keep-alive 연결 풀 포함).
+        재시도는 async_retry가 담당하므로 SDK 자체 재시도는 끕니다.
+        """
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS),
+            timeout=httpx.Timeout(LLM_REQUEST_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+        )
+        return AsyncOpenAI(base_url=self.base_url, api_key=self.api_key, http_client=http_client, max_retries=0)
+
+    @contextlib.asynccontextmanager
+    async def _client_scope(self):
+        """
+        요청에 사용할 AsyncOpenAI 클라이언트.
+        httpx 연결 풀은 만들어진 루프에서만 사용할 수 있으므로, 공유 백그라운드 루프에서는 프로세스 동안 클라이언트 하나를 재사용하고
+        그 밖의 루프(asyncio.run 등)에서는 요청마다 만든 클라이언트를 요청이 끝나면 닫습니다 (루프가 사라진 뒤 소켓이 남지 않도록).
+        """
+        if is_background_loop():
+            if self._shared_client is None:
+                self._shared_client = self._new_async_client()
+                add_shutdown_hook(self._shared_client.close)
+            yield self._shared_client
+            return
+        client = self._new_async_client()
+        try:
+            yield client
+        finally:
+            await client.close()
+
+    @async_retry(max_retries=MAX_RETRIES, base_delay=LLM_RETRY_BASE_DELAY, max_delay=LLM_RETRY_MAX_DELAY)
+    async def _acreate(self, **kwargs):
+        async with self._limiter, self._client_scope() as client:
+            return await client.chat.completions.create(model=self.model, **kwargs)
+
+    async def agenerate_response(self, prompt, temperature=None, system=None):
+        """
+        generate_response의 비동기 버전
+
+        Args:
+            prompt (str): 모델에 전달할 프롬프트
+            temperature (float, optional): 응답의 온도(창의성). 기본값은 환경변수에서 가져옵니다.
+            system (str, optional): 고정 지침 system 메시지 (요청마다 같은 접두부로 앞에 전송)
+
+        Returns:
+            str: 생성된 응답
+        """
+        if temperature is None:
+            temperature = RESPONSE_TEMPERATURE
+        if self._should_coalesce(temperature):
+            key = _request_key("generate", self.model, prompt, temperature, system=system)
+            return await self._inflight.ado(key, lambda: self._agenerate_once(prompt, temperature, system))
+        if self._batcher:
+            return await asyncio.wrap_future(self._batcher.submit(temperature, _single_prompt(prompt, system)))
+        return await self._agenerate_once(prompt, temperature, system)
+
+    async def _agenerate_once(self, prompt, temperature, system=None):
+        logger.info(f"LM Studio 비동기 응답 생성, 온도: {temperature}")
+        try:
+            response = await self._acreate(
+                messages=_messages(prompt, system),
+                temperature=temperature
+            )
+            return response.choices[0].message.content
+        except Exception as e:
+            logger.error(f"LM Studio 비동기 응답 생성 오류: {str(e)}")
+            raise
+
+    async def afunction_call(self, prompt, functions, temperature=None, system=None):
+        """
+        function_call의 비동기 버전
+
+        Args:
+            prompt (str): 모델에 전달할 프롬프트
+            functions (list): 사용 가능한 함수 정의 목록
+            temperature (float, optional): 응답의 온도(창의성). 기본값은 환경변수에서 가져옵니다.
+            system (str, optional): 고정 지침 system 메시지 (요청마다 같은 접두부로 앞에 전송)
+
+        Returns:
+            dict or None: 함수 호출 정보 (이름과 인자) 또는 함수 호출이 없는 경우 None
+        """
+        if temperature is None:
+            temperature = TOOL_SELECTION_TEMPERATURE
+        if self._should_coalesce(temperature):
+            key = _request_key("function_call", self.model, prompt, temperature, functions, system)
+            return await self._inflight.ado(key, lambda: self._afunction_call_once(prompt, functions, temperature, system))
+        return await self._afunction_call_once(prompt, functions, temperature, system)
+
+    async def _afunction_call_once(self, prompt, functions, temperature, system=None):
+        logger.info(f"LM Studio 비동기 함수 호출, 온도: {temperature}")
+        try:
+            response = await self._acreate(
+                messages=_messages(prompt, system),
+                functions=functions,
+                function_call="auto",
+                temperature=temperature
+            )
+            return _parse_function_call_message(response.choices[0].message)
+        except Exception as e:
+            logger.error(f"LM Studio 비동기 함수 호출 오류: {str(e)}")
+            raise
+
+    @async_retry(max_retries=MAX_RETRIES, base_delay=LLM_RETRY_BASE_DELAY, max_delay=LLM_RETRY_MAX_DELAY)
+    async def _acreate_stream(self, client, prompt, temperature, system=None):
+        """스트리밍 요청 생성 (연결 단계만 재시도, 이미 전달된 토큰은 재시도하지 않음)"""
+        return await client.chat.completions.create(
+            model=self.model,
+            messages=_messages(prompt, system),
+            temperature=temperature,
+            stream=True
+        )
+
+    async def astream_response(self, prompt, temperature=None, system=None):
+        """
+        LM Studio 모델의 응답을 비동기로 토큰 단위 스트리밍합니다.
+        스트림이 끝날 때까지 동시 요청 슬롯 하나를 점유합니다.
+
+        Args:
+            prompt (str): 모델에 전달할 프롬프트
+            temperature (float, optional): 응답의 온도(창의성). 기본값은 환경변수에서 가져옵니다.
+            system (str, optional): 고정 지침 system 메시지 (요청마다 같은 접두부로 앞에 전송)
+
+        Yields:
+            str: 생성된 응답 조각(delta)
+        """
+        if temperature is None:
+            temperature = RESPONSE_TEMPERATURE
+
+        logger.info(f"LM Studio 비동기 스트리밍 응답 생성, 온도: {temperature}")
+        try:
+            async with self._limiter, self._client_scope() as client:
+                stream = await self._acreate_stream(client, prompt, temperature, system)
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        yield delta
+        except Exception as e:
+            logger.error(f"LM Studio 비동기 스트리밍 응답 생성 오류: {str(e)}")
+            raise
+
+    def get_concurrency_stats(self):
+        """동시 요청 제한 상태 반환"""
+        return {"limit": self._limiter.limit, "active": self._limiter.active, "waits": self._limiter.waits}
@@ -0,0 +1,184 @@
+# storage/embedding_cache.py
+
+import os
+import re
+import time
+import sqlite3
+import threading
+import unicodedata
+import numpy as np
+from utils.cache import TTLCache
+from utils.logger import setup_logger
+from config import EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_PATH
+
+logger = setup_logger(__name__)
+
+class EmbeddingCache:
+    """
+    질의 임베딩 캐시 - 프로세스 내 LRU + 선택적 디스크(SQLite) 영구 저장.
+    키는 (임베딩 모델 이름, 정규화된 텍스트)이며 벡터는 float32 바이트로 저장합니다.
+    """
+
+    # 적중 횟수를 디스크에 반영하는 주기 (적중 N회마다 한 번에 기록)
+    HIT_FLUSH_INTERVAL = 50
+
+    def __init__(self, model_name, max_size=None, path=None):
+        """
+        임베딩 캐시 초기화
+
+        Args:
+            model_name (str): 임베딩 모델 이름 (모델이 바뀌면 다른 키 공간을 사용)
+            max_size (int, optional): 메모리 캐시 최대 항목 수. 기본값은 EMBEDDING_CACHE_SIZE
+            path (str, optional): SQLite 파일 경로. 기본값은 EMBEDDING_CACHE_PATH (비어 있으면 디스크 캐시 미사용)
+        """
+        self.model_name = model_name
+        self._memory = TTLCache(max_size=max_size or EMBEDDING_CACHE_SIZE)
+        self._lock = threading.Lock()
+        self._pending_hits = {}
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "warmed": 0}
+        self._db = None
+        path = EMBEDDING_CACHE_PATH if path is None else path
+        if path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings ("
+                    "model TEXT NOT NULL, text TEXT NOT NULL, dim INTEGER NOT NULL, vector BLOB NOT NULL, "
+                    "hits INTEGER NOT NULL DEFAULT 0, last_used REAL NOT NULL, PRIMARY KEY (model, text))"
+                )
+                self._db.commit()
+                logger.info(f"임베딩 디스크 캐시 사용: {path}")
+            except Exception as e:
+                logger.error(f"임베딩 디스크 캐시 초기화 오류 ({path}): {e}")
+                self._db = None
+
+    @staticmethod
+    def normalize(text):
+        """캐시 키용 텍스트 정규화 (유니코드 NFC, 연속 공백 축약)"""
+        return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text or "")).strip()
+
+    def _record_hit(self, text):
+        if self._db is None:
+            return
+        with self._lock:
+            self._pending_hits[text] = self._pending_hits.get(text, 0) + 1
+            if sum(self._pending_hits.values()) >= self.HIT_FLUSH_INTERVAL:
+                self._flush_hits()
+
+    def _flush_hits(self):
+        """누적된 적중 횟수를 디스크에 반영 (self._lock 보유 상태에서 호출)"""
+        if not self._pending_hits:
+            return
+        now = time.time()
+        try:
+            self._db.executemany(
+                "UPDATE embeddings SET hits = hits + ?, last_used = ? WHERE model = ? AND text = ?",
+                [(count, now, self.model_name, text) for text, count in self._pending_hits.items()]
+            )
+            self._db.commit()
+        except Exception as e:
+            logger.warning(f"임베딩 캐시 적중 횟수 기록 실패: {e}")
+        self._pending_hits.clear()
+
+    def get(self, text):
+        """캐시된 임베딩(np.float32 배열)을 반환합니다. 없으면 None."""
+        key = self.normalize(text)
+        vector = self._memory.get(key)
+        if vector is not None:
+            self.stats["memory_hits"] += 1
+            self._record_hit(key)
+            return vector
+        if self._db is not None:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT vector FROM embeddings WHERE model = ? AND text = ?", (self.model_name, key)
+                ).fetchone()
+            if row is not None:
+                vector = np.frombuffer(row[0], dtype=np.float32)
+                self._memory.set(key, vector)
+                self.stats["disk_hits"] += 1
+                self._record_hit(key)
+                return vector
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, text, vector):
+        """임베딩을 메모리(및 디스크) 캐시에 저장합니다."""
+        key = self.normalize(text)
+        vector = np.asarray(vector, dtype=np.float32)
+        self._memory.set(key, vector)
+        if self._db is not None:
+            with self._lock:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO embeddings (model, text, dim, vector, hits, last_used) "
+                        "VALUES (?, ?, ?, ?, COALESCE((SELECT hits FROM embeddings WHERE model = ? AND text = ?), 0), ?)",
+                        (self.model_name, key, int(vector.shape[0]), vector.tobytes(), self.model_name, key, time.time())
+                    )
+                    self._db.commit()
+                except Exception as e:
+                    logger.warning(f"임베딩 디스크 캐시 저장 실패: {e}")
+        return vector
+
+    def get_or_compute(self, text, compute_fn):
+        """
+        캐시에서 임베딩을 찾고, 없으면 compute_fn(정규화된 텍스트)으로 계산 후 저장합니다.
+
+        Returns:
+            np.ndarray: float32 임베딩 벡터
+        """
+        vector = self.get(text)
+        if vector is None:
+            vector = self.put(text, compute_fn(self.normalize(text)))
+        return vector
+
+    def warm_up(self, limit):
+        """
+        디스크 캐시에서 가장 자주 사용된 질의 임베딩을 메모리로 미리 불러옵니다.
+
+        Args:
+            limit (int): 불러올 최대 항목 수
+
+        Returns:
+            int: 불러온 항목 수
+        """
+        if self._db is None or limit <= 0:
+            return 0
+        limit = min(limit, self._memory.max_size)
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT text, vector FROM embeddings WHERE model = ? ORDER BY hits DESC, last_used DESC LIMIT ?",
+                (self.model_name, limit)
+            ).fetchall()
+        # 빈도가 낮은 항목부터 넣어 LRU 순서상 자주 쓰는 항목이 가장 나중에 방출되도록 합니다.
+        for text, blob in reversed(rows):
+            self._memory.set(text, np.frombuffer(blob, dtype=np.float32))
+        self.stats["warmed"] += len(rows)
+        logger.info(f"임베딩 캐시 워밍업: {len(rows)}개 질의 임베딩 로드")
+        return len(rows)
+
+    def flush(self):
+        """대기 중인 적중 횟수를 디스크에 기록합니다."""
+        if self._db is not None:
+            with self._lock:
+                self._flush_hits()
+
+    def get_stats(self):
+        """캐시 통계 반환"""
+        lookups = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        stats = {
+            **self.stats,
+            "model": self.model_name,
+            "memory_size": len(self._memory),
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "disk_enabled": self._db is not None
+        }
+        if self._db is not None:
+            with self._lock:
+                stats["disk_size"] = self._db.execute(
+                    "SELECT COUNT(*) FROM embeddings WHERE model = ?", (self.model_name,)
+                ).fetchone()[0]
+        return stats
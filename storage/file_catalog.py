@@ -0,0 +1,216 @@
+# storage/file_catalog.py
+
+import re
+import time
+import threading
+import unicodedata
+from collections import defaultdict
+from utils.logger import setup_logger
+from config import FILE_CATALOG_REFRESH_INTERVAL, FILE_CATALOG_FUZZY_THRESHOLD
+
+logger = setup_logger(__name__)
+
+# 색인에 사용할 n-gram 길이
+NGRAM = 3
+
+def normalize_name(text):
+    """파일명 비교용 정규화 (유니코드 NFC, 대소문자 무시)"""
+    return unicodedata.normalize("NFC", text or "").casefold().strip()
+
+def compact_name(text):
+    """유사 검색용 정규화 - 공백/구분자 제거 ('배수지 수위_데이터' → '배수지수위데이터')"""
+    return re.sub(r"[\s_\-\.]+", "", normalize_name(text))
+
+def ngrams(text, n=NGRAM):
+    """문자 n-gram 집합. 텍스트가 n보다 짧으면 텍스트 자체를 하나의 gram으로 사용"""
+    if len(text) < n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+class FileCatalog:
+    """
+    GridFS 파일 목록(fs.files 메타데이터)의 인메모리 색인.
+    파일명 n-gram 역색인으로 대소문자 무시 부분 일치 및 유사(오타/띄어쓰기) 검색을 제공하며,
+    MongoDBStorage의 파일 저장/삭제 이벤트로 갱신됩니다.
+    """
+
+    PROJECTION = {"filename": 1, "length": 1, "uploadDate": 1, "metadata": 1}
+
+    def __init__(self, files_collection, refresh_interval=None):
+        """
+        파일 카탈로그 초기화 (목록은 첫 조회 시 로드)
+
+        Args:
+            files_collection: GridFS 파일 메타데이터 컬렉션 (fs.files)
+            refresh_interval (float, optional): 전체 목록을 다시 읽는 주기(초). 0이면 이벤트로만 갱신
+        """
+        self.files_collection = files_collection
+        self.refresh_interval = FILE_CATALOG_REFRESH_INTERVAL if refresh_interval is None else refresh_interval
+        self._lock = threading.RLock()
+        self._files = None # 파일 ID -> 파일 정보
+        self._by_name = {} # 정규화된 파일명 -> 파일 ID 목록
+        self._postings = defaultdict(set) # n-gram -> 파일 ID 집합 (정규화된 파일명 기준)
+        self._compact_grams = {} # 파일 ID -> 유사 검색용 n-gram 집합
+        self._loaded_at = 0.0
+
+    # ---- 색인 관리 ----
+
+    def _index(self, doc):
+        file_id = str(doc["_id"])
+        info = {
+            "_id": file_id,
+            "filename": doc.get("filename"),
+            "length": doc.get("length", 0),
+            "uploadDate": doc.get("uploadDate"),
+            "metadata": doc.get("metadata") or {}
+        }
+        self._files[file_id] = info
+        name = normalize_name(info["filename"])
+        self._by_name.setdefault(name, []).append(file_id)
+        for gram in ngrams(name):
+            self._postings[gram].add(file_id)
+        self._compact_grams[file_id] = ngrams(compact_name(info["filename"]))
+
+    def _unindex(self, file_id):
+        info = self._files.pop(file_id, None)
+        if info is None:
+            return
+        name = normalize_name(info["filename"])
+        ids = self._by_name.get(name, [])
+        if file_id in ids:
+            ids.remove(file_id)
+        if not ids:
+            self._by_name.pop(name, None)
+        for gram in ngrams(name):
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.discard(file_id)
+                if not postings:
+                    del self._postings[gram]
+        self._compact_grams.pop(file_id, None)
+
+    def refresh(self):
+        """fs.files에서 전체 목록을 다시 읽어 색인을 재구성합니다."""
+        start_time = time.perf_counter()
+        docs = list(self.files_collection.find({}, self.PROJECTION).sort("uploadDate", 1))
+        with self._lock:
+            self._files = {}
+            self._by_name = {}
+            self._postings = defaultdict(set)
+            self._compact_grams = {}
+            for doc in docs:
+                self._index(doc)
+            self._loaded_at = time.time()
+        logger.info(f"파일 카탈로그 로드: {len(docs)}개 파일 ({(time.perf_counter() - start_time) * 1000:.1f} ms)")
+
+    def _ensure_loaded(self):
+        with self._lock:
+            stale = self.refresh_interval and time.time() - self._loaded_at > self.refresh_interval
+            if self._files is None or stale:
+                self.refresh()
+
+    def invalidate(self):
+        """색인을 비워 다음 조회 때 다시 로드하도록 합니다."""
+        with self._lock:
+            self._files = None
+
+    def on_corpus_change(self, event, filename):
+        """MongoDBStorage 파일 저장/삭제 이벤트 리스너 - 해당 파일만 색인에 반영"""
+        with self._lock:
+            if self._files is None:
+                return
+            try:
+                for file_id in list(self._by_name.get(normalize_name(filename), [])):
+                    self._unindex(file_id)
+                if event == "save":
+                    for doc in self.files_collection.find({"filename": filename}, self.PROJECTION):
+                        self._index(doc)
+            except Exception as e:
+                logger.warning(f"파일 카탈로그 갱신 실패, 다음 조회 때 전체 로드: {e}")
+                self._files = None
+
+    # ---- 조회 ----
+
+    def all(self):
+        """전체 파일 정보 목록 (업로드 순)"""
+        self._ensure_loaded()
+        with self._lock:
+            return list(self._files.values())
+
+    def get(self, filename):
+        """파일명 정확 일치(대소문자 무시) 조회. 없으면 None"""
+        self._ensure_loaded()
+        with self._lock:
+            ids = self._by_name.get(normalize_name(filename))
+            return self._files[ids[-1]] if ids else None
+
+    def get_by_id(self, file_id):
+        """파일 ID로 조회. 없으면 None"""
+        self._ensure_loaded()
+        with self._lock:
+            return self._files.get(str(file_id))
+
+    def search(self, text):
+        """
+        파일명 부분 일치 검색 (대소문자 무시).
+        n-gram 역색인으로 후보를 좁힌 뒤 실제 포함 여부를 확인합니다.
+
+        Returns:
+            list: 일치하는 파일 정보 목록
+        """
+        self._ensure_loaded()
+        needle = normalize_name(text)
+        if not needle:
+            return []
+        with self._lock:
+            if len(needle) < NGRAM:
+                candidates = self._files.keys()
+            else:
+                grams = sorted(ngrams(needle), key=lambda g: len(self._postings.get(g, ())))
+                candidates = set(self._postings.get(grams[0], ()))
+                for gram in grams[1:]:
+                    candidates &= self._postings.get(gram, set())
+                    if not candidates:
+                        break
+            return [
+                self._files[file_id] for file_id in candidates
+                if needle in normalize_name(self._files[file_id]["filename"])
+            ]
+
+    def fuzzy(self, text, limit=5, threshold=None):
+        """
+        파일명 유사 검색 (공백/구분자 무시, n-gram Dice 계수).
+
+        Returns:
+            list: (파일 정보, 유사도) 목록 - 유사도 내림차순
+        """
+        self._ensure_loaded()
+        threshold = FILE_CATALOG_FUZZY_THRESHOLD if threshold is None else threshold
+        query_grams = ngrams(compact_name(text))
+        if not query_grams:
+            return []
+        with self._lock:
+            scored = []
+            for file_id, grams in self._compact_grams.items():
+                if not grams:
+                    continue
+                overlap = len(query_grams & grams)
+                if not overlap:
+                    continue
+                # 질의가 파일명의 일부인 경우가 많으므로 질의 쪽 비중을 더 둔 Dice 계수
+                score = max(2 * overlap / (len(query_grams) + len(grams)), overlap / len(query_grams) * 0.9)
+                if score >= threshold:
+                    scored.append((self._files[file_id], round(score, 3)))
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:limit]
+
+    def find(self, text):
+        """부분 일치 결과가 있으면 그 결과를, 없으면 유사 검색 결과를 반환합니다."""
+        matches = self.search(text)
+        if matches:
+            return matches
+        return [info for info, _ in self.fuzzy(text)]
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._files)
@@ -0,0 +1,98 @@
+# storage/gridfs_reader.py
+
+import io
+
+class GridFSReader(io.RawIOBase):
+    """
+    GridFS 파일을 저장된 청크 단위로 읽는 파일 객체 (바이트 범위 지원).
+    read()/readinto()/seek()를 지원하므로 shutil.copyfileobj, st.download_button 등에 그대로 전달할 수 있고,
+    한 번에 GridFS 청크 하나(기본 255KB)만 메모리에 유지합니다.
+    """
+
+    def __init__(self, grid_out, start=0, end=None):
+        """
+        Args:
+            grid_out (gridfs.GridOut): 읽을 GridFS 파일
+            start (int): 범위 시작 바이트 (포함)
+            end (int, optional): 범위 끝 바이트 (미포함). None이면 파일 끝
+        """
+        super().__init__()
+        self._grid_out = grid_out
+        self.file_id = grid_out._id
+        self.filename = grid_out.filename
+        self.file_length = grid_out.length
+        self.start = min(max(start, 0), self.file_length)
+        self.end = self.file_length if end is None else min(max(end, self.start), self.file_length)
+        self._pos = self.start # 파일 기준 절대 위치
+        self._buffer = memoryview(b"") # 현재 GridFS 청크의 남은 부분
+        self._grid_out.seek(self.start)
+
+    def __len__(self):
+        return self.end - self.start
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        """범위 시작 기준 현재 위치"""
+        return self._pos - self.start
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        """범위 시작 기준으로 위치 이동"""
+        if whence == io.SEEK_SET:
+            target = self.start + offset
+        elif whence == io.SEEK_CUR:
+            target = self._pos + offset
+        elif whence == io.SEEK_END:
+            target = self.end + offset
+        else:
+            raise ValueError(f"지원하지 않는 whence 값: {whence}")
+        target = min(max(target, self.start), self.end)
+        if target != self._pos:
+            self._pos = target
+            self._buffer = memoryview(b"")
+            self._grid_out.seek(target)
+        return self.tell()
+
+    def _fill(self):
+        """현재 위치부터 GridFS 청크 끝까지 읽어 버퍼를 채움 (범위 끝에서 잘라냄)"""
+        if not self._buffer and self._pos < self.end:
+            data = self._grid_out.readchunk()
+            self._buffer = memoryview(data)[:self.end - self._pos]
+        return self._buffer
+
+    def readinto(self, b):
+        """호출자 버퍼에 직접 복사합니다. 읽은 바이트 수를 반환 (범위 끝이면 0)"""
+        target = memoryview(b).cast("B")
+        written = 0
+        while written < len(target):
+            buffer = self._fill()
+            if not buffer:
+                break
+            n = min(len(buffer), len(target) - written)
+            target[written:written + n] = buffer[:n]
+            self._buffer = buffer[n:]
+            self._pos += n
+            written += n
+        return written
+
+    def readall(self):
+        return b"".join(self.iter_chunks())
+
+    def iter_chunks(self):
+        """범위 내 내용을 GridFS 청크 단위 bytes로 순서대로 반환"""
+        while True:
+            buffer = self._fill()
+            if not buffer:
+                return
+            self._buffer = memoryview(b"")
+            self._pos += len(buffer)
+            yield buffer.tobytes()
+
+    def close(self):
+        if not self.closed:
+            self._grid_out.close()
+        super().close()
@@ -0,0 +1,241 @@
+# storage/ingestion_pipeline.py
+
+import time
+import hashlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from utils.cache import TTLCache
+from utils.logger import setup_logger
+from config import (
+    CHUNK_SIZE, CHUNK_OVERLAP, INGEST_BATCH_SIZE, INGEST_INSERT_BATCH_SIZE,
+    INGEST_MAX_WORKERS, INGEST_QUEUE_SIZE, KEYBERT_PROCESS_MIN_CHUNKS, EMBEDDING_MODEL_NAME
+)
+
+logger = setup_logger(__name__)
+
+def content_hash(data):
+    """파일/청크 내용의 SHA-256 (문자열은 UTF-8로 인코딩)"""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+class IngestionPipeline:
+    """
+    파일 색인 파이프라인: load → split → embed → tag → write
+
+    - load/split: 로더의 lazy_load()로 페이지 단위로 읽으면서 바로 청크로 분할합니다.
+    - embed/tag: 청크 배치마다 임베딩과 키워드 태깅을 워커 풀에서 동시에 실행합니다.
+      분할된 청크가 KEYBERT_PROCESS_MIN_CHUNKS개를 넘는 큰 파일은 태깅을 프로세스 풀에서 처리합니다.
+    - write: 완료된 배치를 순서대로 모아 insert_many로 나누어 기록합니다.
+      로컬 벡터 인덱스는 배치마다가 아니라 실행이 끝날 때 한 번에 추가합니다.
+    청크마다 내용 해시(metadata.chunk_hash)를 저장하고, 같은 해시의 청크가 이미 색인되어 있으면
+    (다른 파일이든 같은 파일의 이전 버전이든) 임베딩과 태그를 다시 계산하지 않고 재사용합니다.
+    동시에 처리 중인 배치 수는 queue_size로 제한되어 전체 청크/임베딩을 한꺼번에 메모리에 들고 있지 않습니다.
+    진행 이벤트 콜백은 항상 run()을 호출한 스레드에서 실행되므로 Streamlit 위젯을 직접 갱신해도 됩니다.
+    """
+
+    # 한 번의 실행 안에서 반복되는 청크를 찾기 위해 기억할 최근 청크 수
+    RECENT_CHUNK_CACHE_SIZE = 512
+
+    def __init__(self, embedding_model, vector_collection, tagger=None, local_vector_store=None,
+                 batch_size=None, insert_batch_size=None, max_workers=None, queue_size=None,
+                 progress_callback=None, reuse_existing=True):
+        """
+        파이프라인 초기화
+
+        Args:
+            embedding_model: embed_documents(texts)를 제공하는 임베딩 모델
+            vector_collection: 청크 문서를 저장할 MongoDB 컬렉션
+            tagger (KeywordTagger, optional): 태그 추출기. None이면 태그를 비워 둡니다.
+            local_vector_store (LocalVectorStore, optional): 함께 갱신할 로컬 벡터 인덱스
+            batch_size (int, optional): 임베딩/태깅 배치 크기 (청크 수)
+            insert_batch_size (int, optional): insert_many 한 번에 기록할 청크 수
+            max_workers (int, optional): 임베딩/태깅 워커 스레드 수
+            queue_size (int, optional): 동시에 처리 중일 수 있는 최대 배치 수
+            progress_callback (callable, optional): 진행 이벤트(dict)를 받는 콜백
+            reuse_existing (bool): 이미 색인된 같은 내용의 청크에서 임베딩/태그를 재사용할지 여부
+        """
+        self.embedding_model = embedding_model
+        self.vector_collection = vector_collection
+        self.tagger = tagger
+        self.local_vector_store = local_vector_store
+        self.batch_size = batch_size or INGEST_BATCH_SIZE
+        self.insert_batch_size = insert_batch_size or INGEST_INSERT_BATCH_SIZE
+        self.max_workers = max_workers or INGEST_MAX_WORKERS
+        self.queue_size = queue_size or INGEST_QUEUE_SIZE
+        self.progress_callback = progress_callback
+        self.reuse_existing = reuse_existing
+        self.text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=CHUNK_SIZE,
+            chunk_overlap=CHUNK_OVERLAP,
+            length_function=len,
+            is_separator_regex=False,
+        )
+
+    # ---- 단계 ----
+
+    def _iter_chunks(self, loader):
+        """load → split: 페이지를 하나씩 읽어 청크로 분할 (chunk_index는 파일 전체 기준 순번)"""
+        pages = 0
+        for page in loader.lazy_load():
+            pages += 1
+            for chunk in self.text_splitter.split_documents([page]):
+                yield pages, chunk
+
+    def _lookup_existing(self, hashes):
+        """
+        이미 색인된 청크 중 해시가 같은 것의 임베딩/태그 조회 (같은 임베딩 모델로 만든 것만)
+
+        Returns:
+            dict: 청크 해시 -> (임베딩, 태그)
+        """
+        if not self.reuse_existing or not hashes:
+            return {}
+        try:
+            rows = self.vector_collection.aggregate([
+                {"$match": {"metadata.chunk_hash": {"$in": list(hashes)}, "metadata.embedding_model": EMBEDDING_MODEL_NAME}},
+                {"$group": {"_id": "$metadata.chunk_hash", "embedding": {"$first": "$embedding"}, "tags": {"$first": "$metadata.tags"}}}
+            ])
+            return {row["_id"]: (row["embedding"], row.get("tags") or []) for row in rows}
+        except Exception as e:
+            logger.warning(f"기존 청크 임베딩 조회 실패, 전체 임베딩: {e}")
+            return {}
+
+    def _embed(self, texts):
+        return self.embedding_model.embed_documents(texts)
+
+    def _tag(self, texts, use_processes=False):
+        if self.tagger is None:
+            return [[] for _ in texts]
+        return self.tagger.tag(texts, use_processes=use_processes)
+
+    def _write(self, documents):
+        """write: 청크 문서를 insert_many로 기록"""
+        if not documents:
+            return
+        self.vector_collection.insert_many(documents, ordered=False)
+
+    def _emit(self, stage, **info):
+        if self.progress_callback:
+            try:
+                self.progress_callback({"stage": stage, **info})
+            except Exception as e:
+                logger.warning(f"진행 이벤트 콜백 오류: {e}")
+
+    # ---- 실행 ----
+
+    def run(self, loader, filename, file_id):
+        """
+        파이프라인을 실행합니다.
+
+        Args:
+            loader: lazy_load()를 제공하는 LangChain 문서 로더
+            filename (str): 원본 파일 이름
+            file_id: GridFS 원본 파일 ID
+
+        Returns:
+            int: 저장된 청크 수
+        """
+        start_time = time.perf_counter()
+        stats = {"pages": 0, "chunks_split": 0, "chunks_written": 0, "chunks_reused": 0, "batches": 0}
+        in_flight = deque() # (청크 배치, 청크 해시, 재사용 결과, 새로 계산할 해시, 임베딩 future, 태그 future)
+        write_buffer = []
+        # 로컬 벡터 인덱스에 추가할 청크 (인덱스 쓰기는 실행 끝에 한 번만 - 배치마다 쓰면 인덱스 파일을 매번 다시 씀)
+        local_documents = [] if self.local_vector_store is not None else None
+        # 이번 실행에서 최근 계산/재사용한 청크 해시 -> (임베딩, 태그) (반복되는 머리말 등, 크기 제한 LRU)
+        computed = TTLCache(max_size=self.RECENT_CHUNK_CACHE_SIZE)
+
+        def build_documents(chunks, hashes, results):
+            documents = []
+            for chunk, chunk_hash in zip(chunks, hashes):
+                embedding, keywords = results[chunk_hash]
+                documents.append({
+                    "content": chunk.page_content,
+                    "metadata": {
+                        "filename": filename,
+                        "chunk_index": chunk.metadata.pop("_chunk_index"), # 청크 순서
+                        "original_file_id": file_id, # GridFS 파일 ID 참조
+                        "chunk_hash": chunk_hash, # 내용 해시 (임베딩 재사용 키)
+                        "embedding_model": EMBEDDING_MODEL_NAME,
+                        "tags": keywords, # 자동 추출 태그
+                        **chunk.metadata
+                    },
+                    "embedding": embedding
+                })
+            return documents
+
+        def submit(chunks):
+            hashes = [content_hash(c.page_content) for c in chunks]
+            reused = {h: computed.get(h) for h in hashes if h in computed}
+            reused.update(self._lookup_existing(set(hashes) - set(reused)))
+            # 기존 색인에 없는 내용만 임베딩/태깅 (배치 안의 중복 청크도 한 번만 계산)
+            missing = list(dict.fromkeys(h for h in hashes if h not in reused))
+            texts = [chunks[hashes.index(h)].page_content for h in missing]
+            stats["chunks_reused"] += sum(1 for h in hashes if h in reused)
+            use_processes = stats["chunks_split"] >= KEYBERT_PROCESS_MIN_CHUNKS
+            in_flight.append((
+                chunks, hashes, reused, missing,
+                executor.submit(self._embed, texts) if texts else None,
+                executor.submit(self._tag, texts, use_processes) if texts else None
+            ))
+
+        def drain_oldest():
+            chunks, hashes, results, missing, embed_future, tag_future = in_flight.popleft()
+            if missing:
+                results = {**results, **dict(zip(missing, zip(embed_future.result(), tag_future.result())))}
+            for chunk_hash, result in results.items():
+                computed.set(chunk_hash, result)
+            write_buffer.extend(build_documents(chunks, hashes, results))
+            stats["batches"] += 1
+            self._emit("embed", **stats)
+            if len(write_buffer) >= self.insert_batch_size:
+                flush()
+
+        def flush():
+            self._write(write_buffer)
+            if local_documents is not None:
+                local_documents.extend(write_buffer)
+            stats["chunks_written"] += len(write_buffer)
+            write_buffer.clear()
+            self._emit("write", **stats)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ingest") as executor:
+            try:
+                batch = []
+                for pages, chunk in self._iter_chunks(loader):
+                    chunk.metadata["_chunk_index"] = stats["chunks_split"]
+                    stats["chunks_split"] += 1
+                    if pages != stats["pages"]:
+                        stats["pages"] = pages
+                        self._emit("load", **stats)
+                    batch.append(chunk)
+                    if len(batch) >= self.batch_size:
+                        submit(batch)
+                        batch = []
+                        # 처리 중인 배치가 가득 차면 가장 오래된 배치를 기록해 메모리 사용을 제한
+                        while len(in_flight) >= self.queue_size:
+                            drain_oldest()
+                if batch:
+                    submit(batch)
+                while in_flight:
+                    drain_oldest()
+                if write_buffer:
+                    flush()
+            except Exception:
+                for *_, embed_future, tag_future in in_flight:
+                    for future in (embed_future, tag_future):
+                        if future is not None:
+                            future.cancel()
+                raise
+
+        if local_documents:
+            self.local_vector_store.add(local_documents)
+
+        elapsed = time.perf_counter() - start_time
+        self._emit("done", elapsed=round(elapsed, 2), **stats)
+        logger.info(
+            f"색인 파이프라인 완료: {filename}, 페이지 {stats['pages']}개, 청크 {stats['chunks_written']}개 "
+            f"(재사용 {stats['chunks_reused']}개), 배치 {stats['batches']}개, {elapsed:.2f}초"
+        )
+        return stats["chunks_written"]
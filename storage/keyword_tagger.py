@@ -0,0 +1,126 @@
+# storage/keyword_tagger.py
+
+import atexit
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from utils.logger import setup_logger
+from config import KEYBERT_TOP_N, KEYBERT_PROCESS_WORKERS
+
+logger = setup_logger(__name__)
+
+# 프로세스 풀 워커에서 사용할 KeyBERT 모델 (워커 프로세스마다 한 번만 로드)
+_worker_model = None
+
+def extract_keywords_batch(model, texts, top_n=KEYBERT_TOP_N):
+    """
+    KeyBERT에 청크 목록을 한 번에 전달해 태그를 추출합니다.
+    배치 호출은 후보 n-gram 어휘를 배치 전체에서 한 번만 만들고 임베딩하므로
+    청크마다 extract_keywords를 호출하는 것보다 훨씬 빠릅니다.
+
+    Args:
+        model (KeyBERT): KeyBERT 모델
+        texts (list): 청크 텍스트 목록
+        top_n (int): 청크당 태그 수
+
+    Returns:
+        list: 청크별 태그(단어) 목록
+    """
+    tags = [[] for _ in texts]
+    indices = [i for i, text in enumerate(texts) if text and text.strip()]
+    if not indices:
+        return tags
+    docs = [texts[i] for i in indices]
+    try:
+        results = model.extract_keywords(docs, top_n=top_n)
+        # 문서가 하나면 KeyBERT는 중첩되지 않은 목록을 반환
+        if len(docs) == 1:
+            results = [results]
+    except ValueError as e:
+        # 배치 전체가 불용어뿐이면 어휘가 비어 오류가 발생 → 청크 단위로 다시 시도
+        logger.warning(f"배치 태그 추출 실패, 청크 단위로 재시도: {e}")
+        results = []
+        for doc in docs:
+            try:
+                results.append(model.extract_keywords(doc, top_n=top_n))
+            except ValueError:
+                results.append([])
+    for i, keywords in zip(indices, results):
+        tags[i] = [kw for kw, _ in keywords]
+    return tags
+
+def _init_worker():
+    global _worker_model
+    from keybert import KeyBERT
+    _worker_model = KeyBERT()
+
+def _tag_in_worker(texts, top_n):
+    return extract_keywords_batch(_worker_model, texts, top_n)
+
+class KeywordTagger:
+    """
+    청크 태그 추출기 (KeyBERT 배치 호출).
+    작은 파일은 현재 프로세스에서, 큰 파일은 프로세스 풀에서 배치를 병렬로 처리합니다.
+    """
+
+    def __init__(self, top_n=None, process_workers=None):
+        """
+        태그 추출기 초기화
+
+        Args:
+            top_n (int, optional): 청크당 태그 수. 기본값은 KEYBERT_TOP_N
+            process_workers (int, optional): 프로세스 풀 크기 (0이면 사용하지 않음). 기본값은 KEYBERT_PROCESS_WORKERS
+        """
+        self.top_n = top_n or KEYBERT_TOP_N
+        self.process_workers = KEYBERT_PROCESS_WORKERS if process_workers is None else process_workers
+        self._model = None
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        """현재 프로세스의 KeyBERT 모델 (최초 사용 시 로드)"""
+        with self._lock:
+            if self._model is None:
+                from keybert import KeyBERT
+                self._model = KeyBERT()
+        return self._model
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # torch 스레드 상태가 fork로 복제되지 않도록 spawn 사용
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.process_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker
+                )
+                atexit.register(self.shutdown)
+                logger.info(f"KeyBERT 프로세스 풀 시작 (워커 {self.process_workers}개)")
+        return self._pool
+
+    def tag(self, texts, use_processes=False):
+        """
+        청크 목록의 태그를 추출합니다.
+
+        Args:
+            texts (list): 청크 텍스트 목록
+            use_processes (bool): 프로세스 풀에서 처리할지 여부 (큰 파일)
+
+        Returns:
+            list: 청크별 태그(단어) 목록
+        """
+        if use_processes and self.process_workers > 0:
+            try:
+                return self._get_pool().submit(_tag_in_worker, list(texts), self.top_n).result()
+            except Exception as e:
+                logger.error(f"KeyBERT 프로세스 풀 오류, 현재 프로세스에서 처리: {e}")
+                self.shutdown()
+        return extract_keywords_batch(self.model, texts, self.top_n)
+
+    def shutdown(self):
+        """프로세스 풀 종료"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
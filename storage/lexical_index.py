@@ -0,0 +1,272 @@
+# storage/lexical_index.py
+
+import re
+import math
+import heapq
+import time
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from utils.logger import setup_logger
+from config import BM25_K1, BM25_B, RRF_K
+
+logger = setup_logger(__name__)
+
+# 한글 단어 끝에서 떼어낼 조사/어미 (긴 것부터 비교)
+JOSA_SUFFIXES = sorted([
+    "은", "는", "이", "가", "을", "를", "의", "에", "로", "도", "만", "와", "과", "랑", "나",
+    "에서", "으로", "에게", "한테", "까지", "부터", "보다", "처럼", "이나", "이다", "하고", "이랑",
+    "에서는", "으로는", "에게서", "이라고", "라고", "입니다", "에서도", "으로도"
+], key=len, reverse=True)
+
+STOPWORDS = {"the", "a", "an", "of", "to", "and", "or", "in", "on", "for", "is", "are", "그", "이", "저", "것", "수", "등"}
+
+HANGUL_RUN = re.compile(r"[가-힣]+")
+# 제품 코드/식별자 (예: ab-1234, v2.1, sensor_03)
+CODE_RUN = re.compile(r"[0-9a-z]+(?:[-_./][0-9a-z]+)*")
+
+def _strip_josa(word):
+    """조사/어미를 떼어낸 어간 (남는 부분이 두 글자 이상일 때만)"""
+    for suffix in JOSA_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 2:
+            return word[:-len(suffix)]
+    return word
+
+def query_words(text):
+    """
+    단어 단위 토큰 (조사를 뗀 한글 어간, 영문/숫자/코드 토큰).
+    질의 단어가 청크에 모두 있는지(키워드 일치 강도) 판단할 때 사용합니다.
+    """
+    text = unicodedata.normalize("NFC", text or "").casefold()
+    words = []
+    for match in re.finditer(r"[가-힣]+|[0-9a-z]+(?:[-_./][0-9a-z]+)*", text):
+        word = match.group()
+        if HANGUL_RUN.fullmatch(word):
+            word = _strip_josa(word)
+        if word not in STOPWORDS:
+            words.append(word)
+    return words
+
+def tokenize(text):
+    """
+    BM25 색인용 한국어 토크나이저 (형태소 분석기 없이 동작).
+    단어 토큰(query_words)에 더해 세 글자 이상인 한글 어간은 음절 bigram을,
+    구분자가 있는 코드는 각 부분을 함께 색인해 복합어/띄어쓰기 차이와 부분 코드 검색을 허용합니다.
+
+    Returns:
+        list: 토큰 목록 (중복 포함 - 빈도 계산용)
+    """
+    tokens = []
+    for word in query_words(text):
+        tokens.append(word)
+        if HANGUL_RUN.fullmatch(word):
+            if len(word) > 2:
+                tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        elif CODE_RUN.fullmatch(word) and re.search(r"[-_./]", word):
+            tokens.extend(part for part in re.split(r"[-_./]", word) if part)
+    return tokens
+
+def reciprocal_rank_fusion(result_lists, key, k=None, top_k=10):
+    """
+    여러 검색 결과 목록을 RRF(Reciprocal Rank Fusion)로 결합합니다.
+    점수 척도가 다른 BM25와 벡터 유사도를 정규화 없이 순위만으로 합칩니다.
+
+    Args:
+        result_lists (list): 결과 목록들 (각 목록은 점수 내림차순)
+        key (callable): 결과 -> 청크 식별자 (같은 청크를 합치는 기준)
+        k (int, optional): RRF 상수. 기본값은 RRF_K
+        top_k (int): 반환할 최대 결과 수
+
+    Returns:
+        list: (결과, RRF 점수) 목록 - RRF 점수 내림차순. 결과는 먼저 나온 목록의 것을 사용
+    """
+    k = RRF_K if k is None else k
+    fused = {}
+    for results in result_lists:
+        for rank, item in enumerate(results, start=1):
+            entry = fused.setdefault(key(item), [item, 0.0])
+            entry[1] += 1.0 / (k + rank)
+    ranked = sorted(fused.values(), key=lambda entry: entry[1], reverse=True)[:top_k]
+    return [(item, round(score, 6)) for item, score in ranked]
+
+class LexicalIndex:
+    """
+    벡터 컬렉션 청크의 인메모리 역색인 (BM25).
+    첫 검색 때 컬렉션에서 내용/메타데이터만 읽어 구성하고(임베딩은 읽지 않음),
+    이후에는 MongoDBStorage의 파일 저장/삭제 이벤트로 해당 파일의 청크만 갱신합니다.
+    """
+
+    PROJECTION = {"content": 1, "metadata": 1}
+
+    def __init__(self, vector_collection, k1=None, b=None):
+        """
+        Args:
+            vector_collection: 청크 문서가 저장된 MongoDB 컬렉션
+            k1 (float, optional): BM25 단어 빈도 포화 계수. 기본값은 BM25_K1
+            b (float, optional): BM25 문서 길이 정규화 계수. 기본값은 BM25_B
+        """
+        self.vector_collection = vector_collection
+        self.k1 = BM25_K1 if k1 is None else k1
+        self.b = BM25_B if b is None else b
+        self._lock = threading.RLock()
+        self._docs = None # 문서 번호 -> {"content", "metadata", "tf": Counter, "length"}
+        self._postings = defaultdict(dict) # 토큰 -> {문서 번호: 빈도}
+        self._by_file = defaultdict(set) # 파일 이름 -> 문서 번호 집합
+        self._next_id = 0
+        self._total_length = 0
+        self.stats = {"searches": 0, "loaded_in_ms": 0.0}
+
+    # ---- 색인 관리 ----
+
+    def _add(self, doc):
+        tf = Counter(tokenize(doc.get("content", "")))
+        doc_id = self._next_id
+        self._next_id += 1
+        metadata = doc.get("metadata", {})
+        length = sum(tf.values())
+        self._docs[doc_id] = {"content": doc.get("content", ""), "metadata": metadata, "tf": tf, "length": length}
+        self._total_length += length
+        for token, count in tf.items():
+            self._postings[token][doc_id] = count
+        self._by_file[metadata.get("filename")].add(doc_id)
+
+    def _remove(self, doc_id):
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+        self._total_length -= doc["length"]
+        for token in doc["tf"]:
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[token]
+
+    def add(self, documents):
+        """청크 문서를 색인에 추가합니다 (색인이 아직 로드되지 않았으면 첫 검색 때 함께 로드됨)."""
+        with self._lock:
+            if self._docs is None:
+                return
+            for doc in documents:
+                self._add(doc)
+
+    def remove_file(self, filename):
+        """파일 이름에 연결된 청크를 색인에서 제거하고 제거 개수를 반환합니다."""
+        with self._lock:
+            if self._docs is None:
+                return 0
+            doc_ids = self._by_file.pop(filename, set())
+            for doc_id in doc_ids:
+                self._remove(doc_id)
+            return len(doc_ids)
+
+    def refresh(self):
+        """벡터 컬렉션에서 전체 청크를 다시 읽어 색인을 재구성합니다."""
+        start_time = time.perf_counter()
+        documents = list(self.vector_collection.find({}, self.PROJECTION))
+        with self._lock:
+            self._docs = {}
+            self._postings = defaultdict(dict)
+            self._by_file = defaultdict(set)
+            self._total_length = 0
+            for doc in documents:
+                self._add(doc)
+        self.stats["loaded_in_ms"] = round((time.perf_counter() - start_time) * 1000, 1)
+        logger.info(f"키워드(BM25) 색인 로드: 청크 {len(documents)}개, 토큰 {len(self._postings)}개 ({self.stats['loaded_in_ms']} ms)")
+
+    def _ensure_loaded(self):
+        with self._lock:
+            if self._docs is None:
+                self.refresh()
+
+    def on_corpus_change(self, event, filename):
+        """MongoDBStorage 파일 저장/삭제 이벤트 리스너 - 해당 파일의 청크만 다시 색인"""
+        with self._lock:
+            if self._docs is None:
+                return
+            try:
+                self.remove_file(filename)
+                if event == "save":
+                    self.add(self.vector_collection.find({"metadata.filename": filename}, self.PROJECTION))
+            except Exception as e:
+                logger.warning(f"키워드 색인 갱신 실패, 다음 검색 때 전체 로드: {e}")
+                self._docs = None
+
+    # ---- 검색 ----
+
+    def _matches_filter(self, metadata, file_ids, tags):
+        if file_ids and str(metadata.get("original_file_id")) not in file_ids:
+            return False
+        if tags and not tags.intersection(metadata.get("tags", [])):
+            return False
+        return True
+
+    def search(self, query, file_ids=None, tags_filter=None, top_k=10):
+        """
+        BM25로 청크를 검색합니다. (MongoDBStorage.vector_search와 같은 결과 형식)
+
+        Args:
+            query (str): 검색 질의
+            file_ids (list, optional): 파일 ID 필터 (MongoDBStorage.resolve_file_ids 결과 - 벡터 검색과 같은 조건)
+            tags_filter (list[str], optional): 태그 필터 (하나라도 포함되면 일치)
+            top_k (int): 반환할 최대 결과 수
+
+        Returns:
+            list: {"content", "metadata", "score", "coverage"} 목록 (점수 내림차순).
+                  coverage는 질의 단어 중 청크에 포함된 비율입니다.
+        """
+        self._ensure_loaded()
+        self.stats["searches"] += 1
+        query_tokens = set(tokenize(query))
+        if not query_tokens:
+            return []
+        file_ids = {str(file_id) for file_id in file_ids} if file_ids else None
+        tags = set(tags_filter or [])
+        with self._lock:
+            n_docs = len(self._docs)
+            if not n_docs:
+                return []
+            avg_length = self._total_length / n_docs or 1.0
+            scores = defaultdict(float)
+            for token in query_tokens:
+                postings = self._postings.get(token)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    length = self._docs[doc_id]["length"]
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / avg_length))
+
+            words = set(query_words(query))
+            results = []
+            # 필터가 없으면 상위 top_k만 골라 정렬 (필터가 있으면 걸러지는 청크가 있으므로 전체 정렬)
+            if file_ids or tags:
+                ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+            else:
+                ranked = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+            for doc_id, score in ranked:
+                doc = self._docs[doc_id]
+                if not self._matches_filter(doc["metadata"], file_ids, tags):
+                    continue
+                coverage = sum(1 for word in words if word in doc["tf"]) / len(words) if words else 0.0
+                results.append({
+                    "content": doc["content"], "metadata": doc["metadata"],
+                    "score": round(score, 4), "coverage": round(coverage, 3)
+                })
+                if len(results) >= top_k:
+                    break
+            return results
+
+    def get_stats(self):
+        with self._lock:
+            loaded = self._docs is not None
+            return {
+                **self.stats,
+                "loaded": loaded,
+                "chunks": len(self._docs) if loaded else 0,
+                "tokens": len(self._postings) if loaded else 0
+            }
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._docs)
@@ -0,0 +1,388 @@
+# storage/local_vector_store.py
+
+import os
+import json
+import glob
+import threading
+from typing import NamedTuple, Optional
+import numpy as np
+from utils.logger import setup_logger
+from config import VECTOR_DB_PATH, LOCAL_VECTOR_INDEX_MODE, IVF_NLIST, IVF_NPROBE, IVF_MIN_VECTORS, LOCAL_VECTOR_DELTA_MAX
+
+logger = setup_logger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+def _normalize_rows(matrix):
+    """코사인 유사도 계산을 위해 각 행을 L2 정규화"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+def _top_k(scores, k):
+    """점수 배열에서 상위 k개 위치를 점수 내림차순으로 반환 (argpartition 사용)"""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part])]
+
+def train_ivf(matrix, nlist, iterations=10, sample_size=50000, seed=42):
+    """
+    구면 k-means로 IVF 중심점을 학습하고 각 벡터의 클러스터를 할당합니다.
+
+    Args:
+        matrix (np.ndarray): 정규화된 (N, D) float32 행렬
+        nlist (int): 클러스터 수
+
+    Returns:
+        tuple: (중심점 (nlist, D) 행렬, 각 행의 클러스터 번호 (N,) 배열)
+    """
+    rng = np.random.default_rng(seed)
+    n = matrix.shape[0]
+    nlist = max(1, min(nlist, n))
+    sample = matrix if n <= sample_size else matrix[np.sort(rng.choice(n, sample_size, replace=False))]
+    centroids = np.array(sample[rng.choice(sample.shape[0], nlist, replace=False)], dtype=np.float32)
+    for _ in range(iterations):
+        assignments = np.argmax(sample @ centroids.T, axis=1)
+        for c in range(nlist):
+            members = sample[assignments == c]
+            if len(members):
+                centroids[c] = members.sum(axis=0)
+        centroids = _normalize_rows(centroids)
+    # 전체 벡터 할당은 메모리 사용을 줄이기 위해 블록 단위로 수행
+    assignments = np.empty(n, dtype=np.int32)
+    for start in range(0, n, 8192):
+        assignments[start:start + 8192] = np.argmax(matrix[start:start + 8192] @ centroids.T, axis=1)
+    return centroids, assignments
+
+class _Snapshot(NamedTuple):
+    """검색 스레드가 읽는 인덱스 상태 (쓰기는 새 파일을 만든 뒤 스냅샷을 통째로 교체)"""
+    matrix: np.ndarray # 본 세그먼트 (N, D) 임베딩 (메모리 맵)
+    records: list
+    centroids: Optional[np.ndarray] # IVF 중심점 (본 세그먼트만 대상)
+    inverted_lists: Optional[tuple]
+    delta_matrix: np.ndarray # 병합 전 추가된 벡터 (정확 검색)
+    delta_records: list
+    deleted: Optional[np.ndarray] # 본 세그먼트에서 삭제 표시된 행 (bool 마스크)
+
+def _empty_matrix(dim=0):
+    return np.empty((0, dim), dtype=np.float32)
+
+def _to_records(documents):
+    return [
+        {"id": str(doc.get("_id", "")), "content": doc["content"], "metadata": doc.get("metadata", {})}
+        for doc in documents
+    ]
+
+class LocalVectorStore:
+    """
+    VECTOR_DB_PATH에 저장되는 프로세스 내 벡터 인덱스.
+    임베딩은 연속된 NumPy float32 행렬(.npy)로 저장되고 로드 시 메모리 맵으로 엽니다.
+    정확한 top-k(벡터화된 내적)와 대용량용 근사 검색(IVF)을 지원합니다.
+    추가/삭제는 본 세그먼트를 다시 쓰지 않고 작은 델타 세그먼트(추가 벡터 + 삭제 표시)에 기록하며,
+    델타가 LOCAL_VECTOR_DELTA_MAX를 넘을 때만 본 세그먼트로 병합(IVF 재학습)합니다.
+    """
+
+    def __init__(self, path=None, index_mode=None, nlist=None, nprobe=None, delta_max=None):
+        """
+        로컬 벡터 스토어 초기화
+
+        Args:
+            path (str, optional): 저장 디렉토리. 기본값은 VECTOR_DB_PATH
+            index_mode (str, optional): "exact" 또는 "ivf". 기본값은 LOCAL_VECTOR_INDEX_MODE
+            nlist (int, optional): IVF 클러스터 수 (0이면 sqrt(N)으로 자동 결정)
+            nprobe (int, optional): IVF 검색 시 탐색할 클러스터 수
+            delta_max (int, optional): 델타 세그먼트 최대 크기 (추가 벡터 + 삭제 표시 수). 기본값은 LOCAL_VECTOR_DELTA_MAX
+        """
+        self.path = path or VECTOR_DB_PATH
+        self.index_mode = (index_mode or LOCAL_VECTOR_INDEX_MODE).lower()
+        self.nlist = IVF_NLIST if nlist is None else nlist
+        self.nprobe = nprobe or IVF_NPROBE
+        self.delta_max = LOCAL_VECTOR_DELTA_MAX if delta_max is None else delta_max
+        self._lock = threading.Lock()
+        self._version = 0
+        self._manifest = None
+        # 검색 스레드는 이 스냅샷을 읽고, 쓰기는 새 파일을 만든 뒤 스냅샷을 교체합니다.
+        self._state = _Snapshot(_empty_matrix(), [], None, None, _empty_matrix(), [], None)
+        os.makedirs(self.path, exist_ok=True)
+        self._load()
+
+    # ---- 영구 저장 ----
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _load(self):
+        manifest_path = self._file(MANIFEST_NAME)
+        if not os.path.exists(manifest_path):
+            logger.info(f"로컬 벡터 스토어 새로 생성: {self.path}")
+            return
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        self._version = manifest["version"]
+        self._manifest = manifest
+        matrix = np.load(self._file(manifest["embeddings"]), mmap_mode="r")
+        with open(self._file(manifest["records"]), "r", encoding="utf-8") as f:
+            records = json.load(f)
+        centroids = inverted_lists = None
+        if manifest.get("ivf"):
+            centroids = np.load(self._file(manifest["ivf"]["centroids"]))
+            assignments = np.load(self._file(manifest["ivf"]["assignments"]))
+            # 클러스터별 행 번호 목록 (역색인): order[offsets[c]:offsets[c + 1]]가 클러스터 c의 행
+            order = np.argsort(assignments, kind="stable")
+            offsets = np.searchsorted(assignments[order], np.arange(centroids.shape[0] + 1))
+            inverted_lists = (order, offsets)
+        delta_matrix, delta_records, deleted = _empty_matrix(), [], None
+        if manifest.get("delta"):
+            delta_matrix = np.load(self._file(manifest["delta"]["embeddings"]))
+            with open(self._file(manifest["delta"]["records"]), "r", encoding="utf-8") as f:
+                delta_records = json.load(f)
+        if manifest.get("deleted"):
+            deleted = np.zeros(len(records), dtype=bool)
+            deleted[np.load(self._file(manifest["deleted"]))] = True
+        self._state = _Snapshot(matrix, records, centroids, inverted_lists, delta_matrix, delta_records, deleted)
+        logger.info(
+            f"로컬 벡터 스토어 로드: {len(self)}개 벡터 (델타 {len(delta_records)}개, 모드: {self.index_mode}, 경로: {self.path})"
+        )
+
+    def _commit(self, manifest):
+        """manifest를 원자적으로 교체한 뒤 메모리 맵으로 다시 열고 이전 버전 파일을 정리합니다."""
+        tmp_path = self._file(MANIFEST_NAME + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self._file(MANIFEST_NAME))
+        self._version = manifest["version"]
+        self._load()
+        self._cleanup_old_versions(manifest)
+
+    def _save(self, matrix, records):
+        """본 세그먼트 전체를 새 버전 파일로 기록합니다 (델타/삭제 표시는 비움, ivf 모드면 IVF 재학습)."""
+        version = self._version + 1
+        manifest = {
+            "version": version,
+            "count": int(matrix.shape[0]),
+            "dim": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+            "embeddings": f"embeddings-{version}.npy",
+            "records": f"records-{version}.json",
+            "ivf": None,
+            "delta": None,
+            "deleted": None
+        }
+        np.save(self._file(manifest["embeddings"]), np.ascontiguousarray(matrix, dtype=np.float32))
+        with open(self._file(manifest["records"]), "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False, default=str)
+
+        if self.index_mode == "ivf" and matrix.shape[0] >= IVF_MIN_VECTORS:
+            nlist = self.nlist or int(np.sqrt(matrix.shape[0]))
+            centroids, assignments = train_ivf(matrix, nlist)
+            manifest["ivf"] = {"centroids": f"ivf-centroids-{version}.npy", "assignments": f"ivf-assignments-{version}.npy"}
+            np.save(self._file(manifest["ivf"]["centroids"]), centroids)
+            np.save(self._file(manifest["ivf"]["assignments"]), assignments)
+            logger.info(f"IVF 인덱스 학습 완료: nlist={centroids.shape[0]}")
+
+        self._commit(manifest)
+
+    def _save_delta(self, delta_matrix, delta_records, deleted):
+        """델타 세그먼트와 삭제 표시만 새 버전 파일로 기록합니다 (본 세그먼트 파일과 IVF는 그대로 재사용)."""
+        version = self._version + 1
+        manifest = dict(self._manifest, version=version, delta=None, deleted=None)
+        if delta_records:
+            manifest["delta"] = {"embeddings": f"delta-embeddings-{version}.npy", "records": f"delta-records-{version}.json"}
+            np.save(self._file(manifest["delta"]["embeddings"]), np.ascontiguousarray(delta_matrix, dtype=np.float32))
+            with open(self._file(manifest["delta"]["records"]), "w", encoding="utf-8") as f:
+                json.dump(delta_records, f, ensure_ascii=False, default=str)
+        if deleted is not None and deleted.any():
+            manifest["deleted"] = f"deleted-{version}.npy"
+            np.save(self._file(manifest["deleted"]), np.flatnonzero(deleted))
+        self._commit(manifest)
+
+    def _compact(self, state, extra_matrix=None, extra_records=None):
+        """삭제 표시된 행을 빼고 본 세그먼트와 델타(및 추가 벡터)를 합쳐 본 세그먼트를 다시 만듭니다."""
+        keep = np.flatnonzero(~state.deleted) if state.deleted is not None else np.arange(len(state.records))
+        parts = [np.asarray(state.matrix)[keep]] if len(keep) else []
+        records = [state.records[i] for i in keep] + state.delta_records + (extra_records or [])
+        for part in (state.delta_matrix, extra_matrix):
+            if part is not None and len(part):
+                parts.append(part)
+        dim = next((part.shape[1] for part in parts), 0)
+        matrix = np.concatenate(parts) if parts else _empty_matrix(dim)
+        logger.info(f"로컬 벡터 스토어 델타 병합: 본 세그먼트 {len(records)}개로 재구성")
+        self._save(matrix, records)
+
+    def _cleanup_old_versions(self, manifest):
+        """현재 manifest가 참조하지 않는 이전 버전 파일 삭제 (다른 스레드가 아직 메모리 맵을 열고 있으면 다음 기회에 삭제)"""
+        referenced = {manifest["embeddings"], manifest["records"], manifest.get("deleted")}
+        for section in ("ivf", "delta"):
+            if manifest.get(section):
+                referenced.update(manifest[section].values())
+        patterns = (
+            "embeddings-*.npy", "records-*.json", "ivf-centroids-*.npy", "ivf-assignments-*.npy",
+            "delta-embeddings-*.npy", "delta-records-*.json", "deleted-*.npy"
+        )
+        for pattern in patterns:
+            for file_path in glob.glob(self._file(pattern)):
+                name = os.path.basename(file_path)
+                version = os.path.splitext(name)[0].rsplit("-", 1)[-1]
+                if name not in referenced and version.isdigit() and int(version) < manifest["version"]:
+                    try:
+                        os.remove(file_path)
+                    except OSError:
+                        pass
+
+    def _delta_size(self, state):
+        deleted = int(state.deleted.sum()) if state.deleted is not None else 0
+        return len(state.delta_records) + deleted
+
+    # ---- 쓰기 ----
+
+    def add(self, documents):
+        """
+        청크 문서를 인덱스에 추가합니다.
+        델타 세그먼트에 추가하고, 본 세그먼트가 비어 있거나 델타가 delta_max를 넘으면 본 세그먼트로 병합합니다.
+
+        Args:
+            documents (list): {"content": str, "metadata": dict, "embedding": list[float]} 목록
+        """
+        if not documents:
+            return
+        new_matrix = _normalize_rows(np.asarray([doc["embedding"] for doc in documents], dtype=np.float32))
+        new_records = _to_records(documents)
+        with self._lock:
+            state = self._state
+            if not state.records or self._delta_size(state) + len(new_records) > self.delta_max:
+                self._compact(state, new_matrix, new_records)
+            else:
+                delta_matrix = np.concatenate([state.delta_matrix, new_matrix]) if state.delta_records else new_matrix
+                self._save_delta(delta_matrix, state.delta_records + new_records, state.deleted)
+        logger.info(f"로컬 벡터 스토어에 {len(documents)}개 벡터 추가 (총 {len(self)}개)")
+
+    def delete_by_file_id(self, file_id):
+        """원본 파일 ID에 연결된 벡터를 모두 삭제하고 삭제 개수를 반환합니다 (본 세그먼트 행은 삭제 표시만 함)."""
+        file_id = str(file_id)
+        with self._lock:
+            state = self._state
+            deleted = state.deleted.copy() if state.deleted is not None else np.zeros(len(state.records), dtype=bool)
+            hits = [
+                i for i, r in enumerate(state.records)
+                if not deleted[i] and str(r["metadata"].get("original_file_id")) == file_id
+            ]
+            deleted[hits] = True
+            keep = [i for i, r in enumerate(state.delta_records) if str(r["metadata"].get("original_file_id")) != file_id]
+            removed = len(hits) + len(state.delta_records) - len(keep)
+            if removed:
+                delta_records = [state.delta_records[i] for i in keep]
+                delta_matrix = state.delta_matrix[keep] if keep else _empty_matrix(state.delta_matrix.shape[1])
+                state = state._replace(delta_matrix=delta_matrix, delta_records=delta_records, deleted=deleted)
+                if self._delta_size(state) > self.delta_max:
+                    self._compact(state)
+                else:
+                    self._save_delta(delta_matrix, delta_records, deleted)
+        logger.info(f"로컬 벡터 스토어에서 file_id={file_id} 벡터 {removed}개 삭제")
+        return removed
+
+    def rebuild(self, documents):
+        """기존 인덱스를 버리고 주어진 문서들로 다시 만듭니다 (MongoDB 컬렉션 동기화용)."""
+        documents = list(documents)
+        with self._lock:
+            if documents:
+                matrix = _normalize_rows(np.asarray([doc["embedding"] for doc in documents], dtype=np.float32))
+            else:
+                matrix = _empty_matrix()
+            self._save(matrix, _to_records(documents))
+        logger.info(f"로컬 벡터 스토어 재구성: {len(documents)}개 벡터")
+
+    # ---- 검색 ----
+
+    def _filter_mask(self, records, file_ids, tags_filter):
+        if not file_ids and not tags_filter:
+            return None
+        file_ids = {str(file_id) for file_id in file_ids} if file_ids else None
+        tags = set(tags_filter or [])
+        mask = np.ones(len(records), dtype=bool)
+        for i, record in enumerate(records):
+            metadata = record["metadata"]
+            if file_ids and str(metadata.get("original_file_id")) not in file_ids:
+                mask[i] = False
+            elif tags and not tags.intersection(metadata.get("tags", [])):
+                mask[i] = False
+        return mask
+
+    def _search_main(self, state, query, mask, top_k):
+        """본 세그먼트 검색 - (행 번호, 점수) 배열"""
+        matrix, centroids, inverted_lists = state.matrix, state.centroids, state.inverted_lists
+        masked = np.flatnonzero(mask) if mask is not None else None
+        if centroids is not None and self.index_mode == "ivf":
+            # 근사 검색: 쿼리와 가까운 nprobe개 클러스터의 벡터만 비교
+            probe = _top_k(centroids @ query, self.nprobe)
+            order, offsets = inverted_lists
+            candidates = np.sort(np.concatenate([order[offsets[c]:offsets[c + 1]] for c in probe]))
+            if masked is not None:
+                # 필터가 좁으면 탐색한 클러스터에 해당 행이 거의 없으므로, 필터 행이 탐색 후보보다 적거나
+                # 탐색 후보 중 필터를 통과한 행이 top_k보다 적으면 필터 행 전체를 정확히 비교
+                filtered = candidates[mask[candidates]]
+                candidates = masked if masked.size <= candidates.size or filtered.size < top_k else filtered
+        elif masked is not None and masked.size * 2 < matrix.shape[0]:
+            candidates = masked
+        else:
+            # 정확 검색: 전체 행렬과 한 번에 내적 (필터/삭제 표시된 행은 점수를 -inf로)
+            scores = matrix @ query
+            if mask is not None:
+                scores[~mask] = -np.inf
+            rows = _top_k(scores, top_k)
+            rows = rows[np.isfinite(scores[rows])]
+            return rows, scores[rows]
+
+        if candidates.size == 0:
+            return candidates, np.empty(0, dtype=np.float32)
+        scores = matrix[candidates] @ query
+        order = _top_k(scores, top_k)
+        return candidates[order], scores[order]
+
+    def search(self, query_embedding, file_ids=None, tags_filter=None, top_k=10):
+        """
+        쿼리 임베딩과 가장 유사한 청크를 검색합니다. (MongoDBStorage.vector_search와 같은 결과 형식)
+        본 세그먼트(정확 또는 IVF)와 델타 세그먼트(정확)를 각각 검색해 점수순으로 합칩니다.
+
+        Args:
+            query_embedding (list[float]): 쿼리 임베딩
+            file_ids (list, optional): 파일 ID 필터 (MongoDBStorage.resolve_file_ids 결과 - Atlas 검색과 같은 조건)
+            tags_filter (list[str], optional): 태그 필터 (하나라도 포함되면 일치)
+            top_k (int, optional): 반환할 최대 결과 수
+
+        Returns:
+            list: {"content", "metadata", "score"} dict 목록 (점수 내림차순)
+        """
+        state = self._state
+        if not state.records and not state.delta_records:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        hits = []
+        if state.records:
+            mask = self._filter_mask(state.records, file_ids, tags_filter)
+            if state.deleted is not None:
+                mask = ~state.deleted if mask is None else mask & ~state.deleted
+            rows, scores = self._search_main(state, query, mask, top_k)
+            hits.extend((float(score), state.records[row]) for row, score in zip(rows, scores))
+        if state.delta_records:
+            delta_mask = self._filter_mask(state.delta_records, file_ids, tags_filter)
+            rows = np.flatnonzero(delta_mask) if delta_mask is not None else np.arange(len(state.delta_records))
+            if rows.size:
+                scores = state.delta_matrix[rows] @ query
+                order = _top_k(scores, top_k)
+                hits.extend((float(scores[i]), state.delta_records[rows[i]]) for i in order)
+
+        hits.sort(key=lambda hit: hit[0], reverse=True)
+        return [
+            {"content": record["content"], "metadata": record["metadata"], "score": score}
+            for score, record in hits[:top_k]
+        ]
+
+    def __len__(self):
+        state = self._state
+        deleted = int(state.deleted.sum()) if state.deleted is not None else 0
+        return len(state.records) - deleted + len(state.delta_records)
@@ -1,20 +1,31 @@
 # storage/mongodb_storage.py
 
 import os
+import weakref
+import threading
 import tempfile # 임시 파일 사용을 위해 임포트
 from pymongo import MongoClient
 from pymongo.server_api import ServerApi
 from gridfs import GridFS
 from utils.logger import setup_logger
 from config import (
-    VECTOR_COLLECTION_NAME, CHUNK_SIZE, CHUNK_OVERLAP,
-    EMBEDDING_MODEL_NAME, OPENAI_API_KEY_ENV_VAR, TOP_K_RESULTS # 임베딩 설정 가져오기
+    VECTOR_COLLECTION_NAME, FILE_LIST_PAGE_SIZE,
+    EMBEDDING_MODEL_NAME, OPENAI_API_KEY_ENV_VAR, TOP_K_RESULTS, # 임베딩 설정 가져오기
+    EMBEDDING_CACHE_WARMUP, VECTOR_STORE_BACKEND, COLUMNAR_BUCKET_NAME, SHEET_FRAME_CACHE_SIZE,
+    RETRIEVAL_MODE, HYBRID_CANDIDATES, LEXICAL_FAST_PATH_ENABLED, LEXICAL_FAST_PATH_MAX_TERMS, LEXICAL_FAST_PATH_MIN_COVERAGE,
+    VECTOR_INDEX_NAME, VECTOR_INDEX_AUTO_CREATE, EMBEDDING_DIMENSIONS,
+    VECTOR_NUM_CANDIDATES_MULTIPLIER, VECTOR_NUM_CANDIDATES_MAX, VECTOR_EXACT_SEARCH_MAX_CHUNKS
 )
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings # OpenAIEmbeddings 임포트
-# Document Loaders 임포트
-from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader, TextLoader
-from keybert import KeyBERT
+from storage.embedding_cache import EmbeddingCache
+from storage.local_vector_store import LocalVectorStore
+from storage.gridfs_reader import GridFSReader
+from storage.file_catalog import FileCatalog
+from storage.lexical_index import LexicalIndex, query_words, reciprocal_rank_fusion
+from storage.search_results import ResultShape, SearchHit, highlight_terms, snippet_projection_stages
+from utils.cache import TTLCache
+from storage.keyword_tagger import KeywordTagger
+from utils.tracing import init_tracing
+# LangChain(임베딩, 문서 로더, 텍스트 분할)과 pandas/openpyxl(엑셀)은 실제로 사용할 때 임포트합니다.
 
 logger = setup_logger(__name__)
 
@@ -60,6 +71,8 @@ class MongoDBStorage:
     """MongoDB와 상호작용하는 클래스 (GridFS 및 일반 컬렉션) - 싱글톤 적용"""
     _instance = None # 싱글톤 인스턴스를 저장할 클래스 변수
     _initialized = False # 초기화 상태 플래그
+    _change_listeners = [] # 파일 저장/삭제 이벤트 리스너 (캐시 무효화 등)
+    _init_lock = threading.RLock() # 여러 세션(스레드)이 동시에 초기화하지 않도록 보호
 
     def __new__(cls, *args, **kwargs):
         """인스턴스가 없을 때만 새로 생성하여 반환"""
@@ -92,225 +105,432 @@ class MongoDBStorage:
             # DATABASE_NAME 변수를 사용하여 명시적으로 데이터베이스 지정
             self.db = self.client.get_database(DATABASE_NAME)
             self.fs = GridFS(self.db)
+            # 스프레드시트의 열 지향(Parquet) 변환본을 원본과 분리해 저장하는 버킷
+            self.columnar_fs = GridFS(self.db, collection=COLUMNAR_BUCKET_NAME)
+            self._sheet_frames = TTLCache(max_size=SHEET_FRAME_CACHE_SIZE) # (파일 ID, 시트) -> DataFrame
             self.vector_collection = self.db[VECTOR_COLLECTION_NAME] # 벡터 임베딩 및 메타데이터 저장 컬렉션
             
             # Embedding 모델 로드 (config에서 모델 이름 가져오기)
             try:
+                 from langchain_openai import OpenAIEmbeddings
+                 init_tracing()
                  self.embedding_model = OpenAIEmbeddings(model=EMBEDDING_MODEL_NAME, openai_api_key=openai_api_key)
                  logger.info(f"Embedding 모델 로드 성공: {EMBEDDING_MODEL_NAME}.")
             except Exception as e:
                  logger.error(f"Embedding 모델 로드 오류 ({EMBEDDING_MODEL_NAME}): {e}")
                  self.embedding_model = None # 모델 로드 실패 시 None으로 설정
 
+            # 질의 임베딩 캐시 (자주 쓰는 질의는 시작 시 미리 로드)
+            self.embedding_cache = EmbeddingCache(EMBEDDING_MODEL_NAME)
+            self.embedding_cache.warm_up(EMBEDDING_CACHE_WARMUP)
+
+            # 파일명 조회용 인메모리 카탈로그 (파일 저장/삭제 시 갱신)
+            self.file_catalog = FileCatalog(self.db.fs.files)
+            self.add_change_listener(self.file_catalog.on_corpus_change)
+
+            # 청크 키워드(BM25) 역색인 (hybrid/lexical 검색 모드에서 첫 검색 때 로드, 저장/삭제 이벤트로 갱신)
+            self.lexical_index = LexicalIndex(self.vector_collection)
+            self.add_change_listener(self.lexical_index.on_corpus_change)
+            self.retrieval_stats = {"vector": 0, "hybrid": 0, "lexical": 0, "fast_path": 0}
+
+            # 로컬 벡터 인덱스 백엔드 (Atlas $vectorSearch 대신 사용)
+            self.local_vector_store = None
+            if VECTOR_STORE_BACKEND == "local":
+                self.local_vector_store = LocalVectorStore()
+
             # 연결 확인을 위해 admin 데이터베이스의 command_with_namespace 사용
             self.client.admin.command('ping')
             logger.info("MongoDB 연결 성공!")
+            self._ensure_indexes()
+            if self.local_vector_store is None and VECTOR_INDEX_AUTO_CREATE:
+                self.ensure_vector_index()
             
-            self._initialized = True # 초기화 완료 플래그 설정
+            # 초기화 완료 플래그는 클래스 속성으로 설정 (get_instance()와 app.py가 클래스에서 읽음)
+            MongoDBStorage._initialized = True
+
+            # 로컬 인덱스가 비어 있으면 기존 벡터 컬렉션에서 한 번 동기화
+            if self.local_vector_store is not None and len(self.local_vector_store) == 0:
+                self.sync_local_vector_store()
 
         except Exception as e:
             logger.error(f"MongoDB 연결 오류: {e}")
             raise
 
+    def _ensure_indexes(self):
+        """파일명/파일 ID 조회에 사용하는 MongoDB 인덱스 생성 (이미 있으면 무시됨)"""
+        try:
+            self.db.fs.files.create_index("filename")
+            self.db.fs.files.create_index([("uploadDate", -1)])
+            self.vector_collection.create_index("metadata.original_file_id")
+            self.vector_collection.create_index("metadata.filename")
+            self.vector_collection.create_index("metadata.chunk_hash")
+            self.vector_collection.create_index("metadata.tags")
+            self.db.fs.files.create_index("metadata.content_sha256")
+            self.db[f"{COLUMNAR_BUCKET_NAME}.files"].create_index("metadata.source_file_id")
+        except Exception as e:
+            logger.warning(f"MongoDB 인덱스 생성 실패: {e}")
+
+    # Atlas Vector Search 인덱스 정의: 벡터 필드와 $vectorSearch.filter에서 사용할 수 있는 필터 필드
+    VECTOR_FILTER_PATHS = ("metadata.original_file_id", "metadata.filename", "metadata.tags")
+
+    @classmethod
+    def vector_index_definition(cls):
+        return {
+            "fields": [
+                {"type": "vector", "path": "embedding", "numDimensions": EMBEDDING_DIMENSIONS, "similarity": "cosine"},
+                *({"type": "filter", "path": path} for path in cls.VECTOR_FILTER_PATHS)
+            ]
+        }
+
+    def ensure_vector_index(self):
+        """
+        Atlas Vector Search 인덱스를 생성하거나, 필터 필드가 빠진 기존 정의를 갱신합니다.
+        (Atlas가 아닌 MongoDB이거나 권한이 없으면 경고만 남깁니다.)
+
+        Returns:
+            str: "created", "updated", "unchanged" 또는 "failed"
+        """
+        try:
+            from pymongo.operations import SearchIndexModel
+            definition = self.vector_index_definition()
+            existing = next(iter(self.vector_collection.list_search_indexes(VECTOR_INDEX_NAME)), None)
+            if existing is None:
+                self.vector_collection.create_search_index(
+                    SearchIndexModel(definition=definition, name=VECTOR_INDEX_NAME, type="vectorSearch")
+                )
+                logger.info(f"벡터 검색 인덱스 생성 요청: {VECTOR_INDEX_NAME} (필터 필드: {', '.join(self.VECTOR_FILTER_PATHS)})")
+                return "created"
+            current = existing.get("latestDefinition", existing.get("definition", {}))
+            filter_paths = {f.get("path") for f in current.get("fields", []) if f.get("type") == "filter"}
+            if set(self.VECTOR_FILTER_PATHS) <= filter_paths:
+                return "unchanged"
+            self.vector_collection.update_search_index(VECTOR_INDEX_NAME, definition)
+            logger.info(f"벡터 검색 인덱스 필터 필드 추가 요청: {VECTOR_INDEX_NAME}")
+            return "updated"
+        except Exception as e:
+            logger.warning(f"벡터 검색 인덱스 확인/생성 실패 ({VECTOR_INDEX_NAME}): {e}")
+            return "failed"
+
     # 싱글톤 인스턴스를 얻는 스태틱 메소드 추가 (선택 사항, __new__만 사용해도 됨)
     @staticmethod
     def get_instance():
         if MongoDBStorage._instance is None or not MongoDBStorage._initialized:
-            # 필요하다면 여기서 __init__ 호출
-             MongoDBStorage()
+            with MongoDBStorage._init_lock:
+                if MongoDBStorage._instance is None or not MongoDBStorage._initialized:
+                    # 필요하다면 여기서 __init__ 호출
+                    MongoDBStorage()
         return MongoDBStorage._instance
 
+    @classmethod
+    def add_change_listener(cls, callback):
+        """
+        파일 저장/삭제로 코퍼스가 바뀔 때 호출될 리스너를 등록합니다.
+        바운드 메소드는 약한 참조로 보관하므로 리스너 객체의 수명에 영향을 주지 않습니다.
+        
+        Args:
+            callback (callable): callback(event, filename) 형태. event는 "save" 또는 "delete"
+        """
+        ref = weakref.WeakMethod(callback) if hasattr(callback, '__self__') else (lambda: callback)
+        cls._change_listeners.append(ref)
+
+    def _notify_change(self, event, filename):
+        """등록된 리스너에 코퍼스 변경을 알립니다."""
+        alive = []
+        for ref in MongoDBStorage._change_listeners:
+            callback = ref()
+            if callback is None:
+                continue
+            alive.append(ref)
+            try:
+                callback(event, filename)
+            except Exception as e:
+                logger.error(f"파일 변경 리스너 실행 오류 ({event}: {filename}): {e}")
+        MongoDBStorage._change_listeners[:] = alive
+
     def close(self):
         """MongoDB 연결을 닫습니다."""
         # 싱글톤에서는 연결을 닫을 때 주의 필요. 애플리케이션 종료 시점에 한 번만 호출되도록 관리해야 함.
         if hasattr(self, 'client') and self.client and self._initialized:
+            self.embedding_cache.flush()
             self.client.close()
             logger.info("MongoDB 연결 종료.")
-            self._initialized = False # 연결 종료 시 초기화 상태 해제
+            MongoDBStorage._initialized = False # 연결 종료 시 초기화 상태 해제
             
     # 기존 save_file, list_files, get_file_content, delete_file, vector_search 메소드는 그대로 유지 또는 필요에 따라 수정
-    def save_file(self, file_content: bytes, filename: str, metadata: dict = None):
+    def _get_keyword_tagger(self):
+        """KeyBERT 태그 추출기 반환 (최초 1회만 생성, 모델은 첫 태깅 시 로드)"""
+        with self._init_lock:
+            if not hasattr(self, '_keyword_tagger'):
+                self._keyword_tagger = KeywordTagger()
+        return self._keyword_tagger
+
+    @staticmethod
+    def _create_loader(file_extension, file_path):
+        """파일 형식에 맞는 LangChain 로더 생성. 지원되지 않는 형식이면 None"""
+        from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader, TextLoader
+        if file_extension == '.txt':
+            return TextLoader(file_path)
+        if file_extension == '.pdf':
+            return PyPDFLoader(file_path)
+        if file_extension == '.docx':
+            return Docx2txtLoader(file_path)
+        return None
+
+    def save_file(self, file_content: bytes, filename: str, metadata: dict = None, progress_callback=None):
         """
         파일을 GridFS에 저장하고 내용을 처리하여 벡터 컬렉션에 저장합니다.
         다양한 파일 형식(txt, pdf, docx 등)을 지원합니다.
+        내용 처리는 IngestionPipeline(load → split → embed → tag → write)으로 배치 단위로 진행됩니다.
+        파일과 청크의 SHA-256 해시를 저장하며, 이미 색인된 것과 같은 내용의 청크는 임베딩/태그를 재사용합니다.
+        같은 이름의 파일이 내용만 바뀌어 다시 업로드되면 새 버전을 색인한 뒤 이전 버전을 삭제합니다.
         
         Args:
             file_content (bytes): 저장할 파일 내용 (바이트).
             filename (str): 파일 이름.
             metadata (dict, optional): 파일과 관련된 추가 메타데이터. Defaults to None.
+            progress_callback (callable, optional): 색인 진행 이벤트(dict)를 받는 콜백. Defaults to None.
+
+        Returns:
+            True(색인 완료), "xlsx_saved"(엑셀 저장), "updated"(변경된 파일 재색인),
+            None(같은 이름·같은 내용의 파일이 이미 있음 또는 내용 없음), False(오류)
         """
         if not self.embedding_model:
              logger.error("Embedding 모델이 로드되지 않았습니다. 파일 내용을 저장할 수 없습니다.")
              raise RuntimeError("Embedding model not loaded")
 
-        # 0. 동일한 파일 이름이 이미 GridFS에 존재하는지 확인
-        if self.fs.find_one({'filename': filename}):
-            logger.warning(f"동일한 파일 이름 '{filename}'이(가) GridFS에 이미 존재합니다. 업로드를 건너뜁니다.")
-            # 여기에서 중복 업로드를 방지하고 함수를 종료합니다.
-            # app.py에서 이 경우를 구분하여 사용자에게 알릴 필요가 있다면,
-            # 특정 반환 값(예: False)을 주거나 커스텀 예외를 발생시킬 수 있습니다.
-            # 현재는 로그만 남기고 함수를 정상 종료(None 반환)하도록 합니다.
-            return
-
+        from storage.ingestion_pipeline import content_hash
+        file_hash = content_hash(file_content)
+
+        # 0. 동일한 파일 이름이 이미 GridFS에 존재하는지 확인 (내용까지 같으면 건너뛰고, 바뀌었으면 새 버전으로 교체)
+        previous = self.fs.find_one({'filename': filename})
+        if previous is not None:
+            previous_hash = (previous.metadata or {}).get("content_sha256") or content_hash(previous.read())
+            if previous_hash == file_hash:
+                logger.warning(f"동일한 파일 이름 '{filename}'이(가) 같은 내용으로 GridFS에 이미 존재합니다. 업로드를 건너뜁니다.")
+                # 현재는 로그만 남기고 함수를 정상 종료(None 반환)하도록 합니다.
+                return
+            logger.info(f"'{filename}' 파일 내용이 변경되어 다시 색인합니다 (바뀐 청크만 임베딩). 이전 file_id: {previous._id}")
+        else:
+            duplicate = self.db.fs.files.find_one({"metadata.content_sha256": file_hash}, {"filename": 1})
+            if duplicate is not None:
+                logger.info(f"'{filename}'은(는) '{duplicate['filename']}'과(와) 내용이 같습니다. 기존 청크 임베딩을 재사용합니다.")
+
+        metadata = {**(metadata or {}), "content_sha256": file_hash}
         file_id = None # GridFS에 저장된 파일 ID를 추적하기 위한 변수 초기화
 
+        file_extension = os.path.splitext(filename)[1].lower()
+
+        # 엑셀 파일은 시트 구조/미리보기를 업로드 시 한 번만 추출해 GridFS 메타데이터에 저장
+        # (미리보기/스키마 질의 때 워크북을 다시 파싱하지 않도록 함)
+        if file_extension == '.xlsx':
+            try:
+                from storage.spreadsheet import extract_workbook_metadata
+                metadata = {**metadata, "spreadsheet": extract_workbook_metadata(file_content)}
+            except Exception as e:
+                logger.warning(f"엑셀 시트 메타데이터 추출 실패 ({filename}): {e}")
+
         try:
             # 1. 원본 파일 GridFS에 저장 (이전에 동일 이름 체크를 했으므로 여기서는 중복이 없을 것으로 예상)
             file_id = self.fs.put(file_content, filename=filename, metadata=metadata)
             logger.info(f"원본 파일 '{filename}' GridFS에 저장 완료. file_id: {file_id}")
 
-            # 2. 파일 내용 추출 (파일 형식에 따라 다른 로더 사용)
+            # .xlsx 파일인 경우 GridFS에만 저장하고 벡터 컬렉션에는 추가하지 않습니다.
+            if file_extension == '.xlsx':
+                logger.info(f"XLSX 파일 '{filename}'은 GridFS에만 저장하고 벡터 컬렉션에는 추가하지 않습니다.")
+                # 집계 질의용 열 지향 변환본 저장 (실패해도 원본 저장은 유지, 조회 시 다시 변환)
+                try:
+                    self._save_columnar(file_content, filename, file_id)
+                except Exception as e:
+                    logger.warning(f"스프레드시트 열 지향 변환 실패 ({filename}): {e}")
+                if previous is not None:
+                    self._delete_file_version(previous._id)
+                    self._notify_change("save", filename)
+                    return "updated"
+                self._notify_change("save", filename)
+                return "xlsx_saved" # XLSX 파일 저장 완료를 알리는 문자열 반환
+
+            # 2~4. 파일 내용 추출 → 청크 분할 → 임베딩/태그 → 벡터 컬렉션 저장 (파이프라인)
             temp_file_path = None
             try:
                 # Langchain 로더는 파일 경로를 받는 경우가 많으므로 임시 파일로 저장
                 with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(filename)[1]) as tmp:
                     tmp.write(file_content)
                     temp_file_path = tmp.name
-                    
-                file_extension = os.path.splitext(filename)[1].lower()
-                docs = []
-                
-                # .xlsx 파일인 경우 GridFS에만 저장하고 벡터 컬렉션에는 추가하지 않습니다.
-                if file_extension == '.xlsx':
-                    logger.info(f"XLSX 파일 '{filename}'은 GridFS에만 저장하고 벡터 컬렉션에는 추가하지 않습니다.")
-                    # return # 벡터 컬렉션 저장 로직을 건너뛰고 함수 종료
-                    return "xlsx_saved" # XLSX 파일 저장 완료를 알리는 문자열 반환
-
-                if file_extension == '.txt':
-                    loader = TextLoader(temp_file_path)
-                    docs = loader.load()
-                elif file_extension == '.pdf':
-                    loader = PyPDFLoader(temp_file_path)
-                    docs = loader.load()
-                elif file_extension == '.docx':
-                    loader = Docx2txtLoader(temp_file_path)
-                    docs = loader.load()
-                else:
+
+                loader = self._create_loader(file_extension, temp_file_path)
+                if loader is None:
                     logger.warning(f"지원되지 않는 파일 형식: {filename}")
-                    # 지원되지 않는 형식은 처리하지 않고 넘어갑니다.
-                    # GridFS에 저장된 파일 삭제
-                    if file_id:
-                         self.fs.delete(file_id)
-                         logger.info(f"지원되지 않는 형식 ({filename})으로 인해 GridFS 파일 삭제 완료. file_id: {file_id}")
+                    # 지원되지 않는 형식은 처리하지 않고 GridFS에 저장된 파일 삭제
+                    self.fs.delete(file_id)
+                    logger.info(f"지원되지 않는 형식 ({filename})으로 인해 GridFS 파일 삭제 완료. file_id: {file_id}")
                     return # 파일은 GridFS에 저장되었지만 벡터 컬렉션에는 추가되지 않음
 
+                from storage.ingestion_pipeline import IngestionPipeline
+                pipeline = IngestionPipeline(
+                    self.embedding_model,
+                    self.vector_collection,
+                    tagger=self._get_keyword_tagger(),
+                    local_vector_store=self.local_vector_store,
+                    progress_callback=progress_callback
+                )
+                chunk_count = pipeline.run(loader, filename, file_id)
+
             finally:
                 # 임시 파일 삭제
                 if temp_file_path and os.path.exists(temp_file_path):
                     os.remove(temp_file_path)
 
-            if not docs:
+            if not chunk_count:
                  logger.warning(f"파일 내용 로드 실패 또는 내용 없음: {filename}")
                  # 내용 로드 실패 시 GridFS에 저장된 파일 삭제
-                 if file_id:
-                      self.fs.delete(file_id)
-                      logger.info(f"내용 로드 실패 ({filename})로 인해 GridFS 파일 삭제 완료. file_id: {file_id}")
+                 self.fs.delete(file_id)
+                 logger.info(f"내용 로드 실패 ({filename})로 인해 GridFS 파일 삭제 완료. file_id: {file_id}")
                  return # 문서 로드 실패 시 처리 중단
 
-            # 3. 로드된 문서를 청크로 분할
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=CHUNK_SIZE,
-                chunk_overlap=CHUNK_OVERLAP,
-                length_function=len,
-                is_separator_regex=False,
-            )
-            chunks = text_splitter.split_documents(docs) # Document 객체 리스트를 받도록 변경
-            
-            # 각 청크(Document 객체)에 대한 벡터 임베딩 생성
-            chunk_texts = [chunk.page_content for chunk in chunks]
-            embeddings = self.embedding_model.embed_documents(chunk_texts)
-            logger.info(f"{len(embeddings)}개의 청크 임베딩 생성 완료.")
-
-            # KeyBERT로 태그 추출기 준비 (최초 1회만 로드)
-            if not hasattr(self, '_keybert_model'):
-                self._keybert_model = KeyBERT()
-            kw_model = self._keybert_model
-
-            # 4. 각 청크의 벡터 임베딩 및 메타데이터를 별도 컬렉션에 저장
-            chunks_to_insert = []
-            for i, chunk in enumerate(chunks):
-                # KeyBERT로 주요 키워드 추출 (상위 5개, 단어만)
-                keywords = [kw for kw, _ in kw_model.extract_keywords(chunk.page_content, top_n=5)]
-                chunk_metadata = {
-                    "filename": filename,
-                    "chunk_index": i, # 청크 순서
-                    "original_file_id": file_id, # GridFS 파일 ID 참조
-                    "tags": keywords, # 자동 추출 태그
-                    **chunk.metadata
-                }
-                chunk_document = {
-                    "content": chunk.page_content,
-                    "metadata": chunk_metadata,
-                    "embedding": embeddings[i] # 실제 임베딩 값 추가
-                }
-                chunks_to_insert.append(chunk_document)
-
-            if chunks_to_insert:
-                self.vector_collection.insert_many(chunks_to_insert)
-                logger.info(f"{len(chunks_to_insert)}개의 청크 문서 벡터 컬렉션에 저장 완료.")
-
+            logger.info(f"{chunk_count}개의 청크 문서 벡터 컬렉션에 저장 완료.")
+            if previous is not None:
+                # 새 버전 색인이 끝난 뒤 이전 버전 삭제 (실패하면 이전 버전이 그대로 남음)
+                self._delete_file_version(previous._id)
+                self._notify_change("save", filename)
+                return "updated"
+            self._notify_change("save", filename)
             return True # 일반 파일 저장 및 벡터 컬렉션 추가 완료 시 True 반환
 
         except Exception as e:
             logger.error(f"파일 저장 및 처리 중 오류 발생: {e}")
-            # 오류 발생 시 GridFS에 저장된 파일 삭제
+            # 오류 발생 시 GridFS 파일과 이미 기록된 청크 삭제
             if file_id: # file_id가 생성되었는지 확인 (GridFS 저장 성공했는지 확인)
                  try:
-                     self.fs.delete(file_id)
-                     logger.warning(f"오류 발생으로 인해 GridFS 파일 삭제 완료. file_id: {file_id}")
+                     self._delete_file_version(file_id)
+                     logger.warning(f"오류 발생으로 인해 GridFS 파일 및 기록된 청크 삭제 완료. file_id: {file_id}")
                  except Exception as delete_e:
                      logger.error(f"오류 발생 후 GridFS 파일 삭제 중 오류 발생: {delete_e}")
             # raise # 오류를 상위 호출자로 전파 (app.py에서 이 오류를 받아 사용자에게 표시)
             return False # 오류 발생 시 False 반환
             
+    # 파일 목록 조회 시 가져올 필드 (내용 청크는 읽지 않음)
+    FILE_INFO_PROJECTION = {"filename": 1, "length": 1, "uploadDate": 1}
+
+    @staticmethod
+    def _to_file_info(doc):
+        return {
+            '_id': str(doc['_id']), # ObjectId를 문자열로 변환
+            'filename': doc.get('filename'),
+            'length': doc.get('length', 0),
+            'uploadDate': doc.get('uploadDate') # 업로드 날짜 추가
+        }
+
     def list_files(self):
         """GridFS에 저장된 원본 파일 목록을 조회합니다. 파일 ID, 이름, 크기를 포함합니다."""
         try:
-            # self.fs.list() 대신 self.fs.find()를 사용하여 파일 문서를 가져옵니다.
-            # 파일 문서에서 필요한 정보만 추출하여 목록으로 반환합니다.
-            file_infos = []
-            for file in self.fs.find():
-                file_infos.append({
-                    '_id': str(file._id), # ObjectId를 문자열로 변환
-                    'filename': file.filename,
-                    'length': file.length,
-                    'uploadDate': file.upload_date # 업로드 날짜 추가
-                })
+            # fs.files 컬렉션에서 메타데이터 필드만 조회합니다.
+            cursor = self.db.fs.files.find({}, self.FILE_INFO_PROJECTION)
+            file_infos = [self._to_file_info(doc) for doc in cursor]
             logger.info(f"GridFS 파일 목록 조회 성공. {len(file_infos)}개 파일.")
             return file_infos
         except Exception as e:
             logger.error(f"GridFS 파일 목록 조회 오류: {e}")
             raise
 
+    def list_files_page(self, skip: int = 0, limit: int = FILE_LIST_PAGE_SIZE):
+        """
+        GridFS 파일 목록을 페이지 단위로 조회합니다 (최근 업로드 순, 메타데이터만).
+
+        Args:
+            skip (int): 건너뛸 파일 수
+            limit (int): 가져올 최대 파일 수
+
+        Returns:
+            tuple: (파일 정보 목록, 전체 파일 수)
+        """
+        try:
+            cursor = (
+                self.db.fs.files.find({}, self.FILE_INFO_PROJECTION)
+                .sort([("uploadDate", -1), ("_id", -1)])
+                .skip(skip)
+                .limit(limit)
+            )
+            file_infos = [self._to_file_info(doc) for doc in cursor]
+            total = self.db.fs.files.count_documents({})
+            return file_infos, total
+        except Exception as e:
+            logger.error(f"GridFS 파일 목록 페이지 조회 오류: {e}")
+            raise
+
+    def open_file(self, file_id: str = None, filename: str = None, start: int = 0, end: int = None):
+        """
+        GridFS 파일을 스트리밍 파일 객체(GridFSReader)로 엽니다. 내용은 읽을 때 청크 단위로 가져옵니다.
+
+        Args:
+            file_id (str, optional): GridFS 파일 ID (filename보다 우선)
+            filename (str, optional): 파일 이름
+            start (int): 범위 시작 바이트 (포함)
+            end (int, optional): 범위 끝 바이트 (미포함). None이면 파일 끝
+
+        Returns:
+            GridFSReader: 파일 객체. 파일이 없으면 None
+        """
+        from bson.objectid import ObjectId
+        if file_id:
+            grid_out = self.fs.find_one({"_id": ObjectId(file_id)})
+        elif filename:
+            grid_out = self.fs.find_one({"filename": filename})
+        else:
+            raise ValueError("file_id 또는 filename 중 하나는 반드시 입력해야 합니다.")
+        if grid_out is None:
+            logger.warning(f"파일 '{file_id or filename}' GridFS에서 찾을 수 없음.")
+            return None
+        return GridFSReader(grid_out, start=start, end=end)
+
+    def iter_file_chunks(self, file_id: str, start: int = 0, end: int = None):
+        """
+        GridFS 파일 내용(또는 바이트 범위)을 저장된 청크 단위로 순서대로 읽어 반환하는 제너레이터.
+        파일 전체를 한 번에 메모리에 올리지 않습니다.
+
+        Args:
+            file_id (str): GridFS 파일 ID
+            start (int): 범위 시작 바이트 (포함)
+            end (int, optional): 범위 끝 바이트 (미포함)
+
+        Yields:
+            bytes: 파일 내용 조각
+        """
+        reader = self.open_file(file_id=file_id, start=start, end=end)
+        if reader is None:
+            return
+        with reader:
+            yield from reader.iter_chunks()
+
     def get_file_content(self, filename: str):
-        """GridFS에 저장된 특정 원본 파일의 내용을 가져옵니다."""
+        """
+        GridFS에 저장된 특정 원본 파일의 내용을 bytes로 가져옵니다.
+        큰 파일은 open_file()/iter_file_chunks()로 스트리밍해서 읽는 것을 권장합니다.
+        """
         try:
-            file = self.fs.find_one({"filename": filename})
-            if file:
-                content = file.read()
-                logger.info(f"파일 '{filename}' 내용 조회 성공.")
-                return content
-            else:
-                logger.warning(f"파일 '{filename}' GridFS에서 찾을 수 없음.")
+            reader = self.open_file(filename=filename)
+            if reader is None:
                 return None
+            with reader:
+                content = reader.readall()
+            logger.info(f"파일 '{filename}' 내용 조회 성공.")
+            return content
         except Exception as e:
             logger.error(f"파일 '{filename}' 내용 조회 오류: {e}")
             raise
 
     def get_file_content_by_id(self, file_id: str):
-        """GridFS에 저장된 특정 원본 파일의 내용을 ID로 가져옵니다."""
+        """
+        GridFS에 저장된 특정 원본 파일의 내용을 ID로 가져옵니다.
+        큰 파일은 open_file()/iter_file_chunks()로 스트리밍해서 읽는 것을 권장합니다.
+        """
         try:
-            from bson.objectid import ObjectId # ObjectId 임포트
-            # 문자열 file_id를 ObjectId로 변환
-            object_id = ObjectId(file_id)
-            file = self.fs.find_one({"_id": object_id})
-            if file:
-                content = file.read()
-                logger.info(f"파일 ID '{file_id}' 내용 조회 성공.")
-                return content
-            else:
-                logger.warning(f"파일 ID '{file_id}' GridFS에서 찾을 수 없음.")
+            reader = self.open_file(file_id=file_id)
+            if reader is None:
                 return None
+            with reader:
+                content = reader.readall()
+            logger.info(f"파일 ID '{file_id}' 내용 조회 성공.")
+            return content
         except Exception as e:
             logger.error(f"파일 ID '{file_id}' 내용 조회 오류: {e}")
             raise
@@ -321,13 +541,9 @@ class MongoDBStorage:
             # GridFS 파일 조회 및 삭제
             file = self.fs.find_one({"filename": filename})
             if file:
-                file_id = file._id
-                self.fs.delete(file_id)
-                logger.info(f"원본 파일 '{filename}' GridFS에서 삭제 완료.")
-
-                # 연결된 벡터 컬렉션 문서 삭제
-                delete_result = self.vector_collection.delete_many({"metadata.original_file_id": file_id})
-                logger.info(f"벡터 컬렉션에서 연결된 문서 {delete_result.deleted_count}개 삭제 완료.")
+                self._delete_file_version(file._id)
+                logger.info(f"원본 파일 '{filename}' 및 연결된 청크 삭제 완료.")
+                self._notify_change("delete", filename)
 
             else:
                 logger.warning(f"파일 '{filename}' 삭제 - GridFS에서 찾을 수 없음.")
@@ -336,48 +552,224 @@ class MongoDBStorage:
             logger.error(f"파일 '{filename}' 삭제 중 오류 발생: {e}")
             raise
             
-    def vector_search(self, query: str, file_filter: str = None, tags_filter: list[str] = None, top_k: int = TOP_K_RESULTS):
+    def _delete_file_version(self, file_id):
+        """GridFS 파일 하나와 연결된 청크(벡터 컬렉션, 로컬 인덱스), 열 지향 변환본을 삭제합니다."""
+        delete_result = self.vector_collection.delete_many({"metadata.original_file_id": file_id})
+        logger.info(f"벡터 컬렉션에서 file_id={file_id} 문서 {delete_result.deleted_count}개 삭제")
+        if self.local_vector_store is not None:
+            self.local_vector_store.delete_by_file_id(file_id)
+        self._delete_columnar(file_id)
+        self.fs.delete(file_id)
+
+    def _save_columnar(self, file_content, filename, file_id):
+        """워크북의 각 시트를 Parquet으로 변환해 열 지향 버킷에 저장"""
+        from storage.spreadsheet import workbook_to_parquet
+        tables = workbook_to_parquet(file_content)
+        for sheet_index, (sheet_name, data) in enumerate(tables.items()):
+            self.columnar_fs.put(
+                data,
+                filename=f"{filename}::{sheet_name}.parquet",
+                metadata={"source_file_id": file_id, "sheet": sheet_name, "sheet_index": sheet_index}
+            )
+        logger.info(f"스프레드시트 열 지향 변환 저장: {filename}, 시트 {len(tables)}개")
+        return tables
+
+    def _delete_columnar(self, file_id):
+        """원본 파일에 연결된 열 지향 변환본과 메모리 캐시 삭제"""
+        for grid_out in self.columnar_fs.find({"metadata.source_file_id": file_id}):
+            self.columnar_fs.delete(grid_out._id)
+        self._sheet_frames.remove_where(lambda key, frame: key[0] == str(file_id))
+
+    def load_sheet_frame(self, file_id: str, sheet_name: str = None):
+        """
+        스프레드시트 시트를 열 지향 변환본(Parquet)에서 DataFrame으로 읽습니다.
+        최근 사용한 시트는 메모리에 유지하며, 변환본이 없는 파일(이전 업로드)은 이때 한 번 변환해 저장합니다.
+
+        Args:
+            file_id (str): 원본 엑셀 파일의 GridFS ID
+            sheet_name (str, optional): 시트 이름. 기본값은 첫 번째 시트
+
+        Returns:
+            tuple: (시트 이름, DataFrame). 시트를 찾을 수 없으면 (None, None)
         """
-        MongoDB Atlas Vector Search를 사용하여 문서를 검색합니다.
+        from bson.objectid import ObjectId
+        cache_key = (str(file_id), sheet_name)
+        cached = self._sheet_frames.get(cache_key)
+        if cached is not None:
+            return cached
+
+        source_id = ObjectId(file_id)
+        query = {"metadata.source_file_id": source_id}
+        if sheet_name:
+            query["metadata.sheet"] = sheet_name
+        grid_out = next(iter(self.columnar_fs.find(query).sort("metadata.sheet_index", 1).limit(1)), None)
+        if grid_out is not None:
+            resolved_sheet, data = grid_out.metadata["sheet"], grid_out.read()
+        else:
+            original = self.fs.find_one({"_id": source_id})
+            if original is None:
+                return None, None
+            tables = self._save_columnar(original.read(), original.filename, source_id)
+            if sheet_name:
+                resolved_sheet, data = sheet_name, tables.get(sheet_name)
+            else:
+                resolved_sheet, data = next(iter(tables.items()), (None, None))
+            if data is None:
+                return None, None
+
+        from storage.spreadsheet import read_parquet_frame
+        result = (resolved_sheet, read_parquet_frame(data))
+        self._sheet_frames.set(cache_key, result)
+        return result
+
+    def embed_query(self, query: str):
+        """쿼리 문자열을 임베딩 벡터로 변환합니다. 동일한(정규화 기준) 쿼리는 캐시에서 반환합니다."""
+        if not self.embedding_model:
+            raise RuntimeError("Embedding model not loaded")
+        vector = self.embedding_cache.get_or_compute(query, self.embedding_model.embed_query)
+        return vector.tolist()
+
+    def sync_local_vector_store(self):
+        """벡터 컬렉션의 모든 청크로 로컬 벡터 인덱스를 다시 만듭니다."""
+        if self.local_vector_store is None:
+            return 0
+        documents = list(self.vector_collection.find({}, {"content": 1, "metadata": 1, "embedding": 1}))
+        self.local_vector_store.rebuild(documents)
+        return len(documents)
+
+    def vector_search(self, query: str, file_filter: str = None, tags_filter: list[str] = None, top_k: int = TOP_K_RESULTS,
+                      mode: str = None, shape: ResultShape = None):
+        """
+        검색 모드(RETRIEVAL_MODE)에 따라 문서를 검색합니다.
+        - vector: MongoDB Atlas Vector Search(또는 VECTOR_STORE_BACKEND=local이면 로컬 인덱스)
+        - lexical: 키워드(BM25) 역색인만 사용 (임베딩 호출 없음)
+        - hybrid: BM25와 벡터 검색 결과를 RRF로 결합. 짧은 질의의 단어가 최상위 청크에 모두 있으면
+          (제품 코드, 고유명사 등) 임베딩 없이 BM25 결과를 바로 반환합니다.
         
         Args:
             query (str): 검색할 쿼리.
             file_filter (str, optional): 검색 결과를 필터링할 특정 파일 이름. Defaults to None.
             tags_filter (list[str], optional): 검색 결과를 필터링할 태그 목록. Defaults to None.
             top_k (int, optional): 반환할 검색 결과의 최대 개수. Defaults to TOP_K_RESULTS.
+            mode (str, optional): 검색 모드 재정의 ("vector", "hybrid", "lexical"). Defaults to RETRIEVAL_MODE.
+            shape (ResultShape, optional): 결과 형태 (스니펫 길이, 하이라이트, 메타데이터 필드). Defaults to config 값.
             
         Returns:
-            list: 검색 결과 문서 목록 (dict).
+            list[SearchHit]: 검색 결과 (점수 내림차순)
+        """
+        mode = (mode or RETRIEVAL_MODE).lower()
+        shape = shape or ResultShape()
+        # 파일 필터는 여기서 한 번만 파일 ID로 변환해 모든 백엔드(BM25/로컬/Atlas)에 같은 조건으로 적용
+        file_ids = self._resolve_file_filter(file_filter)
+        if mode == "lexical":
+            self.retrieval_stats["lexical"] += 1
+            return self.lexical_search(query, file_ids, tags_filter, top_k, shape)
+        if mode == "hybrid":
+            self.retrieval_stats["hybrid"] += 1
+            return self.hybrid_search(query, file_ids, tags_filter, top_k, shape)
+        self.retrieval_stats["vector"] += 1
+        return self.dense_search(query, file_ids, tags_filter, top_k, shape)
+
+    def _resolve_file_filter(self, file_filter: str):
+        """
+        파일 필터 문자열을 파일 ID 목록으로 변환합니다 (resolve_file_ids).
+        일치하는 파일이 없으면 None을 반환해 필터 없이 전체 문서에서 검색합니다.
+        """
+        if not file_filter:
+            return None
+        file_ids = self.resolve_file_ids(file_filter)
+        if not file_ids:
+            logger.warning(f"파일 필터 '{file_filter}'에 해당하는 파일이 없어 전체 문서에서 검색합니다.")
+            return None
+        return file_ids
+
+    def lexical_search(self, query: str, file_ids: list = None, tags_filter: list[str] = None, top_k: int = TOP_K_RESULTS,
+                       shape: ResultShape = None):
+        """키워드(BM25) 역색인으로 문서를 검색합니다. (vector_search와 같은 결과 형식, file_ids는 resolve_file_ids 결과)"""
+        results = self.lexical_index.search(query, file_ids, tags_filter, top_k)
+        logger.info(f"키워드(BM25) 검색 완료. {len(results)}개 결과 반환.")
+        return self._to_hits(results, query, shape)
+
+    @staticmethod
+    def _to_hits(documents, query, shape):
+        """청크 문서 목록(로컬/키워드 검색 결과)을 SearchHit 목록으로 변환"""
+        shape = shape or ResultShape()
+        terms = highlight_terms(query)
+        return [SearchHit.from_document(doc, shape, terms) for doc in documents]
+
+    def is_strong_lexical_match(self, query: str, lexical_results: list) -> bool:
+        """짧은 키워드 질의이고 최상위 BM25 청크가 질의 단어를 충분히 포함하면 True (벡터 검색 생략 가능)"""
+        if not lexical_results:
+            return False
+        words = query_words(query)
+        return 0 < len(words) <= LEXICAL_FAST_PATH_MAX_TERMS and lexical_results[0]["coverage"] >= LEXICAL_FAST_PATH_MIN_COVERAGE
+
+    def hybrid_search(self, query: str, file_ids: list = None, tags_filter: list[str] = None, top_k: int = TOP_K_RESULTS,
+                      shape: ResultShape = None):
+        """BM25와 벡터 검색 결과를 RRF로 결합합니다. (키워드 일치가 강하면 BM25 결과만 반환, file_ids는 resolve_file_ids 결과)"""
+        candidates = max(top_k, HYBRID_CANDIDATES)
+        lexical_results = self.lexical_index.search(query, file_ids, tags_filter, candidates)
+        if LEXICAL_FAST_PATH_ENABLED and self.is_strong_lexical_match(query, lexical_results):
+            self.retrieval_stats["fast_path"] += 1
+            logger.info(f"키워드 일치가 강해 벡터 검색 생략. BM25 결과 {min(top_k, len(lexical_results))}개 반환.")
+            return self._to_hits(lexical_results[:top_k], query, shape)
+        lexical_hits = self._to_hits(lexical_results, query, shape)
+        if not self.embedding_model:
+            return lexical_hits[:top_k]
+        dense_hits = self.dense_search(query, file_ids, tags_filter, candidates, shape)
+        fused = reciprocal_rank_fusion([dense_hits, lexical_hits], key=lambda hit: (hit.file_id, hit.chunk_index), top_k=top_k)
+        logger.info(f"하이브리드 검색 완료 (BM25 {len(lexical_hits)}개 + 벡터 {len(dense_hits)}개 → {len(fused)}개).")
+        return [hit._replace(score=score) for hit, score in fused]
+
+    def dense_search(self, query: str, file_ids: list = None, tags_filter: list[str] = None, top_k: int = TOP_K_RESULTS,
+                     shape: ResultShape = None):
+        """
+        MongoDB Atlas Vector Search(또는 VECTOR_STORE_BACKEND=local이면 로컬 인덱스)를 사용하여 문서를 검색합니다.
+        Atlas에서는 결과 형태(shape)대로 스니펫과 필요한 필드만 집계 파이프라인 안에서 만들어 가져옵니다.
+        file_ids는 resolve_file_ids 결과(파일 ID 목록)이며 $vectorSearch 안에서 사전 필터링합니다.
+
+        Returns:
+            list[SearchHit]: 검색 결과 (점수 내림차순)
         """
+        shape = shape or ResultShape()
         if not self.embedding_model:
              logger.error("Embedding 모델이 로드되지 않았습니다. 벡터 검색을 수행할 수 없습니다.")
              return [] # 모델 없으면 빈 결과 반환
 
         try:
             # 쿼리 문자열을 벡터 임베딩으로 변환
-            query_embedding = self.embedding_model.embed_query(query)
+            query_embedding = self.embed_query(query)
 
-            # 필터 조건 설정
-            filter_conditions = {}
-            # if file_filter: # 파일 필터링 기능을 비활성화하기 위해 이 부분을 주석 처리합니다.
-            #     filter_conditions['metadata.filename'] = file_filter
-            if tags_filter:
-                filter_conditions['metadata.tags'] = { '$in': tags_filter }
+            if self.local_vector_store is not None:
+                search_results = self.local_vector_store.search(query_embedding, file_ids, tags_filter, top_k)
+                logger.info(f"로컬 벡터 검색 완료. {len(search_results)}개 결과 반환.")
+                return self._to_hits(search_results, query, shape)
 
+            # 필터 조건 설정 (파일 ID/태그로 $vectorSearch 안에서 사전 필터링)
+            filter_conditions = []
+            if file_ids:
+                filter_conditions.append({'metadata.original_file_id': {'$in': list(file_ids)}})
+            if tags_filter:
+                filter_conditions.append({'metadata.tags': {'$in': tags_filter}})
+            if len(filter_conditions) > 1:
+                filter_conditions = {'$and': filter_conditions}
+            else:
+                filter_conditions = filter_conditions[0] if filter_conditions else {}
+
+            vector_stage = {
+                'queryVector': query_embedding,
+                'path': 'embedding', # 벡터 필드 이름
+                'limit': top_k,
+                'index': VECTOR_INDEX_NAME, # 필터 필드가 선언된 Atlas 벡터 인덱스 (ensure_vector_index)
+                **self._candidate_options(filter_conditions, top_k)
+            }
+            if filter_conditions:
+                vector_stage['filter'] = filter_conditions
             pipeline = [
-                {
-                    '$vectorSearch': {
-                        'queryVector': query_embedding,
-                        'path': 'embedding', # 벡터 필드 이름
-                        'numCandidates': top_k * 10, # 검색 효율을 위해 top_k보다 크게 설정
-                        'limit': top_k,
-                        'index': 'vector_index', # MongoDB Atlas에서 생성한 벡터 인덱스 이름
-                        # 필터 조건 추가
-                        'filter': filter_conditions # filter_conditions가 비어있으면 필터링되지 않음
-                    }
-                },
+                { '$vectorSearch': vector_stage },
                  { '$addFields': { 'score': { '$meta': 'vectorSearchScore' } } }, # 유사도 점수 추가
-                 { '$project': { '_id': 0, 'content': 1, 'metadata': 1, 'score': 1 } } # 필요한 필드만 선택
+                 # 본문 전체/메타데이터 전체 대신 스니펫과 필요한 필드만 서버에서 잘라 전송
+                 *snippet_projection_stages(shape, highlight_terms(query))
             ]
             
             # $vectorSearch 내 filter 필드 사용 시 $match 스테이지는 필요 없습니다.
@@ -385,24 +777,57 @@ class MongoDBStorage:
             #     pipeline.append({'$match': match_conditions})
 
             # 검색 실행
-            search_results = list(self.vector_collection.aggregate(pipeline))
-            
-            # 검색 결과에 score를 포함시키려면 $addFields 스테이지를 추가해야 합니다.
-            # 예: { '$addFields': { '$score': { '$meta': 'vectorSearchScore' } } }
-            # $vectorSearch 스테이지 바로 뒤 또는 $match 스테이지 뒤에 추가할 수 있습니다.
-            # 현재는 score를 반환한다고 가정하고 internal_vector_search.py에서 사용하고 있습니다.
-            # 실제 구현 시 필요에 따라 추가하십시오.
+            search_results = [SearchHit.from_projection(doc) for doc in self.vector_collection.aggregate(pipeline)]
 
             logger.info(f"MongoDB 벡터 검색 완료. {len(search_results)}개 결과 반환.")
-            # 검색 결과 형태에 따라 가공 필요
-            # 예: search_results = [doc['content'] for doc in search_results]
-
-            return search_results # 필요한 필드만 포함하도록 $project 사용 고려
+            return search_results
             
         except Exception as e:
             logger.error(f"MongoDB 벡터 검색 중 오류 발생: {e}")
             raise
         
+    def resolve_file_ids(self, file_filter: str):
+        """
+        파일 필터 문자열을 GridFS 파일 ID 목록으로 변환합니다 (파일 카탈로그 사용, 컬렉션 스캔 없음).
+        정확 일치 → 부분 일치 → 가장 비슷한 파일 하나 순서로 찾습니다.
+
+        Returns:
+            list: ObjectId 목록 (없으면 빈 목록)
+        """
+        from bson.objectid import ObjectId
+        exact = self.file_catalog.get(file_filter)
+        if exact is not None:
+            matches = [exact]
+        else:
+            matches = self.file_catalog.search(file_filter) or [info for info, _ in self.file_catalog.fuzzy(file_filter, limit=1)]
+        return [ObjectId(info["_id"]) for info in matches]
+
+    def _candidate_options(self, filter_conditions, top_k):
+        """
+        $vectorSearch의 numCandidates(또는 exact)를 필터 선택도에 맞게 결정합니다.
+        - 필터 없음: top_k x VECTOR_NUM_CANDIDATES_MULTIPLIER
+        - 필터에 맞는 청크가 VECTOR_EXACT_SEARCH_MAX_CHUNKS 이하: 정확(ENN) 검색 - 후보 탐색 없이 해당 청크만 비교
+        - 그 외: 선택도가 낮을수록(걸러지는 청크가 많을수록) 후보를 늘려 recall을 유지하되,
+          필터에 맞는 청크 수와 VECTOR_NUM_CANDIDATES_MAX를 넘지 않도록 제한
+        """
+        base = max(top_k, top_k * VECTOR_NUM_CANDIDATES_MULTIPLIER)
+        if not filter_conditions:
+            return {'numCandidates': min(base, VECTOR_NUM_CANDIDATES_MAX)}
+        try:
+            matching = self.vector_collection.count_documents(filter_conditions, maxTimeMS=500)
+            total = self.vector_collection.estimated_document_count() or 1
+        except Exception as e:
+            logger.warning(f"필터 선택도 계산 실패, 기본 후보 수 사용: {e}")
+            return {'numCandidates': min(base, VECTOR_NUM_CANDIDATES_MAX)}
+        if matching <= VECTOR_EXACT_SEARCH_MAX_CHUNKS:
+            logger.info(f"필터에 맞는 청크 {matching}개 → 정확(ENN) 벡터 검색")
+            return {'exact': True}
+        selectivity = max(matching / total, 1e-3)
+        num_candidates = min(int(base / selectivity), matching, VECTOR_NUM_CANDIDATES_MAX)
+        num_candidates = max(num_candidates, top_k)
+        logger.info(f"필터 선택도 {selectivity:.3f} (청크 {matching}/{total}) → numCandidates {num_candidates}")
+        return {'numCandidates': num_candidates}
+
     def is_file_exist(self, filename: str) -> bool:
         """GridFS에 특정 이름의 파일이 존재하는지 확인합니다."""
         try:
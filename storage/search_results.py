@@ -0,0 +1,121 @@
+# storage/search_results.py
+
+from typing import NamedTuple
+from config import SEARCH_SNIPPET_LENGTH, SEARCH_SNIPPET_HIGHLIGHT, SEARCH_RESULT_FIELDS
+from storage.lexical_index import query_words
+
+ELLIPSIS = "..."
+
+class ResultShape(NamedTuple):
+    """
+    검색 결과 형태 - 결과당 본문(스니펫) 길이, 질의 단어 주변 하이라이트 여부, 함께 반환할 메타데이터 필드.
+    Atlas 검색에서는 이 형태대로 집계 파이프라인 안에서 잘라 필요한 만큼만 전송합니다.
+    """
+    snippet_length: int = SEARCH_SNIPPET_LENGTH
+    highlight: bool = SEARCH_SNIPPET_HIGHLIGHT
+    fields: tuple = tuple(SEARCH_RESULT_FIELDS)
+
+    @property
+    def lead(self):
+        """하이라이트 시 첫 일치 위치 앞에 남길 글자 수"""
+        return self.snippet_length // 4
+
+class SearchHit(NamedTuple):
+    """검색 결과 한 건 (청크 본문 전체 대신 스니펫과 요청한 메타데이터 필드만 보관)"""
+    file_id: str
+    filename: str
+    chunk_index: int
+    score: float
+    snippet: str
+    fields: dict = {}
+
+    @classmethod
+    def from_document(cls, doc, shape, terms):
+        """청크 문서({"content", "metadata", "score"})에서 결과를 만듭니다 (로컬/키워드 검색 결과용)."""
+        metadata = doc.get("metadata", {})
+        return cls(
+            file_id=str(metadata.get("original_file_id")),
+            filename=metadata.get("filename"),
+            chunk_index=metadata.get("chunk_index"),
+            score=doc.get("score"),
+            snippet=make_snippet(doc.get("content") or "", terms, shape),
+            fields={name: metadata.get(name) for name in shape.fields}
+        )
+
+    @classmethod
+    def from_projection(cls, doc):
+        """snippet_projection_stages로 집계한 문서에서 결과를 만듭니다."""
+        snippet = doc.get("snippet") or ""
+        if doc.get("head_truncated"):
+            snippet = ELLIPSIS + snippet
+        if doc.get("tail_truncated"):
+            snippet += ELLIPSIS
+        return cls(
+            file_id=doc.get("file_id"),
+            filename=doc.get("filename"),
+            chunk_index=doc.get("chunk_index"),
+            score=doc.get("score"),
+            snippet=snippet,
+            fields=doc.get("fields") or {}
+        )
+
+    def to_dict(self):
+        """도구 결과(JSON)용 dict - 스니펫은 기존 결과 형식과 같이 content 키로 반환"""
+        return {"filename": self.filename, "chunk_index": self.chunk_index, "score": self.score, "content": self.snippet, **self.fields}
+
+def highlight_terms(query, limit=5):
+    """스니펫 위치를 정할 질의 단어 (두 글자 이상, 소문자)"""
+    return [word for word in dict.fromkeys(query_words(query)) if len(word) >= 2][:limit]
+
+def make_snippet(content, terms, shape):
+    """
+    본문에서 스니펫을 자릅니다. 하이라이트가 켜져 있으면 질의 단어가 처음 나오는 위치 주변을,
+    아니면 앞부분을 자르며, 잘린 쪽에는 말줄임표를 붙입니다.
+    (snippet_projection_stages와 같은 규칙)
+    """
+    start = 0
+    if shape.highlight and terms:
+        lowered = content.lower()
+        positions = [pos for pos in (lowered.find(term) for term in terms) if pos >= 0]
+        if positions:
+            start = max(0, min(positions) - shape.lead)
+    snippet = content[start:start + shape.snippet_length]
+    if start > 0:
+        snippet = ELLIPSIS + snippet
+    if len(content) > start + shape.snippet_length:
+        snippet += ELLIPSIS
+    return snippet
+
+def snippet_projection_stages(shape, terms):
+    """
+    집계 파이프라인에서 결과를 shape대로 잘라 반환하는 스테이지 목록 ($vectorSearch와 score 추가 뒤에 붙임).
+    본문 전체와 메타데이터 전체 대신 스니펫, 파일 ID/이름, 청크 순번, 점수, 요청한 필드만 전송됩니다.
+    """
+    start = 0
+    if shape.highlight and terms:
+        lowered = {"$toLower": "$content"}
+        start = {
+            "$let": {
+                "vars": {"first": {"$min": {"$filter": {
+                    "input": [{"$indexOfCP": [lowered, term]} for term in terms],
+                    "cond": {"$gte": ["$$this", 0]}
+                }}}},
+                "in": {"$cond": [
+                    {"$eq": ["$$first", None]}, 0,
+                    {"$max": [0, {"$subtract": ["$$first", shape.lead]}]}
+                ]}
+            }
+        }
+    projection = {
+        "_id": 0,
+        "file_id": {"$toString": "$metadata.original_file_id"},
+        "filename": "$metadata.filename",
+        "chunk_index": "$metadata.chunk_index",
+        "score": 1,
+        "snippet": {"$substrCP": ["$content", "$_snippet_start", shape.snippet_length]},
+        "head_truncated": {"$gt": ["$_snippet_start", 0]},
+        "tail_truncated": {"$gt": [{"$strLenCP": "$content"}, {"$add": ["$_snippet_start", shape.snippet_length]}]}
+    }
+    if shape.fields:
+        projection["fields"] = {name: f"$metadata.{name}" for name in shape.fields}
+    return [{"$addFields": {"_snippet_start": start}}, {"$project": projection}]
@@ -0,0 +1,163 @@
+# storage/spreadsheet.py
+
+import io
+import datetime
+from decimal import Decimal
+import pandas as pd
+from openpyxl import load_workbook
+from utils.logger import setup_logger
+from config import EXCEL_PREVIEW_ROWS, EXCEL_DTYPE_SAMPLE_ROWS
+
+logger = setup_logger(__name__)
+
+def _cell_value(value):
+    """셀 값을 JSON/BSON으로 저장 가능한 값으로 변환"""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+def _column_names(header_row):
+    """첫 행을 열 이름으로 사용 (비어 있는 열은 pandas와 같이 'Unnamed: i', 중복 이름은 '이름.1' 형태)"""
+    names, seen = [], {}
+    for i, v in enumerate(header_row):
+        name = str(v) if v is not None else f"Unnamed: {i}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+def _row_values(row, width, convert=True):
+    """행 값을 열 수에 맞춰 변환 (짧은 행은 None으로 채움)"""
+    values = [_cell_value(v) if convert else v for v in row[:width]]
+    return values + [None] * (width - len(values))
+
+def _open_workbook(buffer):
+    """읽기 전용(스트리밍) 모드로 워크북 열기 - 시트는 행을 순회할 때만 파싱됨"""
+    if isinstance(buffer, (bytes, bytearray)):
+        buffer = io.BytesIO(buffer)
+    return load_workbook(buffer, read_only=True, data_only=True)
+
+def _read_rows(worksheet, max_rows=None, convert=True):
+    """시트를 위에서부터 순회하며 (열 이름, 데이터 행 목록)을 반환합니다. max_rows개를 읽으면 중단합니다."""
+    rows_iter = worksheet.iter_rows(values_only=True)
+    header = next(rows_iter, None)
+    if header is None:
+        return [], []
+    columns = _column_names(header)
+    rows = []
+    for row in rows_iter:
+        if max_rows is not None and len(rows) >= max_rows:
+            break
+        rows.append(_row_values(row, len(columns), convert))
+    return columns, rows
+
+def _infer_dtypes(columns, rows):
+    if not rows:
+        return {column: "object" for column in columns}
+    frame = pd.DataFrame(rows, columns=columns).infer_objects()
+    return {column: str(dtype) for column, dtype in frame.dtypes.items()}
+
+def read_preview(buffer, sheet_name=None, nrows=EXCEL_PREVIEW_ROWS):
+    """
+    워크북의 한 시트에서 상위 nrows개 행만 읽어 미리보기를 만듭니다.
+    읽기 전용 모드로 필요한 행까지만 파싱하므로 큰 워크북도 전체를 DataFrame으로 만들지 않습니다.
+
+    Args:
+        buffer (bytes | file-like): 엑셀 파일 내용
+        sheet_name (str, optional): 시트 이름. 기본값은 첫 번째 시트
+        nrows (int): 읽을 데이터 행 수
+
+    Returns:
+        dict: {"sheet", "sheets", "columns", "preview"(레코드 목록)}
+    """
+    workbook = _open_workbook(buffer)
+    try:
+        sheets = workbook.sheetnames
+        if sheet_name and sheet_name not in sheets:
+            raise ValueError(f"시트 '{sheet_name}'을(를) 찾을 수 없습니다. 시트 목록: {sheets}")
+        worksheet = workbook[sheet_name] if sheet_name else workbook[sheets[0]]
+        columns, rows = _read_rows(worksheet, max_rows=nrows)
+        return {
+            "sheet": worksheet.title,
+            "sheets": sheets,
+            "columns": columns,
+            "preview": [dict(zip(columns, row)) for row in rows]
+        }
+    finally:
+        workbook.close()
+
+def extract_workbook_metadata(buffer, preview_rows=EXCEL_PREVIEW_ROWS, sample_rows=EXCEL_DTYPE_SAMPLE_ROWS):
+    """
+    업로드 시 저장할 시트별 메타데이터(시트 이름, 크기, 열 이름/타입, 미리보기 행)를 추출합니다.
+    행은 스트리밍으로 한 번만 순회하며, 타입 추론용 표본과 미리보기 행만 메모리에 유지합니다.
+
+    Returns:
+        dict: {"sheets": [{"name", "rows", "columns", "column_names", "dtypes", "preview"}]}
+    """
+    workbook = _open_workbook(buffer)
+    try:
+        sheets = []
+        for worksheet in workbook.worksheets:
+            rows_iter = worksheet.iter_rows(values_only=True)
+            header = next(rows_iter, None)
+            columns = _column_names(header) if header is not None else []
+            sample = []
+            row_count = 0
+            for row in rows_iter:
+                row_count += 1
+                if len(sample) < max(sample_rows, preview_rows):
+                    # 타입 추론을 위해 원래 값(날짜 등)을 유지
+                    sample.append(_row_values(row, len(columns), convert=False))
+            sheets.append({
+                "name": worksheet.title,
+                "rows": row_count,
+                "columns": len(columns),
+                "column_names": columns,
+                "dtypes": _infer_dtypes(columns, sample),
+                "preview": [dict(zip(columns, [_cell_value(v) for v in row])) for row in sample[:preview_rows]]
+            })
+        return {"sheets": sheets}
+    finally:
+        workbook.close()
+
+def _to_columnar_frame(columns, rows):
+    """행 목록을 열 타입이 일관된 DataFrame으로 변환 (Parquet 저장용)"""
+    frame = pd.DataFrame(rows, columns=columns).infer_objects()
+    for column in frame.columns:
+        if frame[column].dtype != object:
+            continue
+        values = frame[column].dropna()
+        # 숫자/문자가 섞인 열이나 시간 값 등은 문자열 열로 통일
+        if not values.map(lambda v: isinstance(v, str)).all():
+            frame[column] = frame[column].map(lambda v: None if v is None else str(_cell_value(v)))
+    return frame
+
+def workbook_to_parquet(buffer):
+    """
+    워크북의 각 시트를 Parquet(열 지향) 바이트로 변환합니다. 업로드 시 한 번만 실행됩니다.
+
+    Returns:
+        dict: 시트 이름 -> Parquet 바이트 (시트 순서 유지)
+    """
+    workbook = _open_workbook(buffer)
+    try:
+        tables = {}
+        for worksheet in workbook.worksheets:
+            columns, rows = _read_rows(worksheet, convert=False)
+            if not columns:
+                continue
+            output = io.BytesIO()
+            _to_columnar_frame(columns, rows).to_parquet(output, engine="pyarrow", index=False, compression="zstd")
+            tables[worksheet.title] = output.getvalue()
+        return tables
+    finally:
+        workbook.close()
+
+def read_parquet_frame(data):
+    """Parquet 바이트를 DataFrame으로 읽기"""
+    return pd.read_parquet(io.BytesIO(data), engine="pyarrow")
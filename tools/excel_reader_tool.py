@@ -1,56 +1,80 @@
-import os
-import tempfile
-import pandas as pd
+import io
 from tools.base_tool import BaseTool
 from utils.logger import setup_logger
 from storage.mongodb_storage import MongoDBStorage
+from storage.spreadsheet import read_preview
+from config import EXCEL_PREVIEW_ROWS
 
 logger = setup_logger(__name__)
 
 class ExcelReaderTool(BaseTool):
-    """DB(GridFS)에서 엑셀 파일을 읽어 미리보기(상위 5개 행)를 반환하는 도구"""
+    """DB(GridFS)에서 엑셀 파일을 읽어 시트 구조와 미리보기(상위 5개 행)를 반환하는 도구"""
 
     def __init__(self):
         super().__init__(
             name="excel_reader_tool",
-            description="DB(GridFS)에 저장된 엑셀 파일을 file_id 또는 filename으로 찾아 미리보기(상위 5개 행)를 반환합니다."
+            description="DB(GridFS)에 저장된 엑셀 파일을 file_id 또는 filename으로 찾아 시트 구조와 미리보기(상위 5개 행)를 반환합니다."
         )
 
-    def execute(self, file_id: str = None, filename: str = None):
-        logger.info(f"DB 엑셀 미리보기 실행: file_id={file_id}, filename={filename}")
+    @staticmethod
+    def _from_metadata(file_info, sheet_name):
+        """업로드 시 저장된 시트 메타데이터로 결과 생성. 메타데이터가 없거나 시트가 없으면 None"""
+        workbook_meta = (file_info.get("metadata") or {}).get("spreadsheet")
+        if not workbook_meta or not workbook_meta.get("sheets"):
+            return None
+        sheets = workbook_meta["sheets"]
+        sheet = next((s for s in sheets if s["name"] == sheet_name), None) if sheet_name else sheets[0]
+        if sheet is None:
+            return None
+        return {
+            "filename": file_info["filename"],
+            "sheet": sheet["name"],
+            "sheets": [s["name"] for s in sheets],
+            "rows": sheet["rows"],
+            "columns": sheet["column_names"],
+            "dtypes": sheet["dtypes"],
+            "preview": sheet["preview"][:EXCEL_PREVIEW_ROWS]
+        }
+
+    def execute(self, file_id: str = None, filename: str = None, sheet_name: str = None):
+        logger.info(f"DB 엑셀 미리보기 실행: file_id={file_id}, filename={filename}, sheet_name={sheet_name}")
         try:
             mongo_storage = MongoDBStorage.get_instance()
-            # 파일 추출 (file_id 우선)
+            # 파일 찾기 (file_id 우선)
             if file_id:
-                content = mongo_storage.get_file_content_by_id(file_id)
-                fname = f"{file_id}.xlsx"
+                file_info = mongo_storage.file_catalog.get_by_id(file_id)
             elif filename:
-                # 부분 일치(대소문자 무시)로 파일명 검색
-                file_list = mongo_storage.list_files()
-                matched = [f for f in file_list if filename.lower() in f['filename'].lower()]
+                # 파일 카탈로그에서 부분 일치(대소문자 무시), 없으면 유사 파일명 검색
+                matched = mongo_storage.file_catalog.find(filename)
                 if not matched:
                     return f"'{filename}'(와)과 비슷한 파일을 DB에서 찾을 수 없습니다."
-                # 첫 번째 매칭 파일 사용
-                fname = matched[0]['filename']
-                content = mongo_storage.get_file_content(fname)
+                # 엑셀 파일을 우선으로 첫 번째 매칭 파일 사용
+                excel_files = [f for f in matched if f['filename'].lower().endswith(('.xlsx', '.xls'))]
+                file_info = (excel_files or matched)[0]
             else:
                 return "file_id 또는 filename 중 하나는 반드시 입력해야 합니다."
-            if not content:
+            if not file_info:
+                return "DB에서 파일을 찾을 수 없습니다."
+
+            # 1. 업로드 시 저장된 시트 메타데이터가 있으면 파일을 읽지 않고 응답
+            result = self._from_metadata(file_info, sheet_name)
+            if result is not None:
+                logger.info(f"엑셀 미리보기 (저장된 메타데이터 사용): {file_info['filename']}")
+                return result
+
+            # 2. 메타데이터가 없는 파일(이전 업로드)은 메모리 버퍼에서 필요한 행만 스트리밍으로 파싱
+            reader = mongo_storage.open_file(file_id=file_info["_id"])
+            if reader is None:
                 return "DB에서 파일을 찾을 수 없습니다."
-            # 임시 파일로 저장
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp:
-                tmp.write(content)
-                tmp_path = tmp.name
+            with reader:
+                buffer = io.BytesIO(reader.readall())
             try:
-                df = pd.read_excel(tmp_path)
-                preview = df.head().to_json(orient='records', force_ascii=False)
-                logger.info(f"엑셀 미리보기 성공: {fname}, shape={df.shape}")
+                result = {"filename": file_info["filename"], **read_preview(buffer, sheet_name, EXCEL_PREVIEW_ROWS)}
+                logger.info(f"엑셀 미리보기 성공: {file_info['filename']}, 시트={result['sheet']}")
             except Exception as e:
                 logger.error(f"엑셀 파일 읽기 오류: {e}")
-                preview = f"엑셀 파일을 읽는 중 오류가 발생했습니다: {e}"
-            finally:
-                os.remove(tmp_path)
-            return preview
+                result = f"엑셀 파일을 읽는 중 오류가 발생했습니다: {e}"
+            return result
         except Exception as e:
             logger.error(f"DB 엑셀 미리보기 도구 오류: {e}")
             return f"DB 엑셀 미리보기 도구 오류: {e}"
@@ -20,7 +20,7 @@ class ListFilesTool(BaseTool):
         try:
             # MongoDBStorage 싱글톤 인스턴스 사용
             mongo_storage = MongoDBStorage.get_instance()
-            file_list = mongo_storage.list_files()
+            file_list = mongo_storage.file_catalog.all()
             if not file_list:
                 return []
 
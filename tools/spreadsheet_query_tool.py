@@ -0,0 +1,158 @@
+# tools/spreadsheet_query_tool.py
+
+import re
+import pandas as pd
+from tools.base_tool import BaseTool
+from utils.logger import setup_logger
+from storage.mongodb_storage import MongoDBStorage
+from config import SPREADSHEET_QUERY_MAX_ROWS
+
+logger = setup_logger(__name__)
+
+AGGREGATIONS = ("sum", "mean", "count", "min", "max")
+FILTER_OPS = ("==", "!=", ">", ">=", "<", "<=", "contains")
+
+def _compact(text):
+    return re.sub(r"\s+", "", str(text)).casefold()
+
+def _to_python(value):
+    """numpy/pandas 값을 JSON으로 직렬화 가능한 값으로 변환"""
+    if value is None or (pd.api.types.is_scalar(value) and pd.isna(value)):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float):
+        return round(value, 6)
+    return value
+
+class SpreadsheetQueryTool(BaseTool):
+    """업로드된 엑셀 파일의 열 지향 변환본(Parquet)에 대해 필터/집계를 수행하는 도구"""
+
+    def __init__(self):
+        super().__init__(
+            name="spreadsheet_query_tool",
+            description="DB에 저장된 엑셀 파일 데이터에 대해 합계/평균/개수/최소/최대, 그룹별 집계, 상위 N개 조회를 수행합니다."
+        )
+
+    @staticmethod
+    def _resolve_column(frame, name):
+        """열 이름을 대소문자/공백 무시로 찾습니다. 없으면 ValueError"""
+        if name in frame.columns:
+            return name
+        matches = [c for c in frame.columns if _compact(c) == _compact(name)]
+        if not matches:
+            matches = [c for c in frame.columns if _compact(name) in _compact(c)]
+        if len(matches) == 1:
+            return matches[0]
+        raise ValueError(f"열 '{name}'을(를) 찾을 수 없습니다. 사용 가능한 열: {list(frame.columns)}")
+
+    @staticmethod
+    def _check_numeric(frame, column, agg):
+        """count를 제외한 집계(sum/mean/min/max)는 숫자 열에만 허용 (텍스트 열은 문자열 연결/사전순 결과가 나옴). 아니면 ValueError"""
+        if agg != "count" and not pd.api.types.is_numeric_dtype(frame[column]):
+            raise ValueError(
+                f"열 '{column}'은(는) 숫자 열이 아니므로 {agg} 집계를 할 수 없습니다 (자료형: {frame[column].dtype}). "
+                f"count를 사용하거나 숫자 열을 지정하세요."
+            )
+
+    def _apply_filters(self, frame, filters):
+        for condition in filters or []:
+            column = self._resolve_column(frame, condition.get("column", ""))
+            op, value = condition.get("op", "=="), condition.get("value")
+            if op not in FILTER_OPS:
+                raise ValueError(f"지원하지 않는 필터 연산자: {op}")
+            series = frame[column]
+            if op == "contains":
+                mask = series.astype(str).str.contains(str(value), case=False, na=False, regex=False)
+            else:
+                # 숫자 열은 문자열로 전달된 값도 숫자로 비교
+                if pd.api.types.is_numeric_dtype(series):
+                    value = pd.to_numeric(value)
+                elif pd.api.types.is_datetime64_any_dtype(series):
+                    value = pd.to_datetime(value)
+                mask = {
+                    "==": series == value, "!=": series != value,
+                    ">": series > value, ">=": series >= value,
+                    "<": series < value, "<=": series <= value,
+                }[op]
+            frame = frame[mask]
+        return frame
+
+    def execute(self, filename: str = None, operation: str = None, column: str = None, group_by: str = None,
+                agg: str = "sum", filters: list = None, n: int = 10, ascending: bool = False,
+                sheet_name: str = None, file_id: str = None):
+        """스프레드시트 집계를 수행하고 결과를 반환합니다."""
+        logger.info(
+            f"스프레드시트 집계 실행: filename={filename}, sheet={sheet_name}, operation={operation}, "
+            f"column={column}, group_by={group_by}, agg={agg}, filters={filters}"
+        )
+        try:
+            mongo_storage = MongoDBStorage.get_instance()
+            if file_id:
+                file_info = mongo_storage.file_catalog.get_by_id(file_id)
+            elif filename:
+                matched = [
+                    f for f in mongo_storage.file_catalog.find(filename)
+                    if f['filename'].lower().endswith('.xlsx')
+                ]
+                file_info = matched[0] if matched else None
+            else:
+                return {"error": "filename 또는 file_id 중 하나는 반드시 입력해야 합니다."}
+            if not file_info:
+                return {"error": f"'{filename or file_id}'(와)과 비슷한 엑셀 파일을 DB에서 찾을 수 없습니다."}
+
+            sheet, frame = mongo_storage.load_sheet_frame(file_info["_id"], sheet_name)
+            if frame is None:
+                return {"error": f"'{file_info['filename']}'에서 시트 '{sheet_name}'을(를) 찾을 수 없습니다."}
+
+            frame = self._apply_filters(frame, filters)
+            n = max(1, min(int(n or 10), SPREADSHEET_QUERY_MAX_ROWS))
+            result = {
+                "filename": file_info["filename"],
+                "sheet": sheet,
+                "operation": operation,
+                "rows_matched": int(len(frame))
+            }
+
+            if operation in AGGREGATIONS:
+                if operation == "count" and not column:
+                    result["result"] = int(len(frame))
+                else:
+                    target = self._resolve_column(frame, column)
+                    self._check_numeric(frame, target, operation)
+                    result["column"] = target
+                    result["result"] = _to_python(getattr(frame[target], operation)())
+            elif operation == "group_by":
+                if agg not in AGGREGATIONS:
+                    raise ValueError(f"지원하지 않는 집계 함수: {agg}")
+                key = self._resolve_column(frame, group_by)
+                target = self._resolve_column(frame, column) if column else key
+                self._check_numeric(frame, target, agg)
+                grouped = getattr(frame.groupby(key, dropna=False)[target], agg)()
+                grouped = grouped.sort_values(ascending=ascending)
+                result.update({"column": target, "group_by": key, "agg": agg, "groups": int(len(grouped))})
+                result["result"] = [
+                    {key: _to_python(group), f"{target}_{agg}": _to_python(value)}
+                    for group, value in grouped.head(n).items()
+                ]
+            elif operation == "top_n":
+                target = self._resolve_column(frame, column)
+                ordered = frame.sort_values(target, ascending=ascending).head(n)
+                result["column"] = target
+                result["result"] = [
+                    {k: _to_python(v) for k, v in row.items()}
+                    for row in ordered.to_dict(orient="records")
+                ]
+            else:
+                raise ValueError(f"지원하지 않는 연산: {operation}. 사용 가능: {list(AGGREGATIONS) + ['group_by', 'top_n']}")
+
+            logger.info(f"스프레드시트 집계 완료: {file_info['filename']} [{sheet}] {operation}, 대상 행 {result['rows_matched']}개")
+            return result
+        except ValueError as e:
+            logger.warning(f"스프레드시트 집계 인자 오류: {e}")
+            return {"error": str(e)}
+        except Exception as e:
+            logger.error(f"스프레드시트 집계 도구 오류: {e}")
+            return {"error": f"스프레드시트 집계 중 오류가 발생했습니다: {e}"}
@@ -51,66 +51,18 @@ class VectorSearchTool(BaseTool):
             # MongoDBStorage 싱글톤 인스턴스 사용
             mongo_storage = MongoDBStorage.get_instance()
 
-            # 파일 필터 처리: 제공된 필터가 있을 경우 실제 파일 이름을 찾아 사용
-            actual_file_filter = file_filter
-            if file_filter:
-                logger.info(f"파일 필터 인자 제공됨: '{file_filter}'. 실제 파일 이름을 찾습니다.")
-                try:
-                    # GridFS에 저장된 파일 목록 조회
-                    available_files = mongo_storage.list_files()
-                    logger.info(f"GridFS에서 조회된 파일 목록: {[f['filename'] for f in available_files]}")
-
-                    # 제공된 file_filter 문자열을 포함하는 파일 이름 찾기 (대소문자 구분 없이)
-                    matching_files = [
-                        f['filename'] for f in available_files
-                        if file_filter.lower() in f['filename'].lower()
-                    ]
-
-                    if len(matching_files) == 1:
-                        actual_file_filter = matching_files[0]
-                        logger.info(f"매칭되는 파일 이름 하나 발견: '{actual_file_filter}'으로 필터링합니다.")
-                    elif len(matching_files) > 1:
-                        logger.warning(f"매칭되는 파일 이름이 여러 개 발견되었습니다 ({matching_files}). 제공된 필터 '{file_filter}'을 그대로 사용합니다.")
-                        # 이 경우 사용자가 더 명확한 파일 이름을 제공하도록 유도하거나,
-                        # 사용자에게 선택지를 주거나, 모든 매칭 파일에서 검색하는 등의 로직을 추가할 수 있지만,
-                        # 현재는 제공된 필터를 그대로 사용하여 검색 결과가 부정확할 수 있음을 알립니다.
-                        actual_file_filter = file_filter # 제공된 필터를 그대로 사용
-                    else:
-                        logger.warning(f"제공된 파일 필터 '{file_filter}'에 매칭되는 파일이 GridFS에 없습니다. 파일 필터 없이 검색합니다.")
-                        actual_file_filter = None # 매칭되는 파일이 없으면 필터링하지 않음
-
-                except Exception as file_filter_error:
-                    logger.error(f"파일 필터 처리 중 오류 발생: {file_filter_error}")
-                    actual_file_filter = file_filter # 오류 발생 시 제공된 필터를 그대로 사용 (또는 None)
-
-
-            # MongoDBStorage의 vector_search 메소드 호출 (실제 파일 필터 사용)
+            # MongoDBStorage의 vector_search 메소드 호출
+            # 파일 필터는 vector_search에서 파일 ID로 변환해(정확 → 부분 → 유사 일치) 모든 검색 모드에 같은 조건으로 적용
             search_results = mongo_storage.vector_search(
                 query=query,
-                file_filter=actual_file_filter, # <- 처리된 파일 필터 사용
+                file_filter=file_filter,
                 tags_filter=tags_filter,
                 top_k=TOP_K_RESULTS # config에서 가져온 TOP_K_RESULTS 사용
             )
 
-            if not search_results:
-                return []
-
-            # 검색 결과를 JSON 리스트로 반환
-            result = []
-            for doc in search_results:
-                content = doc.get('content', '내용 없음')
-                filename = doc.get('metadata', {}).get('filename', '파일 이름 알 수 없음')
-                chunk_index = doc.get('metadata', {}).get('chunk_index', 'N/A')
-                score = doc.get('score', 'N/A')
-                # 내용이 길 경우 일부만 표시
-                display_content = content[:200] + '...' if len(content) > 200 else content
-                result.append({
-                    "filename": filename,
-                    "chunk_index": chunk_index,
-                    "score": score,
-                    "content": display_content
-                })
-            return result
+            # 검색 결과(SearchHit)를 JSON 리스트로 반환
+            # 본문은 이미 스니펫 길이(SEARCH_SNIPPET_LENGTH)로 잘려 있음 (Atlas는 집계 파이프라인 안에서 처리)
+            return [hit.to_dict() for hit in search_results]
 
         except Exception as e:
             logger.error(f"InternalVectorSearchTool 실행 중 오류 발생: {str(e)}")
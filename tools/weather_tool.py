@@ -1,15 +1,26 @@
 # tools/weather_tool.py
 
 import os
-import requests
 from tools.base_tool import BaseTool
-from config import WEATHER_API_KEY
+from config import WEATHER_API_KEY, GEOCODE_CACHE_SIZE
 from utils.logger import setup_logger
+from utils.cache import TTLCache
+from utils.http_client import http_get, async_get_json
 
 logger = setup_logger(__name__)
 
+GEOCODING_URL = "https://api.openweathermap.org/geo/1.0/direct"
+CURRENT_WEATHER_URL = "https://api.openweathermap.org/data/2.5/weather"
+
+def _location_key(location):
+    """지오코딩 캐시 키 (공백/대소문자 차이 무시)"""
+    return " ".join(str(location).split()).casefold()
+
 class WeatherTool(BaseTool):
     """날씨 정보 도구"""
+
+    # 지명 → (위도, 경도) 캐시. 좌표는 바뀌지 않으므로 만료 없이 크기로만 제한하며 인스턴스 간 공유합니다.
+    _geocode_cache = TTLCache(max_size=GEOCODE_CACHE_SIZE)
     
     def __init__(self, api_key=None):
         """
@@ -50,26 +61,78 @@ class WeatherTool(BaseTool):
             logger.error(f"날씨 조회 오류: {str(e)}")
             return {"error": f"날씨 정보를 가져오는 중 오류가 발생했습니다: {str(e)}"}
     
-    def _get_real_weather(self, location):
-        """OpenWeather Current Weather Data API 사용 (무료, 모든 주요 필드 포함)"""
+    def _geocode(self, location):
+        """지명을 (위도, 경도)로 변환합니다. 캐시에 있으면 API를 호출하지 않습니다."""
+        key = _location_key(location)
+        coords = self._geocode_cache.get(key)
+        if coords is not None:
+            logger.info(f"지오코딩 캐시 사용: {location} -> {coords}")
+            return coords
+
         logger.info(f"OpenWeather Geocoding API 호출: {location}")
-        geo_url = f"https://api.openweathermap.org/geo/1.0/direct?q={location}&limit=1&appid={self.api_key}"
-        geo_resp = requests.get(geo_url)
+        geo_resp = http_get(GEOCODING_URL, params={"q": location, "limit": 1, "appid": self.api_key})
         if geo_resp.status_code != 200:
             raise Exception(f"Geocoding API 오류 (코드: {geo_resp.status_code}): {geo_resp.text}")
-        geo_data = geo_resp.json()
+        coords = self._parse_geocode(geo_resp.json())
+        self._geocode_cache.set(key, coords)
+        return coords
+
+    @staticmethod
+    def _parse_geocode(geo_data):
         if not geo_data:
             raise Exception("도시명을 위도/경도로 변환할 수 없습니다.")
-        lat = geo_data[0]['lat']
-        lon = geo_data[0]['lon']
+        return geo_data[0]['lat'], geo_data[0]['lon']
+
+    def _weather_params(self, lat, lon):
+        return {"lat": lat, "lon": lon, "units": "metric", "appid": self.api_key, "lang": "kr"}
+
+    def _get_real_weather(self, location):
+        """OpenWeather Current Weather Data API 사용 (무료, 모든 주요 필드 포함)"""
+        lat, lon = self._geocode(location)
 
         logger.info(f"OpenWeather Current Weather API 호출: lat={lat}, lon={lon}")
-        weather_url = f"https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&units=metric&appid={self.api_key}&lang=kr"
-        weather_resp = requests.get(weather_url)
+        weather_resp = http_get(CURRENT_WEATHER_URL, params=self._weather_params(lat, lon))
         if weather_resp.status_code != 200:
             raise Exception(f"Current Weather API 오류 (코드: {weather_resp.status_code}): {weather_resp.text}")
-        data = weather_resp.json()
+        return self._format_weather(location, lat, lon, weather_resp.json())
+
+    async def aexecute(self, location):
+        """
+        execute의 비동기 버전 (aiohttp 사용). 스레드 풀을 거치지 않고 이벤트 루프에서 직접 실행됩니다.
+
+        Args:
+            location (str): 날씨를 확인할 위치(도시 이름)
+
+        Returns:
+            dict: 형식화된 날씨 정보
+        """
+        logger.info(f"날씨 조회 (비동기): {location}")
+        if not self.api_key:
+            return self.execute(location)
+        try:
+            key = _location_key(location)
+            coords = self._geocode_cache.get(key)
+            if coords is None:
+                logger.info(f"OpenWeather Geocoding API 호출: {location}")
+                status, geo_data = await async_get_json(GEOCODING_URL, {"q": location, "limit": 1, "appid": self.api_key})
+                if status != 200:
+                    raise Exception(f"Geocoding API 오류 (코드: {status}): {geo_data}")
+                coords = self._parse_geocode(geo_data)
+                self._geocode_cache.set(key, coords)
+            lat, lon = coords
+
+            logger.info(f"OpenWeather Current Weather API 호출: lat={lat}, lon={lon}")
+            status, data = await async_get_json(CURRENT_WEATHER_URL, self._weather_params(lat, lon))
+            if status != 200:
+                raise Exception(f"Current Weather API 오류 (코드: {status}): {data}")
+            return self._format_weather(location, lat, lon, data)
+        except Exception as e:
+            logger.error(f"날씨 조회 오류: {str(e)}")
+            return {"error": f"날씨 정보를 가져오는 중 오류가 발생했습니다: {str(e)}"}
 
+    @staticmethod
+    def _format_weather(location, lat, lon, data):
+        """Current Weather API 응답을 도구 결과 형식으로 변환"""
         main = data.get('main', {})
         wind = data.get('wind', {})
         clouds = data.get('clouds', {})
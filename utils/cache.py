@@ -0,0 +1,107 @@
+# utils/cache.py
+
+import time
+import threading
+from collections import OrderedDict
+
+class TTLCache:
+    """TTL 만료와 최대 크기(LRU 방출)를 지원하는 스레드 안전 인메모리 캐시"""
+
+    def __init__(self, max_size=1024, ttl=None):
+        """
+        캐시 초기화
+
+        Args:
+            max_size (int, optional): 최대 항목 수. 초과 시 가장 오래 사용되지 않은 항목부터 방출합니다.
+            ttl (float, optional): 기본 만료 시간(초). None이면 만료되지 않습니다.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict() # key -> (value, expires_at)
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _is_expired(self, expires_at, now=None):
+        return expires_at is not None and (now or time.monotonic()) >= expires_at
+
+    def get(self, key, default=None):
+        """키에 해당하는 값을 반환합니다. 없거나 만료되었으면 default를 반환합니다."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            value, expires_at = item
+            if self._is_expired(expires_at):
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """
+        값을 저장합니다.
+
+        Args:
+            key: 캐시 키 (hashable)
+            value: 저장할 값
+            ttl (float, optional): 이 항목의 만료 시간(초). None이면 캐시 기본값을 사용합니다.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        """항목을 제거하고 값을 반환합니다."""
+        with self._lock:
+            item = self._data.pop(key, None)
+            return default if item is None else item[0]
+
+    def remove_where(self, predicate):
+        """predicate(key, value)가 True인 항목을 모두 제거하고 제거된 개수를 반환합니다."""
+        with self._lock:
+            keys = [k for k, (v, _) in self._data.items() if predicate(k, v)]
+            for k in keys:
+                del self._data[k]
+            return len(keys)
+
+    def items(self):
+        """만료되지 않은 (key, value) 목록의 스냅샷을 반환합니다."""
+        now = time.monotonic()
+        with self._lock:
+            return [(k, v) for k, (v, exp) in self._data.items() if not self._is_expired(exp, now)]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            return item is not None and not self._is_expired(item[1])
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def get_stats(self):
+        """캐시 통계 반환"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0
+            }
@@ -0,0 +1,151 @@
+# utils/coalescing.py
+
+import copy
+import asyncio
+import threading
+from concurrent.futures import Future
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+class SingleFlight:
+    """
+    같은 키의 요청이 동시에 여러 개 들어오면 하나만 실행하고 나머지는 그 결과를 함께 받는 요청 병합(singleflight).
+    결과는 concurrent.futures.Future로 공유하므로 스레드가 다른 동기 호출자와
+    이벤트 루프가 다른 비동기 호출자가 섞여 있어도 병합됩니다.
+    완료된 결과는 보관하지 않습니다 (캐시가 아니라 진행 중인 요청만 병합).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {} # 키 -> Future
+        self.stats = {"executed": 0, "coalesced": 0}
+
+    def _join(self, key):
+        """(Future, 선행 요청 여부) 반환 - 진행 중인 요청이 없으면 새 Future를 등록하고 호출자가 실행"""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+            self.stats["executed"] += 1
+            return future, True
+
+    def _finish(self, key, future, result=None, error=None):
+        with self._lock:
+            self._inflight.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key, fn):
+        """
+        fn()을 실행하거나, 같은 키의 요청이 진행 중이면 그 결과를 기다립니다.
+        호출자마다 결과의 복사본을 받으므로 반환값을 수정해도 다른 호출자에게 영향이 없습니다.
+
+        Args:
+            key: 요청 키 (hashable)
+            fn (callable): 실제 요청을 수행하는 함수
+
+        Returns:
+            fn()의 반환값 (복사본)
+        """
+        future, leader = self._join(key)
+        if leader:
+            try:
+                self._finish(key, future, result=fn())
+            except BaseException as e:
+                self._finish(key, future, error=e)
+        return copy.deepcopy(future.result())
+
+    async def ado(self, key, coro_fn):
+        """
+        do의 비동기 버전. coro_fn()은 코루틴을 반환하는 함수입니다.
+
+        Returns:
+            코루틴 결과 (복사본)
+        """
+        future, leader = self._join(key)
+        if leader:
+            try:
+                self._finish(key, future, result=await coro_fn())
+            except BaseException as e:
+                self._finish(key, future, error=e)
+        return copy.deepcopy(await asyncio.wrap_future(future))
+
+    def get_stats(self):
+        with self._lock:
+            return {**self.stats, "in_flight": len(self._inflight)}
+
+class MicroBatcher:
+    """
+    짧은 시간(max_wait) 동안 들어온 서로 다른 요청을 묶어 한 번에 처리하는 마이크로 배치 큐.
+    같은 batch_key(예: 온도)의 요청만 함께 묶으며, 배치가 가득 차면 즉시, 아니면 max_wait 후 처리합니다.
+    """
+
+    def __init__(self, run_batch, max_batch_size=8, max_wait=0.02):
+        """
+        Args:
+            run_batch (callable): run_batch(batch_key, items) -> items와 같은 순서의 결과 목록
+            max_batch_size (int): 한 배치의 최대 요청 수
+            max_wait (float): 첫 요청 이후 배치를 모으는 최대 대기 시간(초)
+        """
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._pending = {} # batch_key -> [(item, Future)]
+        self.stats = {"requests": 0, "batches": 0, "largest_batch": 0}
+
+    def submit(self, batch_key, item):
+        """
+        요청을 배치 큐에 넣고 결과 Future를 반환합니다.
+        동기 호출자는 future.result(), 비동기 호출자는 await asyncio.wrap_future(future)로 기다립니다.
+        """
+        future = Future()
+        with self._lock:
+            self.stats["requests"] += 1
+            bucket = self._pending.setdefault(batch_key, [])
+            bucket.append((item, future))
+            first = len(bucket) == 1
+            full = len(bucket) >= self.max_batch_size
+            if full:
+                del self._pending[batch_key]
+        if full:
+            threading.Thread(target=self._run, args=(batch_key, bucket), daemon=True, name="micro-batch").start()
+        elif first:
+            timer = threading.Timer(self.max_wait, self._flush, args=(batch_key, bucket))
+            timer.daemon = True
+            timer.start()
+        return future
+
+    def _flush(self, batch_key, bucket):
+        """대기 시간이 지난 배치 처리 (그 사이 가득 차서 이미 처리된 배치는 건너뜀)"""
+        with self._lock:
+            if self._pending.get(batch_key) is not bucket:
+                return
+            del self._pending[batch_key]
+        self._run(batch_key, bucket)
+
+    def _run(self, batch_key, bucket):
+        with self._lock:
+            self.stats["batches"] += 1
+            self.stats["largest_batch"] = max(self.stats["largest_batch"], len(bucket))
+        try:
+            results = self.run_batch(batch_key, [item for item, _ in bucket])
+            if len(results) != len(bucket):
+                raise RuntimeError(f"배치 결과 수 불일치: 요청 {len(bucket)}개, 결과 {len(results)}개")
+        except Exception as e:
+            logger.error(f"마이크로 배치 처리 오류 ({len(bucket)}개 요청): {e}")
+            for _, future in bucket:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(bucket, results):
+            future.set_result(result)
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats)
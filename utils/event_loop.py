@@ -0,0 +1,111 @@
+# utils/event_loop.py
+
+import atexit
+import asyncio
+import threading
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+_loop = None
+_thread = None
+_lock = threading.Lock()
+_shutdown_hooks = [] # 루프 종료 전에 루프 안에서 실행할 비동기 정리 함수 (연결 풀 닫기 등)
+
+def get_background_loop():
+    """
+    프로세스 전체가 함께 쓰는 백그라운드 이벤트 루프를 반환합니다 (처음 호출 시 전용 스레드에서 시작).
+    Streamlit은 재실행마다 새 스크립트 스레드를 쓰므로 asyncio.run은 턴마다 새 루프를 만들고,
+    루프에 묶인 연결 풀(httpx/aiohttp)이 턴마다 새로 생기고 닫히지 않습니다.
+    비동기 작업을 이 루프 하나에서 실행하면 연결 풀을 턴 사이에 재사용할 수 있습니다.
+
+    Returns:
+        asyncio.AbstractEventLoop: 백그라운드 루프
+    """
+    global _loop, _thread
+    if _loop is None:
+        with _lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="async-runtime", daemon=True)
+                thread.start()
+                _thread = thread
+                _loop = loop
+                logger.info("공유 백그라운드 이벤트 루프 시작")
+    return _loop
+
+def is_background_loop(loop=None):
+    """loop(기본값: 현재 실행 중인 루프)가 공유 백그라운드 루프인지 여부"""
+    if loop is None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+    return loop is _loop
+
+def run_coroutine(coro, timeout=None):
+    """
+    코루틴을 공유 백그라운드 루프에서 실행하고 결과를 기다립니다 (동기 코드에서 asyncio.run 대신 사용).
+
+    Args:
+        coro: 실행할 코루틴
+        timeout (float, optional): 최대 대기 시간(초)
+
+    Returns:
+        코루틴의 반환값
+    """
+    loop = get_background_loop()
+    if is_background_loop():
+        coro.close()
+        raise RuntimeError("백그라운드 루프 안에서는 run_coroutine을 호출할 수 없습니다. await를 사용하세요.")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+def iterate_in_background(agen):
+    """
+    비동기 제너레이터를 공유 백그라운드 루프에서 실행하면서 동기 코드에서 항목을 하나씩 받습니다.
+    (예: Streamlit 스크립트 스레드에서 응답 스트림을 소비하면서 LLM 요청은 백그라운드 루프의 동시 요청 제한을 거치도록 함)
+    소비가 중간에 끝나도 제너레이터를 닫아 점유한 연결/슬롯을 반환합니다.
+
+    Args:
+        agen: 비동기 제너레이터
+
+    Yields:
+        비동기 제너레이터가 내보내는 항목
+    """
+    try:
+        while True:
+            try:
+                yield run_coroutine(agen.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        run_coroutine(agen.aclose())
+
+def add_shutdown_hook(hook):
+    """프로세스 종료 시 백그라운드 루프에서 실행할 비동기 정리 함수(인자 없는 코루틴 함수)를 등록합니다."""
+    with _lock:
+        _shutdown_hooks.append(hook)
+
+async def _run_shutdown_hooks():
+    for hook in reversed(_shutdown_hooks):
+        try:
+            await hook()
+        except Exception as e:
+            logger.warning(f"백그라운드 루프 정리 함수 오류: {e}")
+
+def shutdown(timeout=5):
+    """등록된 정리 함수를 실행한 뒤 백그라운드 루프를 멈춥니다 (프로세스 종료 시 자동 호출)."""
+    global _loop, _thread
+    with _lock:
+        loop, thread = _loop, _thread
+        _loop = _thread = None
+    if loop is None:
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(_run_shutdown_hooks(), loop).result(timeout)
+    except Exception as e:
+        logger.warning(f"백그라운드 루프 정리 실패: {e}")
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout)
+
+atexit.register(shutdown)
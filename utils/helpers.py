@@ -1,7 +1,10 @@
 # utils/helpers.py
 
+import os
 import json
 import time
+import random
+import asyncio
 from functools import wraps
 from utils.logger import setup_logger
 
@@ -27,16 +30,100 @@ def retry(max_retries=3, delay=1):
         return wrapper
     return decorator
 
-def format_tool_results(results):
-    """도구 실행 결과를 포맷팅합니다."""
-    formatted_results = []
-    
-    for tool_name, result in results.items():
-        formatted_results.append(f"도구: {tool_name}")
-        formatted_results.append(f"결과: {result}")
-        formatted_results.append("-" * 40)
+def async_retry(max_retries=3, base_delay=0.5, max_delay=8.0):
+    """
+    비동기 함수용 재시도 데코레이터.
+    지수 백오프에 전체 지터(full jitter)를 적용하고 asyncio.sleep으로 대기하므로 대기 중에도 스레드를 점유하지 않습니다.
+
+    Args:
+        max_retries (int): 최대 시도 횟수
+        base_delay (float): 첫 재시도 대기 시간 상한(초). 재시도마다 두 배로 늘어납니다.
+        max_delay (float): 대기 시간 상한(초)
+    """
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            for attempt in range(1, max_retries + 1):
+                try:
+                    return await func(*args, **kwargs)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    if attempt == max_retries:
+                        logger.error(f"최대 재시도 횟수 도달: {func.__name__}, 에러: {str(e)}")
+                        raise
+                    delay = random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+                    logger.warning(
+                        f"함수 실행 실패: {func.__name__}, 재시도 {attempt}/{max_retries} ({delay:.2f}초 후), 에러: {str(e)}"
+                    )
+                    await asyncio.sleep(delay)
+        return wrapper
+    return decorator
+
+def get_rss_mb():
+    """
+    현재 프로세스의 상주 메모리(RSS, MB). psutil이 있으면 사용하고, 없으면 /proc(리눅스),
+    그것도 없으면 최대 RSS(resource)로 대신합니다. 측정할 수 없으면 None
+    """
+    try:
+        import psutil
+        return round(psutil.Process().memory_info().rss / 1024 ** 2, 1)
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2, 1)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    except ImportError:
+        return None
+
+def measure_stream(stream, metrics, origin=None):
+    """
+    텍스트 스트림을 그대로 전달하면서 첫 토큰 지연 시간(TTFT) 등을 metrics에 기록합니다.
     
-    return "\n".join(formatted_results)
+    Args:
+        stream (iterable): 텍스트 조각을 반환하는 반복자
+        metrics (dict): 측정값을 기록할 딕셔너리 (ttft, generation_time, chunks)
+        origin (float, optional): time.perf_counter() 기준 시작 시각. 있으면 ttft_total도 기록
+    """
+    start = time.perf_counter()
+    metrics["chunks"] = 0
+    for delta in stream:
+        if metrics["chunks"] == 0:
+            now = time.perf_counter()
+            metrics["ttft"] = round(now - start, 3)
+            if origin is not None:
+                metrics["ttft_total"] = round(now - origin, 3)
+        metrics["chunks"] += 1
+        yield delta
+    metrics["generation_time"] = round(time.perf_counter() - start, 3)
+
+async def ameasure_stream(stream, metrics, origin=None):
+    """measure_stream의 비동기 버전"""
+    start = time.perf_counter()
+    metrics["chunks"] = 0
+    async for delta in stream:
+        if metrics["chunks"] == 0:
+            now = time.perf_counter()
+            metrics["ttft"] = round(now - start, 3)
+            if origin is not None:
+                metrics["ttft_total"] = round(now - origin, 3)
+        metrics["chunks"] += 1
+        yield delta
+    metrics["generation_time"] = round(time.perf_counter() - start, 3)
+
+def format_tool_results(results, user_query=""):
+    """
+    도구 실행 결과를 도구별 요약 형식으로 포맷팅합니다 (토큰 예산은 적용하지 않음).
+    응답 생성 프롬프트에는 ResponseGenerator가 예산을 적용한 core.context_builder.ContextBuilder를 사용합니다.
+    """
+    from core.context_builder import ContextBuilder
+    formatted_results, _ = ContextBuilder(token_budget=0).build(user_query, results)
+    return formatted_results
 
 def safe_json_loads(json_str):
     """안전하게 JSON을 파싱합니다."""
@@ -0,0 +1,111 @@
+# utils/http_client.py
+
+import threading
+import contextlib
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from utils.logger import setup_logger
+from utils.event_loop import is_background_loop, add_shutdown_hook
+from config import HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_POOL_SIZE, HTTP_MAX_RETRIES
+
+logger = setup_logger(__name__)
+
+# 기본 타임아웃 (연결, 응답 대기)
+DEFAULT_TIMEOUT = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+_session = None
+_session_lock = threading.Lock()
+_async_session = None # 공유 백그라운드 루프 전용 aiohttp.ClientSession (프로세스 종료 시 닫힘)
+
+def get_session():
+    """
+    도구들이 함께 사용하는 requests 세션을 반환합니다 (처음 호출 시 생성).
+    호스트별 연결 풀(keep-alive)을 유지하므로 같은 API에 대한 반복 호출은 TCP/TLS 연결을 재사용합니다.
+    requests.Session은 여러 스레드에서 동시에 요청을 보내도 안전합니다.
+
+    Returns:
+        requests.Session: 공유 세션
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = Retry(
+                    total=HTTP_MAX_RETRIES,
+                    backoff_factor=0.3,
+                    status_forcelist=(502, 503, 504),
+                    allowed_methods=frozenset(["GET"]),
+                    raise_on_status=False
+                )
+                adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+                logger.info(f"공유 HTTP 세션 생성 (풀 크기: {HTTP_POOL_SIZE}, 타임아웃: {DEFAULT_TIMEOUT})")
+    return _session
+
+def http_get(url, params=None, timeout=None, **kwargs):
+    """
+    공유 세션으로 GET 요청을 보냅니다. timeout을 지정하지 않으면 config의 기본 타임아웃을 적용합니다.
+
+    Args:
+        url (str): 요청 URL
+        params (dict, optional): 쿼리 파라미터 (URL 인코딩은 requests가 처리)
+        timeout (float | tuple, optional): 타임아웃(초) 또는 (연결, 응답 대기) 튜플
+
+    Returns:
+        requests.Response: 응답 객체
+    """
+    return get_session().get(url, params=params, timeout=timeout or DEFAULT_TIMEOUT, **kwargs)
+
+def _new_async_session():
+    """aiohttp 세션 생성 (호스트별 연결 풀 크기와 타임아웃 적용)"""
+    import aiohttp # 비동기 클라이언트를 사용할 때만 로드
+
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit_per_host=HTTP_POOL_SIZE),
+        timeout=aiohttp.ClientTimeout(connect=HTTP_CONNECT_TIMEOUT, sock_read=HTTP_READ_TIMEOUT)
+    )
+
+@contextlib.asynccontextmanager
+async def async_session_scope():
+    """
+    요청에 사용할 aiohttp 세션.
+    aiohttp 세션은 만들어진 루프에서만 사용할 수 있으므로, 공유 백그라운드 루프(utils.event_loop)에서는
+    프로세스 동안 세션 하나(연결 풀)를 재사용하고 종료 시 닫으며,
+    그 밖의 루프(asyncio.run 등)에서는 요청마다 만든 세션을 요청이 끝나면 닫습니다.
+
+    Yields:
+        aiohttp.ClientSession: 요청에 사용할 세션
+    """
+    global _async_session
+    if is_background_loop():
+        if _async_session is None or _async_session.closed:
+            _async_session = _new_async_session()
+            add_shutdown_hook(_async_session.close)
+        yield _async_session
+        return
+    session = _new_async_session()
+    try:
+        yield session
+    finally:
+        await session.close()
+
+async def async_get_json(url, params=None):
+    """
+    aiohttp로 GET 요청을 보내고 (상태 코드, JSON 또는 본문 텍스트)를 반환합니다.
+
+    Args:
+        url (str): 요청 URL
+        params (dict, optional): 쿼리 파라미터
+
+    Returns:
+        tuple: (status, data) - 200이면 JSON, 아니면 응답 본문 문자열
+    """
+    async with async_session_scope() as session:
+        async with session.get(url, params=params) as response:
+            if response.status != 200:
+                return response.status, await response.text()
+            return response.status, await response.json(content_type=None)
@@ -0,0 +1,31 @@
+# utils/tracing.py
+
+import threading
+from utils.logger import setup_logger
+from config import TRACING_ENABLED, LANGSMITH_PROJECT
+
+logger = setup_logger(__name__)
+
+_initialized = False
+_lock = threading.Lock()
+
+def init_tracing():
+    """
+    LangSmith 추적을 설정합니다 (프로세스당 한 번, 처음 호출될 때만).
+    config를 임포트할 때마다 langchain_teddynote를 불러오지 않도록, LangChain 구성 요소를 만들기 직전에 호출합니다.
+
+    Returns:
+        bool: 추적이 설정되었으면 True
+    """
+    global _initialized
+    if _initialized or not TRACING_ENABLED:
+        return _initialized
+    with _lock:
+        if not _initialized:
+            try:
+                from langchain_teddynote import logging
+                logging.langsmith(LANGSMITH_PROJECT)
+                _initialized = True
+            except Exception as e:
+                logger.warning(f"LangSmith 추적 설정 실패: {e}")
+    return _initialized